@@ -0,0 +1,64 @@
+"""
+Benchmarks dos caminhos críticos dos agendamentos, com pytest-benchmark.
+
+Os benchmarks rodam no próprio processo (sem servidor HTTP), contra um banco
+de teste populado uma única vez por sessão com ``massa.gerar_massa``: por
+padrão 1.000 salas, 50.000 usuários e 100.000 agendamentos. ``--massa-escala``
+multiplica as quantidades (0.1 para uma rodada rápida).
+
+Uso (a partir de backend/; os benchmarks ficam fora de ``testpaths``):
+    pytest benchmarks --no-cov --benchmark-autosave --benchmark-storage=benchmarks/resultados
+
+Cada execução é gravada em JSON em ``benchmarks/resultados``, com o commit no
+nome do arquivo. Para comparar com a execução anterior e falhar em regressões:
+    pytest benchmarks --no-cov --benchmark-storage=benchmarks/resultados \\
+        --benchmark-compare --benchmark-compare-fail=median:10%
+ou, entre duas execuções já gravadas:
+    pytest-benchmark --storage benchmarks/resultados compare 0001 0002
+"""
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .massa import gerar_massa
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--massa-escala', type=float, default=1.0,
+        help='Multiplica a quantidade de salas, usuários e agendamentos da massa de dados.'
+    )
+
+
+@pytest.fixture(scope='session')
+def massa(request, django_db_setup, django_db_blocker):
+    """Popula o banco de teste uma única vez para toda a sessão."""
+    escala = request.config.getoption('--massa-escala')
+    with django_db_blocker.unblock():
+        return gerar_massa(
+            salas=max(int(1000 * escala), 1),
+            usuarios=max(int(50000 * escala), 1),
+            agendamentos=max(int(100000 * escala), 1),
+        )
+
+
+@pytest.fixture
+def chamar(db):
+    """Executa uma action de viewset em processo e retorna a resposta renderizada."""
+    fabrica = APIRequestFactory()
+
+    def chamar(viewset, acao, usuario=None, metodo='get', limpar_cache=False, **dados):
+        if limpar_cache:
+            cache.clear()
+        if metodo == 'get':
+            request = fabrica.get('/', dados)
+        else:
+            request = getattr(fabrica, metodo)('/', dados, format='json')
+        if usuario is not None:
+            force_authenticate(request, user=usuario)
+        response = viewset.as_view({metodo: acao})(request)
+        response.render()
+        assert response.status_code < 400, response.content
+        return response
+
+    return chamar
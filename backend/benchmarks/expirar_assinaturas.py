@@ -0,0 +1,77 @@
+"""
+Mede a varredura de assinaturas vencidas (subscriptions.ciclo).
+
+Cria um banco de teste temporário com ``--quantidade`` assinaturas, metade com
+trial ou período vencido, e mede o tempo de ``expirar_assinaturas``.
+
+Uso (a partir de backend/):
+    python benchmarks/expirar_assinaturas.py [--quantidade 100000] [--chunk 5000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studioflow.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from subscriptions.ciclo import expirar_assinaturas  # noqa: E402
+from subscriptions.models import Subscription  # noqa: E402
+from users.models import User  # noqa: E402
+
+LOTE_DE_INSERCAO = 10000
+
+
+def popular(quantidade):
+    """Insere usuários e assinaturas sem disparar signals."""
+    agora = timezone.now()
+    ontem, amanha = agora - timedelta(days=1), agora + timedelta(days=1)
+    for inicio in range(0, quantidade, LOTE_DE_INSERCAO):
+        indices = range(inicio, min(inicio + LOTE_DE_INSERCAO, quantidade))
+        usuarios = User.objects.bulk_create(
+            User(email=f'cliente{i}@bench.com', nome=f'Cliente {i}') for i in indices
+        )
+        Subscription.objects.bulk_create(
+            Subscription(
+                usuario=usuario,
+                status=Subscription.StatusSubscription.TRIAL if i % 2 else Subscription.StatusSubscription.ACTIVE,
+                trial_end=ontem if i % 4 < 2 else amanha,
+                current_period_end=ontem if i % 4 < 2 else amanha,
+                cancel_at_period_end=i % 8 == 0,
+            )
+            for i, usuario in zip(indices, usuarios)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quantidade', type=int, default=100000)
+    parser.add_argument('--chunk', type=int, default=None)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    nome_banco = connection.creation.create_test_db(verbosity=0)
+    try:
+        popular(args.quantidade)
+        comeco = time.perf_counter()
+        resultado = expirar_assinaturas(chunk=args.chunk)
+        segundos = time.perf_counter() - comeco
+        alteradas = sum(resultado.values())
+        print(f'{args.quantidade} assinaturas, {alteradas} alteradas em {segundos:.2f}s '
+              f'({alteradas / segundos:,.0f}/s)')
+        print(resultado)
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
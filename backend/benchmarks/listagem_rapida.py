@@ -0,0 +1,113 @@
+"""
+Compara a renderização das listagens pelo serializer e pela listagem rápida.
+
+Cria um banco de teste temporário, insere agendamentos e mede o tempo de
+transformar as linhas em JSON pelos dois caminhos, com 1.000 e 10.000 linhas.
+
+Uso (a partir de backend/):
+    python benchmarks/listagem_rapida.py [--repeticoes 5]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studioflow.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from bookings.models import Agendamento  # noqa: E402
+from bookings.serializers import AgendamentoSerializer  # noqa: E402
+from studioflow.listagem_rapida import obter_plano  # noqa: E402
+from studios.models import Sala  # noqa: E402
+from studios.serializers import SalaSerializer  # noqa: E402
+from users.models import User  # noqa: E402
+
+TAMANHOS = (1000, 10000)
+
+
+def popular(quantidade):
+    """Insere salas, clientes e ``quantidade`` agendamentos sem disparar signals."""
+    Agendamento.objects.all().delete()
+    Sala.objects.all().delete()
+    User.objects.all().delete()
+    salas = Sala.objects.bulk_create(
+        Sala(nome=f'Sala {i}', capacidade=10, preco_hora=Decimal('80.50'), descricao='Benchmark')
+        for i in range(quantidade)
+    )
+    clientes = User.objects.bulk_create(
+        User(email=f'cliente{i}@bench.com', nome=f'Cliente {i}', user_type='CLIENTE')
+        for i in range(50)
+    )
+    inicio = timezone.now()
+    Agendamento.objects.bulk_create(
+        Agendamento(
+            sala=salas[i % len(salas)],
+            cliente=clientes[i % len(clientes)],
+            horario_inicio=inicio + timedelta(hours=i),
+            horario_fim=inicio + timedelta(hours=i + 1),
+            valor_total=Decimal('80.50'),
+        )
+        for i in range(quantidade)
+    )
+
+
+def medir(funcao, repeticoes):
+    """Retorna o menor tempo, em milissegundos, entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        comeco = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - comeco) * 1000)
+    return min(tempos), resultado
+
+
+def comparar(nome, serializer_class, queryset, repeticoes):
+    plano = obter_plano(serializer_class)
+    renderizador = JSONRenderer()
+
+    def pelo_serializer():
+        return renderizador.render(serializer_class(queryset.all(), many=True).data)
+
+    def pela_listagem_rapida():
+        return renderizador.render(plano.renderizar(queryset.values_list(*plano.colunas)))
+
+    tempo_serializer, json_serializer = medir(pelo_serializer, repeticoes)
+    tempo_rapido, json_rapido = medir(pela_listagem_rapida, repeticoes)
+    identico = 'sim' if json_serializer == json_rapido else 'NÃO'
+    print(
+        f'{nome:<14} {queryset.count():>7} {tempo_serializer:>12.1f} {tempo_rapido:>12.1f} '
+        f'{tempo_serializer / tempo_rapido:>7.1f}x  {identico}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    nome_banco = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f'{"listagem":<14} {"linhas":>7} {"serializer ms":>12} {"rápida ms":>12} {"ganho":>8}  JSON idêntico')
+        for quantidade in TAMANHOS:
+            popular(quantidade)
+            comparar('agendamentos', AgendamentoSerializer,
+                     Agendamento.objects.select_related('sala', 'cliente'), args.repeticoes)
+            comparar('salas', SalaSerializer, Sala.objects.all(), args.repeticoes)
+    finally:
+        connection.creation.destroy_test_db(nome_banco, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
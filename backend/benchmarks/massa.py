@@ -0,0 +1,102 @@
+"""
+Gerador da massa de dados dos benchmarks.
+
+Insere salas, usuários e agendamentos com ``bulk_create`` (sem signals), a
+partir de uma semente fixa, de modo que duas execuções produzam exatamente os
+mesmos dados e os resultados sejam comparáveis entre commits.
+
+Os agendamentos de cada sala ocupam horários consecutivos de duas horas, com
+uma hora livre entre eles, a partir do dia seguinte; assim há horários livres
+e ocupados conhecidos para medir a verificação de conflitos.
+"""
+import random
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from bookings.models import Agendamento
+from studios.models import Sala
+from users.models import User
+
+LOTE_DE_INSERCAO = 5000
+
+Massa = namedtuple('Massa', 'admin cliente sala inicio horario_livre horario_ocupado salas usuarios agendamentos')
+
+
+def _em_lotes(objetos, modelo):
+    lote = []
+    for objeto in objetos:
+        lote.append(objeto)
+        if len(lote) == LOTE_DE_INSERCAO:
+            modelo.objects.bulk_create(lote)
+            lote = []
+    if lote:
+        modelo.objects.bulk_create(lote)
+
+
+def gerar_massa(salas=1000, usuarios=50000, agendamentos=100000, semente=42):
+    """Insere a massa de dados e retorna os objetos usados pelos benchmarks."""
+    aleatorio = random.Random(semente)
+    inicio = (timezone.now() + timedelta(days=1)).replace(hour=8, minute=0, second=0, microsecond=0)
+    # Uma única senha inutilizável: o hash de cada usuário dominaria o tempo de carga
+    senha = make_password(None)
+
+    _em_lotes((
+        Sala(
+            nome=f'Sala {i} {aleatorio.choice(("Ensaio", "Gravação", "Podcast", "Dança"))}',
+            capacidade=aleatorio.randint(2, 40),
+            preco_hora=Decimal(aleatorio.randint(4000, 30000)) / 100,
+            descricao=f'Sala de benchmark {i}',
+            is_disponivel=aleatorio.random() > 0.1,
+        )
+        for i in range(salas)
+    ), Sala)
+    _em_lotes((
+        User(
+            email=f'cliente{i}@bench.com',
+            nome=f'Cliente {i}',
+            password=senha,
+            user_type=User.UserType.CLIENTE,
+        )
+        for i in range(usuarios)
+    ), User)
+    admin = User.objects.create_user(
+        email='admin@bench.com', nome='Admin', user_type='ADMIN', is_staff=True
+    )
+
+    sala_ids = list(Sala.objects.order_by('pk').values_list('pk', flat=True))
+    usuario_ids = list(User.objects.filter(is_staff=False).order_by('pk').values_list('pk', flat=True))
+    status = Agendamento.StatusAgendamento
+    _em_lotes((
+        Agendamento(
+            sala_id=sala_ids[i % len(sala_ids)],
+            cliente_id=aleatorio.choice(usuario_ids),
+            horario_inicio=inicio + timedelta(hours=3 * (i // len(sala_ids))),
+            horario_fim=inicio + timedelta(hours=3 * (i // len(sala_ids)) + 2),
+            valor_total=Decimal('100.00'),
+            # O primeiro agendamento de cada sala é sempre confirmado (ver horario_ocupado)
+            status=status.CONFIRMADO if i < len(sala_ids) else aleatorio.choices(
+                (status.CONFIRMADO, status.PENDENTE, status.CANCELADO, status.CONCLUIDO), (6, 2, 1, 1)
+            )[0],
+        )
+        for i in range(agendamentos)
+    ), Agendamento)
+
+    sala = Sala.objects.get(pk=sala_ids[0])
+    # O primeiro horário da sala está ocupado; a hora seguinte ao fim dele, livre
+    horario_ocupado = (inicio + timedelta(minutes=30), inicio + timedelta(minutes=90))
+    horario_livre = (inicio + timedelta(hours=2), inicio + timedelta(hours=3))
+    return Massa(
+        admin=admin,
+        cliente=User.objects.get(pk=usuario_ids[0]),
+        sala=sala,
+        inicio=inicio,
+        horario_livre=horario_livre,
+        horario_ocupado=horario_ocupado,
+        salas=salas,
+        usuarios=usuarios,
+        agendamentos=agendamentos,
+    )
@@ -0,0 +1,59 @@
+"""Benchmarks da listagem, da disponibilidade e da validação de agendamentos."""
+from bookings.availability import indice_disponibilidade
+from bookings.serializers import AgendamentoSerializer
+from bookings.views import AgendamentoViewSet
+
+
+def test_listagem_admin(benchmark, massa, chamar):
+    """Primeira página da listagem com todos os agendamentos (staff)."""
+    response = benchmark(chamar, AgendamentoViewSet, 'list', massa.admin)
+    assert response.data['results']
+
+
+def test_listagem_busca(benchmark, massa, chamar):
+    """Listagem do staff filtrada pela busca textual no nome da sala."""
+    benchmark(chamar, AgendamentoViewSet, 'list', massa.admin, search=massa.sala.nome)
+
+
+def test_listagem_cliente(benchmark, massa, chamar):
+    """Listagem dos próprios agendamentos de um cliente."""
+    benchmark(chamar, AgendamentoViewSet, 'list', massa.cliente)
+
+
+def test_disponibilidade(benchmark, massa, chamar):
+    """Consulta de disponibilidade com o índice da sala já carregado."""
+    inicio, fim = massa.horario_ocupado
+    parametros = {'sala_id': massa.sala.pk, 'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()}
+    response = benchmark(chamar, AgendamentoViewSet, 'disponibilidade', massa.cliente, **parametros)
+    assert response.data['disponivel'] is False
+
+
+def test_disponibilidade_indice_frio(benchmark, massa, chamar):
+    """Consulta de disponibilidade que carrega o índice da sala do banco."""
+    inicio, fim = massa.horario_livre
+    parametros = {'sala_id': massa.sala.pk, 'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()}
+    benchmark.pedantic(
+        chamar, args=(AgendamentoViewSet, 'disponibilidade', massa.cliente), kwargs=parametros,
+        setup=indice_disponibilidade.limpar, rounds=50
+    )
+
+
+def _validar(massa, horario):
+    inicio, fim = horario
+    serializer = AgendamentoSerializer(data={
+        'sala': massa.sala.pk,
+        'cliente': massa.cliente.pk,
+        'horario_inicio': inicio.isoformat(),
+        'horario_fim': fim.isoformat(),
+    })
+    return serializer.is_valid()
+
+
+def test_validacao_horario_livre(benchmark, massa, db):
+    """Validação de um novo agendamento sem conflito (criação aceita)."""
+    assert benchmark(_validar, massa, massa.horario_livre) is True
+
+
+def test_validacao_horario_ocupado(benchmark, massa, db):
+    """Validação de um novo agendamento em conflito (criação recusada)."""
+    assert benchmark(_validar, massa, massa.horario_ocupado) is False
@@ -0,0 +1,37 @@
+"""Benchmarks das buscas de salas (SalaFilter e busca textual)."""
+import pytest
+
+from studios.filters import SalaFilter
+from studios.models import Sala
+from studios.views import SalaViewSet
+
+FILTROS = {
+    'faixa_de_preco': {'preco_min': '80', 'preco_max': '150'},
+    'capacidade_disponiveis': {'capacidade_min': '10', 'is_disponivel': 'true'},
+    'combinado': {'capacidade_min': '5', 'capacidade_max': '20', 'preco_max': '200', 'is_disponivel': 'true'},
+}
+
+
+def _filtrar(parametros):
+    filtro = SalaFilter(parametros, queryset=Sala.objects.all())
+    assert filtro.is_valid()
+    # A contagem e a primeira página, como na listagem paginada
+    return filtro.qs.count(), list(filtro.qs.order_by('nome')[:10])
+
+
+@pytest.mark.parametrize('nome', FILTROS)
+def test_sala_filter(benchmark, massa, db, nome):
+    """Queryset do SalaFilter: contagem e primeira página."""
+    total, _ = benchmark(_filtrar, FILTROS[nome])
+    assert total > 0
+
+
+@pytest.mark.parametrize('nome', FILTROS)
+def test_listagem_filtrada(benchmark, massa, chamar, nome):
+    """Listagem de salas filtrada, sem o cache de respostas."""
+    benchmark(chamar, SalaViewSet, 'list', limpar_cache=True, **FILTROS[nome])
+
+
+def test_busca_textual(benchmark, massa, chamar):
+    """Busca textual por nome e descrição, sem o cache de respostas."""
+    benchmark(chamar, SalaViewSet, 'list', limpar_cache=True, search='Podcast')
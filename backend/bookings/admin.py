@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Agendamento
+from .models import Agendamento, ExcecaoSerie, SerieAgendamento
 
 
 @admin.register(Agendamento)
@@ -7,6 +7,7 @@ class AgendamentoAdmin(admin.ModelAdmin):
     """Admin para o modelo Agendamento."""
     
     list_display = ('sala', 'cliente', 'horario_inicio', 'horario_fim', 'valor_total', 'status')
+    list_select_related = ('sala', 'cliente')
     list_filter = ('status', 'sala', 'horario_inicio')
     search_fields = ('sala__nome', 'cliente__email', 'cliente__nome')
     readonly_fields = ('valor_total', 'data_criacao', 'data_atualizacao')
@@ -26,3 +27,24 @@ class AgendamentoAdmin(admin.ModelAdmin):
     def save_model(self, request, obj, form, change):
         """Garante que o valor total seja calculado corretamente ao salvar no admin."""
         obj.save()
+
+
+class ExcecaoSerieInline(admin.TabularInline):
+    """Ocorrências canceladas ou movidas da série."""
+    
+    model = ExcecaoSerie
+    extra = 0
+    raw_id_fields = ('agendamento',)
+    readonly_fields = ('data_criacao',)
+
+
+@admin.register(SerieAgendamento)
+class SerieAgendamentoAdmin(admin.ModelAdmin):
+    """Admin para o modelo SerieAgendamento."""
+    
+    list_display = ('sala', 'cliente', 'horario_inicio', 'horario_fim', 'frequencia', 'intervalo', 'status')
+    list_select_related = ('sala', 'cliente')
+    list_filter = ('status', 'frequencia', 'sala')
+    search_fields = ('sala__nome', 'cliente__email', 'cliente__nome')
+    readonly_fields = ('data_criacao', 'data_atualizacao')
+    inlines = [ExcecaoSerieInline]
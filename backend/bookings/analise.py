@@ -0,0 +1,236 @@
+"""
+Análise de ocupação e receita dos agendamentos.
+
+Os agendamentos do período são lidos como colunas (arrays NumPy), às quais se
+juntam as ocorrências das séries ativas (``SerieAgendamento``) expandidas no
+período, sem as canceladas ou movidas (a movida já é um agendamento). Todos os
+indicadores são então calculados de uma vez, sem laços por agendamento:
+
+- ocupação: ``F(x)``, os segundos ocupados antes de ``x``, é obtida com busca
+  binária e somas acumuladas sobre os inícios e os fins ordenados; os segundos
+  ocupados de cada hora são ``F(fim da hora) - F(início da hora)``. Todas as
+  salas usam as mesmas listas ordenadas, com os horários de cada sala
+  deslocados para uma faixa própria;
+- mapa de ocupação: as horas do período são agrupadas por dia da semana e hora
+  do dia (no fuso ``TIME_ZONE``) com ``np.bincount``;
+- receita: o valor dos agendamentos confirmados ou concluídos é somado por sala
+  e pelo dia (local) de início, também com ``np.bincount``.
+
+Os agendamentos cancelados não ocupam a sala nem geram receita; os pendentes
+ocupam a sala e entram apenas na receita pendente. As ocorrências das séries
+contam como agendamentos confirmados, pelo valor de ``valor_ocorrencia``.
+"""
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.utils import timezone
+
+from studios.models import Sala
+from .models import Agendamento
+from .series import carregar_series
+
+HORA = 3600
+STATUS_OCUPAM = (
+    Agendamento.StatusAgendamento.PENDENTE,
+    Agendamento.StatusAgendamento.CONFIRMADO,
+    Agendamento.StatusAgendamento.CONCLUIDO,
+)
+STATUS_RECEITA = (Agendamento.StatusAgendamento.CONFIRMADO, Agendamento.StatusAgendamento.CONCLUIDO)
+
+# Horários em segundos desde a época, valores em centavos
+Colunas = namedtuple('Colunas', 'sala_id inicio fim valor status')
+
+Analise = namedtuple(
+    'Analise',
+    'sala_ids dias segundos_ocupados utilizacao mapa_ocupacao receita_por_dia receita_pendente '
+    'agendamentos cancelados'
+)
+
+
+def carregar_colunas(queryset):
+    """Lê ``(sala_id, horario_inicio, horario_fim, valor_total, status)`` dos agendamentos como arrays."""
+    linhas = list(
+        queryset.values_list('sala_id', 'horario_inicio', 'horario_fim', 'valor_total', 'status').order_by()
+    )
+    total = len(linhas)
+    sala_id, inicio, fim, valor, status = tuple(zip(*linhas)) or ((),) * 5
+    return Colunas(
+        np.fromiter(sala_id, dtype=np.int64, count=total),
+        np.floor(np.fromiter(map(datetime.timestamp, inicio), dtype=np.float64, count=total)).astype(np.int64),
+        np.floor(np.fromiter(map(datetime.timestamp, fim), dtype=np.float64, count=total)).astype(np.int64),
+        np.rint(np.array(valor, dtype=np.float64) * 100).astype(np.int64),
+        np.array(status, dtype=str),
+    )
+
+
+def colunas_das_series(series, precos, inicio, fim):
+    """Expande as séries ``{sala_id: [(serie, excluidas)]}`` em [inicio, fim) nas mesmas colunas.
+
+    ``precos`` traz o preço por hora de cada sala; as ocorrências têm o status
+    ``CONFIRMADO``.
+    """
+    linhas = []
+    for sala_id, series_da_sala in series.items():
+        for serie, excluidas in series_da_sala:
+            valor = Agendamento.calcular_valor_total(precos[sala_id], serie.horario_inicio, serie.horario_fim)
+            centavos = int(round(valor * 100))
+            linhas.extend(
+                (sala_id, int(ocorrencia_inicio.timestamp()), int(ocorrencia_fim.timestamp()), centavos)
+                for ocorrencia_inicio, ocorrencia_fim in serie.ocorrencias_entre(inicio, fim, excluidas)
+            )
+    colunas = tuple(zip(*linhas)) or ((),) * 4
+    return Colunas(
+        *(np.array(coluna, dtype=np.int64) for coluna in colunas),
+        np.full(len(linhas), Agendamento.StatusAgendamento.CONFIRMADO, dtype='<U10'),
+    )
+
+
+def juntar(*colunas):
+    """Concatena as colunas de várias origens."""
+    return Colunas(*(np.concatenate(coluna) for coluna in zip(*colunas)))
+
+
+def inicios_dos_dias(data_inicio, data_fim):
+    """Retorna o início (em segundos desde a época) de cada dia local do período e do dia seguinte ao último."""
+    return np.array([
+        timezone.make_aware(datetime.combine(data_inicio + timedelta(days=dia), time.min)).timestamp()
+        for dia in range((data_fim - data_inicio).days + 2)
+    ], dtype=np.int64)
+
+
+def _ocupado_antes(inicios, fins, pontos):
+    """Segundos ocupados antes de cada ponto, dados os inícios e os fins ordenados dos intervalos."""
+    soma_inicios = np.concatenate(([0], np.cumsum(inicios)))
+    soma_fins = np.concatenate(([0], np.cumsum(fins)))
+    iniciados = np.searchsorted(inicios, pontos, side='right')
+    terminados = np.searchsorted(fins, pontos, side='right')
+    return (pontos * iniciados - soma_inicios[iniciados]) - (pontos * terminados - soma_fins[terminados])
+
+
+def analisar(colunas, sala_ids, data_inicio, data_fim):
+    """Calcula os indicadores das salas ``sala_ids`` entre os dias ``data_inicio`` e ``data_fim`` (inclusive).
+
+    Agendamentos de outras salas são ignorados. Os resultados são arrays
+    alinhados com ``sala_ids`` (ordenados): segundos ocupados e utilização
+    (percentual do período), mapa 7 x 24 com o percentual ocupado de cada hora
+    da semana, receita por dia e receita pendente (em centavos) e a contagem
+    de agendamentos e de cancelamentos iniciados no período.
+    """
+    sala_ids = np.unique(np.asarray(sala_ids, dtype=np.int64))
+    dias = inicios_dos_dias(data_inicio, data_fim)
+    total_salas, total_dias = len(sala_ids), len(dias) - 1
+    comeco, duracao = dias[0], dias[-1] - dias[0]
+
+    posicao = np.minimum(np.searchsorted(sala_ids, colunas.sala_id), max(total_salas - 1, 0))
+    conhecida = sala_ids[posicao] == colunas.sala_id if total_salas else np.zeros(len(posicao), dtype=bool)
+
+    # Ocupação: intervalos recortados ao período e deslocados para a faixa da sala
+    inicio = np.clip(colunas.inicio - comeco, 0, duracao)
+    fim = np.clip(colunas.fim - comeco, 0, duracao)
+    ocupa = conhecida & np.isin(colunas.status, STATUS_OCUPAM) & (fim > inicio)
+    faixa = duracao + 1
+    inicios = np.sort(inicio[ocupa] + posicao[ocupa] * faixa)
+    fins = np.sort(fim[ocupa] + posicao[ocupa] * faixa)
+
+    limites = np.append(np.arange(0, duracao, HORA), duracao)
+    pontos = np.arange(total_salas, dtype=np.int64)[:, None] * faixa + limites[None, :]
+    por_hora = np.diff(_ocupado_antes(inicios, fins, pontos), axis=1)
+    segundos_ocupados = por_hora.sum(axis=1)
+
+    # Mapa de ocupação: cada hora do período vai para a célula (dia da semana, hora do dia)
+    horas = comeco + limites[:-1]
+    dia_da_hora = np.searchsorted(dias, horas, side='right') - 1
+    celula = ((data_inicio.weekday() + dia_da_hora) % 7) * 24 + np.minimum((horas - dias[dia_da_hora]) // HORA, 23)
+    capacidade = np.bincount(celula, weights=np.diff(limites), minlength=7 * 24)
+    ocupado = np.bincount(
+        (np.arange(total_salas)[:, None] * 7 * 24 + celula[None, :]).ravel(),
+        weights=por_hora.ravel(), minlength=total_salas * 7 * 24
+    ).reshape(total_salas, 7 * 24)
+    mapa = np.divide(ocupado * 100, capacidade, out=np.zeros_like(ocupado), where=capacidade > 0)
+
+    # Receita e contagens pelo dia de início
+    iniciado = conhecida & (colunas.inicio >= comeco) & (colunas.inicio < dias[-1])
+    dia = np.searchsorted(dias, colunas.inicio, side='right') - 1
+    receita = iniciado & np.isin(colunas.status, STATUS_RECEITA)
+    receita_por_dia = np.bincount(
+        posicao[receita] * total_dias + dia[receita], weights=colunas.valor[receita],
+        minlength=total_salas * total_dias
+    ).reshape(total_salas, total_dias)
+    pendente = iniciado & (colunas.status == Agendamento.StatusAgendamento.PENDENTE)
+    cancelado = iniciado & (colunas.status == Agendamento.StatusAgendamento.CANCELADO)
+
+    return Analise(
+        sala_ids=sala_ids,
+        dias=[data_inicio + timedelta(days=numero) for numero in range(total_dias)],
+        segundos_ocupados=segundos_ocupados,
+        utilizacao=segundos_ocupados * 100 / duracao,
+        mapa_ocupacao=mapa.reshape(total_salas, 7, 24),
+        receita_por_dia=np.rint(receita_por_dia).astype(np.int64),
+        receita_pendente=np.rint(
+            np.bincount(posicao[pendente], weights=colunas.valor[pendente], minlength=total_salas)
+        ).astype(np.int64),
+        agendamentos=np.bincount(posicao[iniciado & ~cancelado], minlength=total_salas),
+        cancelados=np.bincount(posicao[cancelado], minlength=total_salas),
+    )
+
+
+def _reais(centavos):
+    return str(Decimal(int(centavos)).scaleb(-2))
+
+
+def relatorio(data_inicio, data_fim, salas=None):
+    """Monta o relatório de ocupação e receita das salas (todas, se ``salas`` for None) no período.
+
+    Consulta as salas, os agendamentos que tocam o período e as séries ativas
+    (com as suas exceções) e retorna um dicionário pronto para JSON, com os
+    valores em reais como texto.
+    """
+    salas_queryset = Sala.objects.order_by('pk')
+    if salas is not None:
+        salas_queryset = salas_queryset.filter(pk__in=salas)
+    linhas = list(salas_queryset.values_list('pk', 'nome', 'preco_hora'))
+    nomes = {sala_id: nome for sala_id, nome, _ in linhas}
+    precos = {sala_id: preco for sala_id, _, preco in linhas}
+
+    dias = inicios_dos_dias(data_inicio, data_fim)
+    inicio_periodo = datetime.fromtimestamp(int(dias[0]), tz=timezone.get_current_timezone())
+    fim_periodo = datetime.fromtimestamp(int(dias[-1]), tz=timezone.get_current_timezone())
+    colunas = juntar(
+        carregar_colunas(Agendamento.objects.filter(
+            sala_id__in=list(nomes), horario_inicio__lt=fim_periodo, horario_fim__gt=inicio_periodo
+        )),
+        colunas_das_series(carregar_series(list(nomes)), precos, inicio_periodo, fim_periodo),
+    )
+    analise = analisar(colunas, list(nomes), data_inicio, data_fim)
+
+    receitas = analise.receita_por_dia.sum(axis=1)
+    duracao_horas = (dias[-1] - dias[0]) / HORA
+    total_ocupado = int(analise.segundos_ocupados.sum())
+    return {
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+        'dias': analise.dias,
+        'total': {
+            'horas_ocupadas': round(total_ocupado / HORA, 2),
+            'utilizacao': round(total_ocupado / HORA * 100 / (duracao_horas * len(nomes)), 2) if nomes else 0.0,
+            'receita': _reais(receitas.sum()),
+            'receita_pendente': _reais(analise.receita_pendente.sum()),
+        },
+        'salas': [
+            {
+                'sala': int(sala_id),
+                'sala_nome': nomes[int(sala_id)],
+                'agendamentos': int(analise.agendamentos[posicao]),
+                'cancelados': int(analise.cancelados[posicao]),
+                'horas_ocupadas': round(float(analise.segundos_ocupados[posicao]) / HORA, 2),
+                'utilizacao': round(float(analise.utilizacao[posicao]), 2),
+                'receita': _reais(receitas[posicao]),
+                'receita_pendente': _reais(analise.receita_pendente[posicao]),
+                'receita_por_dia': [_reais(valor) for valor in analise.receita_por_dia[posicao]],
+                'mapa_ocupacao': np.round(analise.mapa_ocupacao[posicao], 2).tolist(),
+            }
+            for posicao, sala_id in enumerate(analise.sala_ids)
+        ],
+    }
@@ -0,0 +1,219 @@
+"""
+Índice em memória dos horários ocupados de cada sala.
+
+Cada sala mantém seus agendamentos ativos (PENDENTE/CONFIRMADO) em listas
+ordenadas pelo horário de início, o que permite responder às consultas de
+disponibilidade com busca binária, sem ida ao banco. As séries ativas da sala
+(``SerieAgendamento``) ficam ao lado dos agendamentos e são expandidas apenas
+no período consultado. O índice de uma sala é carregado sob demanda e
+descartado pelos signals de ``Agendamento``, ``SerieAgendamento`` e
+``ExcecaoSerie``.
+
+Atenção: ``QuerySet.update()`` e ``bulk_create()`` não disparam signals; quem
+usar essas operações deve chamar ``indice_disponibilidade.invalidar()``.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from itertools import accumulate, islice
+
+from django.conf import settings
+
+from .models import Agendamento
+from .series import carregar_series, ocorrencias_sobrepostas
+
+
+class IndiceSala:
+    """Intervalos ocupados de uma sala, ordenados pelo horário de início, e as séries da sala."""
+
+    __slots__ = ('ids', 'inicios', 'fins', 'fim_maximo', 'series', 'carregado_em')
+
+    def __init__(self, intervalos, series=()):
+        """Recebe tuplas ``(id, horario_inicio, horario_fim)`` em qualquer ordem.
+
+        ``series`` contém pares ``(serie, excluidas)``, como em ``carregar_series``.
+        """
+        self.series = list(series)
+        intervalos = sorted(intervalos, key=lambda item: (item[1], item[2]))
+        self.ids = [item[0] for item in intervalos]
+        self.inicios = [item[1] for item in intervalos]
+        self.fins = [item[2] for item in intervalos]
+        # fim_maximo[i] é o maior horário de fim entre os intervalos 0..i, o que
+        # permite descartar de uma vez todos os intervalos anteriores a um período
+        self.fim_maximo = list(accumulate(self.fins, max))
+        self.carregado_em = time.monotonic()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _posicoes_sobrepostas(self, inicio, fim):
+        """Retorna as posições dos intervalos que se sobrepõem a [inicio, fim)."""
+        posicoes = []
+        posicao = bisect_left(self.inicios, fim) - 1
+        while posicao >= 0 and self.fim_maximo[posicao] > inicio:
+            if self.fins[posicao] > inicio:
+                posicoes.append(posicao)
+            posicao -= 1
+        posicoes.reverse()
+        return posicoes
+
+    def tem_conflito(self, inicio, fim):
+        """Verifica em O(log n) se algum intervalo (ou ocorrência de série) se sobrepõe a [inicio, fim)."""
+        limite = bisect_left(self.inicios, fim)
+        if limite > 0 and self.fim_maximo[limite - 1] > inicio:
+            return True
+        return bool(self.series) and bool(self.conflitos_de_series(inicio, fim))
+
+    def conflitos(self, inicio, fim):
+        """Retorna os ids dos agendamentos que se sobrepõem a [inicio, fim)."""
+        return [self.ids[posicao] for posicao in self._posicoes_sobrepostas(inicio, fim)]
+
+    def conflitos_de_series(self, inicio, fim):
+        """Retorna ``(inicio, fim, serie_id)`` das ocorrências de séries que se sobrepõem a [inicio, fim)."""
+        return ocorrencias_sobrepostas(self.series, inicio, fim)
+
+    def intervalos(self, inicio, fim):
+        """Retorna os intervalos ``(inicio, fim)`` que se sobrepõem ao período, em ordem.
+
+        Inclui as ocorrências das séries, intercaladas pelo horário de início.
+        """
+        intervalos = [
+            (self.inicios[posicao], self.fins[posicao])
+            for posicao in self._posicoes_sobrepostas(inicio, fim)
+        ]
+        if not self.series:
+            return intervalos
+        return list(heapq.merge(
+            intervalos, [(ocorrencia[0], ocorrencia[1]) for ocorrencia in self.conflitos_de_series(inicio, fim)]
+        ))
+
+
+class IndiceDisponibilidade:
+    """Cache por processo dos índices de ocupação das salas."""
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._salas = {}
+        self._sala_do_agendamento = {}
+        self._geracao = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        """Tempo máximo, em segundos, que um índice é reutilizado sem recarga."""
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'BOOKINGS_INDICE_DISPONIBILIDADE_TTL', 60)
+
+    def obter(self, sala_id):
+        """Retorna o índice da sala, carregando-o do banco se necessário."""
+        return self.obter_varios([sala_id])[sala_id]
+
+    def obter_varios(self, sala_ids):
+        """Retorna os índices das salas, carregando as ausentes em uma única consulta."""
+        agora = time.monotonic()
+        ttl = self.ttl
+        indices = {}
+        ausentes = []
+        with self._lock:
+            for sala_id in dict.fromkeys(sala_ids):
+                indice = self._salas.get(sala_id)
+                if indice is not None and agora - indice.carregado_em < ttl:
+                    indices[sala_id] = indice
+                else:
+                    ausentes.append(sala_id)
+
+        if ausentes:
+            indices.update(self._carregar(ausentes))
+        return indices
+
+    def _carregar(self, sala_ids):
+        """Consulta os agendamentos ativos das salas e monta seus índices."""
+        with self._lock:
+            geracao = self._geracao
+
+        intervalos = {sala_id: [] for sala_id in sala_ids}
+        linhas = Agendamento.objects.ativos().filter(sala_id__in=sala_ids).values_list(
+            'sala_id', 'id', 'horario_inicio', 'horario_fim'
+        ).order_by()
+        for sala_id, agendamento_id, horario_inicio, horario_fim in linhas:
+            intervalos[sala_id].append((agendamento_id, horario_inicio, horario_fim))
+        series = carregar_series(sala_ids)
+        carregados = {sala_id: IndiceSala(itens, series[sala_id]) for sala_id, itens in intervalos.items()}
+
+        with self._lock:
+            # Uma invalidação durante a consulta pode ter tornado os dados obsoletos;
+            # nesse caso eles atendem apenas a requisição atual e não são guardados
+            if geracao == self._geracao:
+                for sala_id, indice in carregados.items():
+                    self._remover(sala_id)
+                    self._salas[sala_id] = indice
+                    for agendamento_id in indice.ids:
+                        self._sala_do_agendamento[agendamento_id] = sala_id
+        return carregados
+
+    def _remover(self, sala_id):
+        indice = self._salas.pop(sala_id, None)
+        if indice is not None:
+            for agendamento_id in indice.ids:
+                self._sala_do_agendamento.pop(agendamento_id, None)
+
+    def invalidar(self, sala_id=None, agendamento_id=None):
+        """Descarta o índice da sala e o da sala em que o agendamento estava indexado."""
+        with self._lock:
+            self._geracao += 1
+            salas = {sala_id, self._sala_do_agendamento.get(agendamento_id)}
+            for sala in salas - {None}:
+                self._remover(sala)
+
+    def limpar(self):
+        """Descarta todos os índices carregados."""
+        with self._lock:
+            self._geracao += 1
+            self._salas.clear()
+            self._sala_do_agendamento.clear()
+
+
+def horarios_livres(ocupados, inicio, fim, duracao):
+    """Gera, em ordem, os slots livres de ``duracao`` em [inicio, fim).
+
+    ``ocupados`` deve conter os intervalos ocupados ordenados pelo início, como
+    retornado por ``IndiceSala.intervalos``. Cada lacuna entre intervalos é
+    preenchida com slots consecutivos a partir do seu início.
+    """
+    cursor = inicio
+    for ocupado_inicio, ocupado_fim in ocupados:
+        limite = min(ocupado_inicio, fim)
+        while cursor + duracao <= limite:
+            yield cursor, cursor + duracao
+            cursor += duracao
+        cursor = max(cursor, ocupado_fim)
+    while cursor + duracao <= fim:
+        yield cursor, cursor + duracao
+        cursor += duracao
+
+
+def proximos_horarios_livres(indices, inicio, fim, duracao, quantidade):
+    """Retorna os ``quantidade`` primeiros slots livres entre todas as salas.
+
+    Percorre a agenda de cada sala uma única vez, intercalando as salas pelo
+    horário de início. Retorna tuplas ``(sala_id, inicio, fim)``; empates são
+    desfeitos pela ordem das salas em ``indices``.
+    """
+    def slots_da_sala(posicao, sala_id, indice):
+        ocupados = indice.intervalos(inicio, fim)
+        for slot_inicio, slot_fim in horarios_livres(ocupados, inicio, fim, duracao):
+            yield slot_inicio, posicao, slot_fim, sala_id
+
+    geradores = [
+        slots_da_sala(posicao, sala_id, indice)
+        for posicao, (sala_id, indice) in enumerate(indices.items())
+    ]
+    return [
+        (sala_id, slot_inicio, slot_fim)
+        for slot_inicio, _, slot_fim, sala_id in islice(heapq.merge(*geradores), quantidade)
+    ]
+
+
+indice_disponibilidade = IndiceDisponibilidade()
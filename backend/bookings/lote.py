@@ -0,0 +1,158 @@
+"""
+Criação de agendamentos em lote.
+
+Os candidatos são agrupados por sala e ordenados pelo horário de início. Para
+cada sala, uma única consulta limitada ao período coberto pelo lote traz os
+agendamentos ativos que podem conflitar, verificados com busca binária
+(``IndiceSala``) junto com as ocorrências das séries da sala, e uma única
+varredura encontra as sobreposições dentro do próprio lote. Os valores são
+calculados em memória e os agendamentos aceitos são gravados com um único
+``bulk_create``, na mesma transação em que as salas ficam bloqueadas, como em
+``AgendamentoSerializer._salvar_sem_conflito``.
+
+Cada candidato recebe um resultado: ``criado``, ``conflito`` (com os ids dos
+agendamentos existentes, as séries ou as posições dos candidatos do lote com
+que se sobrepõe), ``invalido`` ou, quando o lote é recusado por inteiro,
+``valido``.
+"""
+from collections import defaultdict, namedtuple
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from studios.models import Sala
+from .availability import IndiceSala, indice_disponibilidade
+from .models import Agendamento
+from .serializers import MENSAGEM_CONFLITO
+from .series import carregar_series
+
+CRIADO = 'criado'
+CONFLITO = 'conflito'
+INVALIDO = 'invalido'
+VALIDO = 'valido'
+
+MENSAGEM_CONFLITO_NO_LOTE = "O horário se sobrepõe a outro agendamento do lote."
+
+Candidato = namedtuple('Candidato', 'indice sala_id horario_inicio horario_fim')
+
+
+def _resultado(candidato, status, **extra):
+    return dict(
+        indice=candidato.indice,
+        status=status,
+        sala=candidato.sala_id,
+        horario_inicio=candidato.horario_inicio,
+        horario_fim=candidato.horario_fim,
+        **extra
+    )
+
+
+def _verificar_sala(candidatos, resultados):
+    """Verifica os candidatos de uma sala e retorna os aceitos, em ordem."""
+    candidatos = sorted(candidatos, key=lambda c: (c.horario_inicio, c.horario_fim, c.indice))
+    sala_id = candidatos[0].sala_id
+    existentes = Agendamento.objects.ativos().filter(
+        sala_id=sala_id,
+        horario_inicio__lt=max(c.horario_fim for c in candidatos),
+        horario_fim__gt=candidatos[0].horario_inicio,
+    ).values_list('id', 'horario_inicio', 'horario_fim').order_by()
+    indice = IndiceSala(existentes, carregar_series([sala_id])[sala_id])
+
+    aceitos = []
+    # Candidato aceito com o maior horário de fim até aqui: como a lista está
+    # ordenada pelo início, é o único que pode se sobrepor ao próximo
+    ultimo = None
+    for candidato in candidatos:
+        conflitos = indice.conflitos(candidato.horario_inicio, candidato.horario_fim)
+        conflitos_de_series = indice.conflitos_de_series(candidato.horario_inicio, candidato.horario_fim)
+        if conflitos or conflitos_de_series:
+            resultados[candidato.indice] = _resultado(
+                candidato, CONFLITO, erro=MENSAGEM_CONFLITO, agendamentos_conflitantes=conflitos,
+                series_conflitantes=sorted({serie_id for _, _, serie_id in conflitos_de_series})
+            )
+        elif ultimo is not None and ultimo.horario_fim > candidato.horario_inicio:
+            resultados[candidato.indice] = _resultado(
+                candidato, CONFLITO, erro=MENSAGEM_CONFLITO_NO_LOTE, conflitos_no_lote=[ultimo.indice]
+            )
+        else:
+            aceitos.append(candidato)
+            if ultimo is None or candidato.horario_fim > ultimo.horario_fim:
+                ultimo = candidato
+    return aceitos
+
+
+def criar_em_lote(cliente, horarios, parcial=False):
+    """Cria os agendamentos do ``cliente`` e retorna ``(resultados, criados)``.
+
+    ``horarios`` contém tuplas ``(sala_id, horario_inicio, horario_fim)``. Sem
+    ``parcial``, qualquer horário recusado impede a criação de todos. Os
+    resultados seguem a ordem de ``horarios``; os criados trazem a instância em
+    ``agendamento``.
+    """
+    candidatos = [Candidato(indice, *horario) for indice, horario in enumerate(horarios)]
+    agora = timezone.now()
+    salas = Sala.objects.in_bulk({candidato.sala_id for candidato in candidatos})
+    resultados = {}
+    por_sala = defaultdict(list)
+    for candidato in candidatos:
+        if candidato.sala_id not in salas:
+            resultados[candidato.indice] = _resultado(candidato, INVALIDO, erro="Sala não encontrada.")
+        elif candidato.horario_inicio < agora:
+            resultados[candidato.indice] = _resultado(
+                candidato, INVALIDO, erro="Não é possível agendar para uma data/hora passada."
+            )
+        else:
+            por_sala[candidato.sala_id].append(candidato)
+
+    criados = []
+    try:
+        with transaction.atomic():
+            # Bloqueia as salas em ordem, evitando deadlock entre lotes concorrentes
+            list(
+                Sala.objects.select_for_update().filter(pk__in=por_sala).order_by('pk').values_list('pk', flat=True)
+            )
+            aceitos = []
+            for candidatos_da_sala in por_sala.values():
+                aceitos += _verificar_sala(candidatos_da_sala, resultados)
+
+            if resultados and not parcial:
+                for candidato in aceitos:
+                    resultados[candidato.indice] = _resultado(candidato, VALIDO)
+            elif aceitos:
+                criados = Agendamento.objects.bulk_create([
+                    Agendamento(
+                        sala=salas[candidato.sala_id],
+                        cliente=cliente,
+                        horario_inicio=candidato.horario_inicio,
+                        horario_fim=candidato.horario_fim,
+                        valor_total=Agendamento.calcular_valor_total(
+                            salas[candidato.sala_id].preco_hora, candidato.horario_inicio, candidato.horario_fim
+                        ),
+                    )
+                    for candidato in aceitos
+                ])
+                for candidato, agendamento in zip(aceitos, criados):
+                    resultados[candidato.indice] = _resultado(candidato, CRIADO, agendamento=agendamento)
+                _invalidar_indices(por_sala)
+    except IntegrityError as erro:
+        # No PostgreSQL, um agendamento criado fora do lote ao mesmo tempo
+        if Agendamento.RESTRICAO_SEM_SOBREPOSICAO in str(erro):
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [MENSAGEM_CONFLITO]})
+        raise
+
+    return [resultados[candidato.indice] for candidato in candidatos], len(criados)
+
+
+def _invalidar_indices(sala_ids):
+    """``bulk_create()`` não dispara signals: descarta os índices das salas, como em ``signals``."""
+    sala_ids = list(sala_ids)
+    for sala_id in sala_ids:
+        indice_disponibilidade.invalidar(sala_id=sala_id)
+
+    def invalidar_apos_commit():
+        for sala_id in sala_ids:
+            indice_disponibilidade.invalidar(sala_id=sala_id)
+
+    transaction.on_commit(invalidar_apos_commit)
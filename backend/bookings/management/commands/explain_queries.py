@@ -0,0 +1,142 @@
+"""
+Django command to report full table scans in the API hot queries
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.urls import get_resolver
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.viewsets import GenericViewSet
+
+from bookings.models import Agendamento
+
+User = get_user_model()
+
+# SQLite: "SCAN tabela" (com ou sem índice); PostgreSQL: "Seq Scan on tabela"
+PADRAO_VARREDURA = re.compile(r'\bSCAN (?:TABLE )?(\w+)|Seq Scan on (\w+)')
+
+
+def _viewsets_com_listagem(padroes=None, vistos=None):
+    """Percorre o URLconf e retorna as classes de ViewSet que possuem a ação list."""
+    padroes = get_resolver().url_patterns if padroes is None else padroes
+    vistos = {} if vistos is None else vistos
+    for padrao in padroes:
+        if hasattr(padrao, 'url_patterns'):
+            _viewsets_com_listagem(padrao.url_patterns, vistos)
+            continue
+        classe = getattr(padrao.callback, 'cls', None)
+        acoes = getattr(padrao.callback, 'actions', None) or {}
+        if classe and issubclass(classe, GenericViewSet) and acoes.get('get') == 'list':
+            vistos.setdefault(classe.__name__, classe)
+    return vistos
+
+
+class Command(BaseCommand):
+    """Django command to run EXPLAIN on the ViewSet querysets"""
+
+    help = (
+        'Executa EXPLAIN nas consultas das listagens dos ViewSets (com cada filtro '
+        'declarado) e nas consultas de disponibilidade, relatando varreduras completas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-seq-scan', action='store_true',
+            help='Encerra com erro se alguma varredura completa for encontrada.'
+        )
+        parser.add_argument(
+            '--ignore-table', action='append', default=[],
+            help='Tabela cujas varreduras completas são esperadas (pode ser repetido).'
+        )
+        parser.add_argument('--plans', action='store_true', help='Exibe o plano completo de cada consulta.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        ignoradas = set(options['ignore_table'])
+        problemas = []
+
+        for nome, queryset in self._consultas():
+            # Querysets vazios (ex.: .none()) nem chegam ao banco
+            if queryset.query.is_empty():
+                continue
+            plano = self._explicar(queryset)
+
+            tabelas = {
+                tabela for grupos in PADRAO_VARREDURA.findall(plano)
+                for tabela in grupos if tabela
+            } - ignoradas
+            if tabelas:
+                problemas.append(nome)
+                self.stdout.write(self.style.WARNING(f'SEQ SCAN  {nome}: {", ".join(sorted(tabelas))}'))
+            else:
+                self.stdout.write(f'OK        {nome}')
+            if options['plans']:
+                self.stdout.write(plano + '\n')
+
+        if problemas and options['fail_on_seq_scan']:
+            raise CommandError(f'{len(problemas)} consulta(s) com varredura completa.')
+        self.stdout.write(self.style.SUCCESS(f'{len(problemas)} consulta(s) com varredura completa.'))
+
+    def _explicar(self, queryset):
+        """Retorna o plano da consulta, desestimulando varreduras no PostgreSQL.
+
+        Com poucas linhas o PostgreSQL prefere varreduras sequenciais mesmo quando
+        existe um índice adequado; desabilitá-las faz com que só apareçam quando
+        nenhum índice puder ser usado.
+        """
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def _consultas(self):
+        """Gera os pares (nome, queryset) a serem analisados."""
+        administrador = User(pk=0, is_staff=True, is_superuser=True)
+        cliente = User(pk=0, is_staff=False)
+        for nome_viewset, viewset in sorted(_viewsets_com_listagem().items()):
+            for descricao, usuario in (('admin', administrador), ('cliente', cliente)):
+                yield f'{nome_viewset}.list ({descricao})', self._queryset_da_listagem(viewset, usuario)
+
+            queryset = self._queryset_da_listagem(viewset, administrador)
+            for nome_filtro, lookup, valor in self._filtros(viewset, queryset):
+                yield f'{nome_viewset}.list ?{nome_filtro}={valor}', queryset.filter(**{lookup: valor})
+
+        agora = timezone.now()
+        yield 'AgendamentoSerializer.validate (conflitos)', Agendamento.objects.conflitantes(1, agora, agora)
+        yield 'IndiceDisponibilidade._carregar', Agendamento.objects.ativos().filter(
+            sala_id__in=[1, 2]
+        ).values_list('sala_id', 'id', 'horario_inicio', 'horario_fim').order_by()
+
+    def _queryset_da_listagem(self, viewset, usuario, parametros=None):
+        """Monta o queryset que a ação list do ViewSet usaria para o usuário."""
+        request = Request(APIRequestFactory().get('/', parametros or {}))
+        request.user = usuario
+        view = viewset(request=request, action='list', kwargs={}, format_kwarg=None)
+        return view.filter_queryset(view.get_queryset())
+
+    def _filtros(self, viewset, queryset):
+        """Retorna, para cada filtro do ViewSet, o lookup aplicado e um valor de exemplo.
+
+        O lookup é aplicado diretamente ao queryset para não depender de registros
+        existentes (filtros de chave estrangeira validam o valor no banco).
+        """
+        view = viewset()
+        filterset_class = DjangoFilterBackend().get_filterset_class(view, queryset)
+        if filterset_class is None:
+            return
+        modelo = queryset.model
+        for nome_filtro, filtro in filterset_class.base_filters.items():
+            campo = modelo._meta.get_field(filtro.field_name.split('__')[0])
+            if campo.choices:
+                valor = campo.choices[0][0]
+            elif campo.get_internal_type() == 'BooleanField':
+                valor = True
+            else:
+                valor = 1
+            yield nome_filtro, f'{filtro.field_name}__{filtro.lookup_expr}', valor
@@ -0,0 +1,51 @@
+"""
+Django command to report room occupancy and revenue
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.utils.encoders import JSONEncoder
+
+from bookings.analise import relatorio
+from bookings.serializers import AnaliseSerializer
+
+
+class Command(BaseCommand):
+    """Django command to print the occupancy and revenue report of the rooms"""
+
+    help = (
+        'Calcula a utilização, as horas ocupadas e a receita de cada sala no período '
+        '(padrão: últimos 30 dias). Com --json, exibe o relatório completo, com a receita '
+        'por dia e o mapa de ocupação.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help='Primeiro dia do período (AAAA-MM-DD).')
+        parser.add_argument('--fim', help='Último dia do período (AAAA-MM-DD).')
+        parser.add_argument('--sala', type=int, action='append', help='Sala analisada (pode ser repetido).')
+        parser.add_argument('--json', action='store_true', help='Exibe o relatório completo em JSON.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        dados = {'data_inicio': options['inicio'], 'data_fim': options['fim'], 'sala': options['sala']}
+        parametros = AnaliseSerializer(data={chave: valor for chave, valor in dados.items() if valor})
+        if not parametros.is_valid():
+            raise CommandError(json.dumps(parametros.errors, ensure_ascii=False))
+
+        resultado = relatorio(**parametros.validated_data)
+        if options['json']:
+            self.stdout.write(json.dumps(resultado, cls=JSONEncoder, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f'Período: {resultado["data_inicio"]} a {resultado["data_fim"]}')
+        self.stdout.write(f'{"Sala":<30} {"Agend.":>7} {"Horas":>9} {"Util. %":>8} {"Receita":>12}')
+        for sala in resultado['salas']:
+            self.stdout.write(
+                f'{sala["sala_nome"][:30]:<30} {sala["agendamentos"]:>7} {sala["horas_ocupadas"]:>9.2f} '
+                f'{sala["utilizacao"]:>8.2f} {sala["receita"]:>12}'
+            )
+        total = resultado['total']
+        self.stdout.write(self.style.SUCCESS(
+            f'Total: {total["horas_ocupadas"]:.2f} h, {total["utilizacao"]:.2f}% de utilização, '
+            f'receita {total["receita"]} (pendente {total["receita_pendente"]})'
+        ))
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+
+# A restrição usa recursos exclusivos do PostgreSQL (btree_gist e tstzrange).
+# Nos demais bancos a sobreposição é tratada pelo AgendamentoSerializer.
+CRIAR_RESTRICAO = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE bookings_agendamento
+    ADD CONSTRAINT agendamento_sem_sobreposicao
+    EXCLUDE USING gist (
+        sala_id WITH =,
+        tstzrange(horario_inicio, horario_fim, '[)') WITH &&
+    )
+    WHERE (status IN ('PENDENTE', 'CONFIRMADO'))
+    """,
+]
+
+REMOVER_RESTRICAO = [
+    "ALTER TABLE bookings_agendamento DROP CONSTRAINT IF EXISTS agendamento_sem_sobreposicao",
+]
+
+
+def executar(comandos):
+    def operacao(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for comando in comandos:
+            schema_editor.execute(comando)
+
+    return operacao
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookings", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(executar(CRIAR_RESTRICAO), executar(REMOVER_RESTRICAO)),
+    ]
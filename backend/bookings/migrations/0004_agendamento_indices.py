@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_agendamento_sem_sobreposicao'),
+        ('studios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(condition=models.Q(('status__in', ['PENDENTE', 'CONFIRMADO'])), fields=['sala', 'horario_inicio', 'horario_fim'], name='agend_sala_ativo_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['sala', 'status', 'horario_inicio'], name='agend_sala_status_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['-horario_inicio', '-id'], name='agend_inicio_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agendamento',
+            index=models.Index(fields=['cliente', '-horario_inicio'], name='agend_cliente_inicio_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_agendamento_indices'),
+        ('studios', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerieAgendamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('horario_inicio', models.DateTimeField(verbose_name='horário de início')),
+                ('horario_fim', models.DateTimeField(verbose_name='horário de fim')),
+                ('frequencia', models.CharField(choices=[('DIARIA', 'Diária'), ('SEMANAL', 'Semanal')], max_length=10, verbose_name='frequência')),
+                ('intervalo', models.PositiveSmallIntegerField(default=1, verbose_name='intervalo')),
+                ('dias_semana', models.JSONField(blank=True, default=list, verbose_name='dias da semana')),
+                ('ocorrencias', models.PositiveIntegerField(blank=True, null=True, verbose_name='ocorrências')),
+                ('ate', models.DateField(blank=True, null=True, verbose_name='até')),
+                ('status', models.CharField(choices=[('ATIVA', 'Ativa'), ('CANCELADA', 'Cancelada')], default='ATIVA', max_length=10, verbose_name='status')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='data de criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='data de atualização')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series_agendamento', to=settings.AUTH_USER_MODEL, verbose_name='cliente')),
+                ('sala', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='series', to='studios.sala', verbose_name='sala')),
+            ],
+            options={
+                'verbose_name': 'série de agendamentos',
+                'verbose_name_plural': 'séries de agendamentos',
+                'ordering': ['-horario_inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExcecaoSerie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ocorrencia', models.DateTimeField(verbose_name='início original da ocorrência')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='data de criação')),
+                ('agendamento', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='excecao_serie', to='bookings.agendamento', verbose_name='agendamento')),
+                ('serie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excecoes', to='bookings.serieagendamento', verbose_name='série')),
+            ],
+            options={
+                'verbose_name': 'exceção da série',
+                'verbose_name_plural': 'exceções da série',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='serieagendamento',
+            index=models.Index(fields=['sala', 'status'], name='serie_sala_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='excecaoserie',
+            constraint=models.UniqueConstraint(fields=('serie', 'ocorrencia'), name='excecao_serie_unica'),
+        ),
+    ]
@@ -3,6 +3,23 @@ from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from decimal import Decimal
 from studios.models import Sala
+from . import recorrencia
+
+
+class AgendamentoQuerySet(models.QuerySet):
+    """QuerySet com os filtros usados na verificação de disponibilidade."""
+
+    def ativos(self):
+        """Retorna apenas os agendamentos que ocupam a sala."""
+        return self.filter(status__in=Agendamento.STATUS_ATIVOS)
+
+    def conflitantes(self, sala, horario_inicio, horario_fim):
+        """Retorna os agendamentos ativos da sala que se sobrepõem ao período informado."""
+        return self.ativos().filter(
+            sala=sala,
+            horario_inicio__lt=horario_fim,
+            horario_fim__gt=horario_inicio
+        )
 
 
 class Agendamento(models.Model):
@@ -14,6 +31,13 @@ class Agendamento(models.Model):
         CANCELADO = 'CANCELADO', _('Cancelado')
         CONCLUIDO = 'CONCLUIDO', _('Concluído')
     
+    # Status que ocupam a sala e, portanto, geram conflito de horário
+    STATUS_ATIVOS = [StatusAgendamento.PENDENTE, StatusAgendamento.CONFIRMADO]
+    
+    # Restrição de exclusão (PostgreSQL) que impede agendamentos ativos sobrepostos
+    # na mesma sala; criada pela migração 0003_agendamento_sem_sobreposicao
+    RESTRICAO_SEM_SOBREPOSICAO = 'agendamento_sem_sobreposicao'
+    
     sala = models.ForeignKey(
         Sala,
         on_delete=models.CASCADE,
@@ -38,10 +62,26 @@ class Agendamento(models.Model):
     data_criacao = models.DateTimeField(_('data de criação'), auto_now_add=True)
     data_atualizacao = models.DateTimeField(_('data de atualização'), auto_now=True)
     
+    objects = AgendamentoQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('agendamento')
         verbose_name_plural = _('agendamentos')
         ordering = ['-horario_inicio']
+        indexes = [
+            # Verificação de conflitos e disponibilidade, que só consideram agendamentos ativos
+            models.Index(
+                fields=['sala', 'horario_inicio', 'horario_fim'],
+                condition=models.Q(status__in=['PENDENTE', 'CONFIRMADO']),
+                name='agend_sala_ativo_periodo_idx',
+            ),
+            # Listagens filtradas por sala e status
+            models.Index(fields=['sala', 'status', 'horario_inicio'], name='agend_sala_status_inicio_idx'),
+            # Ordenação padrão, com desempate pelo id
+            models.Index(fields=['-horario_inicio', '-id'], name='agend_inicio_id_idx'),
+            # Agendamentos de um cliente, usados na listagem de usuários não administradores
+            models.Index(fields=['cliente', '-horario_inicio'], name='agend_cliente_inicio_idx'),
+        ]
     
     def __str__(self):
         return f'{self.sala.nome} - {self.cliente.nome} - {self.horario_inicio.strftime("%d/%m/%Y %H:%M")}'
@@ -51,8 +91,134 @@ class Agendamento(models.Model):
         if self.valor_total is None or self.valor_total == 0:
             # Só recalcula se valor_total não foi definido ou é None
             if not hasattr(self, '_skip_auto_calculation'):
-                # Calcula a duração em horas
-                duracao = (self.horario_fim - self.horario_inicio).total_seconds() / 3600
-                # Calcula o valor total convertendo duração para Decimal
-                self.valor_total = self.sala.preco_hora * Decimal(str(duracao))
+                self.valor_total = self.calcular_valor_total(
+                    self.sala.preco_hora, self.horario_inicio, self.horario_fim
+                )
         super().save(*args, **kwargs)
+    
+    @staticmethod
+    def calcular_valor_total(preco_hora, horario_inicio, horario_fim):
+        """Calcula o valor do período com base no preço por hora da sala."""
+        # Calcula a duração em horas
+        duracao = (horario_fim - horario_inicio).total_seconds() / 3600
+        # Calcula o valor total convertendo duração para Decimal
+        return preco_hora * Decimal(str(duracao))
+
+
+class SerieAgendamento(models.Model):
+    """Agendamento recorrente de uma sala.
+    
+    As ocorrências não são gravadas: são calculadas a partir da regra apenas
+    dentro do período consultado. Só as exceções (ocorrências canceladas ou
+    movidas) viram linhas, em ``ExcecaoSerie``.
+    """
+    
+    class Frequencia(models.TextChoices):
+        DIARIA = recorrencia.DIARIA, _('Diária')
+        SEMANAL = recorrencia.SEMANAL, _('Semanal')
+    
+    class StatusSerie(models.TextChoices):
+        ATIVA = 'ATIVA', _('Ativa')
+        CANCELADA = 'CANCELADA', _('Cancelada')
+    
+    sala = models.ForeignKey(
+        Sala,
+        on_delete=models.CASCADE,
+        related_name='series',
+        verbose_name=_('sala')
+    )
+    cliente = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='series_agendamento',
+        verbose_name=_('cliente')
+    )
+    # Horário da primeira ocorrência; define a hora e a duração de todas
+    horario_inicio = models.DateTimeField(_('horário de início'))
+    horario_fim = models.DateTimeField(_('horário de fim'))
+    frequencia = models.CharField(_('frequência'), max_length=10, choices=Frequencia.choices)
+    intervalo = models.PositiveSmallIntegerField(_('intervalo'), default=1)
+    dias_semana = models.JSONField(_('dias da semana'), default=list, blank=True)
+    ocorrencias = models.PositiveIntegerField(_('ocorrências'), null=True, blank=True)
+    ate = models.DateField(_('até'), null=True, blank=True)
+    status = models.CharField(
+        _('status'),
+        max_length=10,
+        choices=StatusSerie.choices,
+        default=StatusSerie.ATIVA
+    )
+    data_criacao = models.DateTimeField(_('data de criação'), auto_now_add=True)
+    data_atualizacao = models.DateTimeField(_('data de atualização'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('série de agendamentos')
+        verbose_name_plural = _('séries de agendamentos')
+        ordering = ['-horario_inicio']
+        indexes = [
+            models.Index(fields=['sala', 'status'], name='serie_sala_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.sala_id} - {self.get_frequencia_display()} desde {self.horario_inicio.strftime("%d/%m/%Y %H:%M")}'
+    
+    @property
+    def valor_ocorrencia(self):
+        """Valor de cada ocorrência, calculado como o de um agendamento comum."""
+        return Agendamento.calcular_valor_total(self.sala.preco_hora, self.horario_inicio, self.horario_fim)
+    
+    def ocorrencias_entre(self, inicio, fim, excluidas=frozenset()):
+        """Retorna, em ordem, as ocorrências ``(inicio, fim)`` que se sobrepõem a [inicio, fim).
+        
+        ``excluidas`` contém o horário original de início das exceções.
+        """
+        horarios = []
+        for horario in recorrencia.gerar_ocorrencias(
+            self.horario_inicio,
+            self.horario_fim,
+            self.frequencia,
+            self.intervalo,
+            self.dias_semana,
+            self.ocorrencias,
+            self.ate,
+            a_partir=inicio,
+        ):
+            if horario[0] >= fim:
+                break
+            if horario[0] not in excluidas:
+                horarios.append(horario)
+        return horarios
+
+
+class ExcecaoSerie(models.Model):
+    """Ocorrência cancelada ou movida de uma série.
+    
+    A ocorrência movida é substituída por um ``Agendamento`` comum, verificado e
+    cobrado como qualquer outro.
+    """
+    
+    serie = models.ForeignKey(
+        SerieAgendamento,
+        on_delete=models.CASCADE,
+        related_name='excecoes',
+        verbose_name=_('série')
+    )
+    ocorrencia = models.DateTimeField(_('início original da ocorrência'))
+    agendamento = models.OneToOneField(
+        Agendamento,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='excecao_serie',
+        verbose_name=_('agendamento')
+    )
+    data_criacao = models.DateTimeField(_('data de criação'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('exceção da série')
+        verbose_name_plural = _('exceções da série')
+        constraints = [
+            models.UniqueConstraint(fields=['serie', 'ocorrencia'], name='excecao_serie_unica'),
+        ]
+    
+    def __str__(self):
+        return f'{self.serie_id} - {self.ocorrencia.strftime("%d/%m/%Y %H:%M")}'
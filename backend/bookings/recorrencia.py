@@ -0,0 +1,95 @@
+"""
+Expansão de regras de recorrência em horários de agendamento.
+
+Uma regra descreve a primeira ocorrência (``horario_inicio``/``horario_fim``)
+e como ela se repete: todo dia ou toda semana, em um ou mais dias da semana, a
+cada ``intervalo`` dias ou semanas, até completar ``ocorrencias`` ou até a data
+``ate``. As datas são calculadas no horário local (``TIME_ZONE``), de modo que
+a aula das 19h continua às 19h mesmo após uma mudança de fuso.
+"""
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+DIARIA = 'DIARIA'
+SEMANAL = 'SEMANAL'
+FREQUENCIAS = (DIARIA, SEMANAL)
+
+
+class RecorrenciaExcedida(ValueError):
+    """A regra gera mais ocorrências do que o limite permitido."""
+
+
+def _datas(inicio, frequencia, intervalo, dias_semana, a_partir=None):
+    """Gera, em ordem, ``(numero, data)`` das ocorrências a partir da data ``inicio``.
+
+    ``numero`` é a posição da ocorrência na série (a primeira é 0). Com
+    ``a_partir``, as ocorrências anteriores são puladas sem serem geradas, a
+    não ser as da mesma semana.
+    """
+    if frequencia == DIARIA:
+        numero = 0
+        if a_partir is not None and a_partir > inicio:
+            numero = -(-(a_partir - inicio).days // intervalo)
+        while True:
+            yield numero, inicio + timedelta(days=numero * intervalo)
+            numero += 1
+
+    # Semanas contadas a partir da segunda-feira da semana da primeira ocorrência
+    dias = sorted(set(dias_semana)) if dias_semana else [inicio.weekday()]
+    primeira_semana = [dia for dia in dias if dia >= inicio.weekday()]
+    segunda_feira = inicio - timedelta(days=inicio.weekday())
+    semana = 0
+    if a_partir is not None and a_partir > inicio:
+        semana = (a_partir - segunda_feira).days // (7 * intervalo)
+    while True:
+        numero = len(primeira_semana) + (semana - 1) * len(dias) if semana else 0
+        for dia in dias if semana else primeira_semana:
+            yield numero, segunda_feira + timedelta(weeks=semana * intervalo, days=dia)
+            numero += 1
+        semana += 1
+
+
+def gerar_ocorrencias(horario_inicio, horario_fim, frequencia, intervalo=1, dias_semana=None,
+                      ocorrencias=None, ate=None, a_partir=None):
+    """Gera, em ordem, ``(inicio, fim)`` das ocorrências da regra.
+
+    ``dias_semana`` usa a numeração de ``date.weekday()`` (0 = segunda-feira)
+    e só se aplica à frequência semanal. Com ``a_partir``, começa pela
+    primeira ocorrência que termina depois dele, sem percorrer as anteriores.
+    A regra sem ``ocorrencias`` nem ``ate`` não termina.
+    """
+    local = timezone.localtime(horario_inicio)
+    hora = local.time()
+    duracao = horario_fim - horario_inicio
+
+    data_minima = None
+    if a_partir is not None:
+        # Folga de um dia para ocorrências que começam antes e terminam depois de a_partir
+        data_minima = timezone.localtime(a_partir - duracao).date() - timedelta(days=1)
+
+    for numero, data in _datas(local.date(), frequencia, intervalo, dias_semana, data_minima):
+        if ocorrencias is not None and numero >= ocorrencias:
+            return
+        if ate is not None and data > ate:
+            return
+        inicio = timezone.make_aware(datetime.combine(data, hora))
+        if a_partir is None or inicio + duracao > a_partir:
+            yield inicio, inicio + duracao
+
+
+def expandir(horario_inicio, horario_fim, frequencia, intervalo=1, dias_semana=None,
+             ocorrencias=None, ate=None, limite=200):
+    """Retorna a lista de ``(inicio, fim)`` das ocorrências da regra.
+
+    Levanta ``RecorrenciaExcedida`` se a regra gerar mais de ``limite`` ocorrências.
+    """
+    horarios = []
+    for horario in gerar_ocorrencias(
+        horario_inicio, horario_fim, frequencia, intervalo, dias_semana, ocorrencias, ate
+    ):
+        if len(horarios) >= limite:
+            raise RecorrenciaExcedida(f"A recorrência excede o limite de {limite} ocorrências.")
+        horarios.append(horario)
+    return horarios
+
@@ -1,10 +1,22 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.db import connection, transaction, IntegrityError
 from django.utils import timezone
-from .models import Agendamento
+from datetime import timedelta
+from . import recorrencia
+from .availability import IndiceSala
+from .models import Agendamento, ExcecaoSerie, SerieAgendamento
+from .series import carregar_series, conflitos_de_series
+from studios.models import Sala
 from studios.serializers import SalaSerializer
 from users.serializers import UserSerializer
 
 
+MENSAGEM_CONFLITO = "Já existe um agendamento para este horário nesta sala."
+MENSAGEM_OCORRENCIA_ALTERADA = "A ocorrência já foi cancelada ou movida."
+
+
 class AgendamentoSerializer(serializers.ModelSerializer):
     """Serializer para o modelo de agendamentos."""
     
@@ -34,20 +46,57 @@ class AgendamentoSerializer(serializers.ModelSerializer):
         
         # Exclui o próprio agendamento em caso de atualização
         instance = self.instance
-        agendamentos_conflitantes = Agendamento.objects.filter(
-            sala=sala,
-            status__in=['PENDENTE', 'CONFIRMADO'],
-            horario_inicio__lt=horario_fim,
-            horario_fim__gt=horario_inicio
-        )
+        agendamentos_conflitantes = Agendamento.objects.conflitantes(sala, horario_inicio, horario_fim)
         
         if instance:
             agendamentos_conflitantes = agendamentos_conflitantes.exclude(pk=instance.pk)
         
         if agendamentos_conflitantes.exists():
-            raise serializers.ValidationError("Já existe um agendamento para este horário nesta sala.")
+            raise serializers.ValidationError(MENSAGEM_CONFLITO)
+        
+        # Ocorrências das séries da sala, expandidas apenas no horário pedido
+        if conflitos_de_series(sala.pk, horario_inicio, horario_fim):
+            raise serializers.ValidationError(MENSAGEM_CONFLITO)
         
         return attrs
+    
+    def create(self, validated_data):
+        return self._salvar_sem_conflito(super().create, validated_data)
+    
+    def update(self, instance, validated_data):
+        return self._salvar_sem_conflito(super().update, instance, validated_data)
+    
+    def _salvar_sem_conflito(self, salvar, *args):
+        """Salva o agendamento sem permitir sobreposição, mesmo com requisições concorrentes.
+        
+        A verificação em validate() é feita antes de salvar e não impede que duas
+        requisições simultâneas reservem o mesmo horário. A linha da sala é
+        bloqueada (como na criação de séries e de lotes) e os conflitos são
+        verificados novamente após a gravação, dentro da mesma transação. No
+        PostgreSQL, os conflitos entre agendamentos ficam a cargo da restrição de
+        exclusão; as ocorrências de séries, que ela não cobre, são sempre
+        verificadas.
+        """
+        try:
+            with transaction.atomic():
+                sala = self.validated_data.get('sala') or self.instance.sala
+                list(Sala.objects.select_for_update().filter(pk=sala.pk).values_list('pk', flat=True))
+                agendamento = salvar(*args)
+                if agendamento.status not in Agendamento.STATUS_ATIVOS:
+                    return agendamento
+                
+                inicio, fim = agendamento.horario_inicio, agendamento.horario_fim
+                if connection.vendor != 'postgresql' and Agendamento.objects.conflitantes(
+                    agendamento.sala, inicio, fim
+                ).exclude(pk=agendamento.pk).exists():
+                    raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [MENSAGEM_CONFLITO]})
+                if conflitos_de_series(agendamento.sala_id, inicio, fim):
+                    raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [MENSAGEM_CONFLITO]})
+                return agendamento
+        except IntegrityError as erro:
+            if Agendamento.RESTRICAO_SEM_SOBREPOSICAO in str(erro):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [MENSAGEM_CONFLITO]})
+            raise
 
 
 class AgendamentoStatusUpdateSerializer(serializers.ModelSerializer):
@@ -68,4 +117,371 @@ class AgendamentoStatusUpdateSerializer(serializers.ModelSerializer):
         if instance.status == 'CONCLUIDO' and value != 'CONCLUIDO':
             raise serializers.ValidationError("Não é possível alterar o status de um agendamento concluído.")
         
-        return value
\ No newline at end of file
+        return value
+    
+    def update(self, instance, validated_data):
+        """Atualiza o status, tratando a violação da restrição de sobreposição como conflito.
+        
+        No PostgreSQL, voltar um agendamento a um status ativo quando o horário já
+        foi ocupado viola a restrição de exclusão.
+        """
+        try:
+            with transaction.atomic():
+                return super().update(instance, validated_data)
+        except IntegrityError as erro:
+            if Agendamento.RESTRICAO_SEM_SOBREPOSICAO in str(erro):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [MENSAGEM_CONFLITO]})
+            raise
+
+
+class AgendamentoExportacaoSerializer(serializers.ModelSerializer):
+    """Serializer plano (sem objetos aninhados) usado na exportação de agendamentos."""
+    
+    sala_nome = serializers.CharField(source='sala.nome', read_only=True)
+    cliente_email = serializers.EmailField(source='cliente.email', read_only=True)
+    
+    class Meta:
+        model = Agendamento
+        fields = ['id', 'sala', 'sala_nome', 'cliente', 'cliente_email', 'horario_inicio',
+                  'horario_fim', 'valor_total', 'status', 'data_criacao', 'data_atualizacao']
+        read_only_fields = fields
+
+
+class JanelaSerializer(serializers.Serializer):
+    """Serializer para uma janela de horário [inicio, fim)."""
+    
+    inicio = serializers.DateTimeField()
+    fim = serializers.DateTimeField()
+    
+    def validate(self, attrs):
+        if attrs['inicio'] >= attrs['fim']:
+            raise serializers.ValidationError("O início da janela deve ser anterior ao fim.")
+        return attrs
+
+
+class DisponibilidadeLoteSerializer(serializers.Serializer):
+    """Serializer para a consulta de disponibilidade de várias salas em várias janelas.
+    
+    As janelas podem ser informadas explicitamente ou geradas a partir de um
+    período (data_inicio/data_fim) dividido em slots de duracao_slot minutos.
+    """
+    
+    MAX_CELULAS = 10000
+    
+    salas = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=500)
+    janelas = JanelaSerializer(many=True, required=False)
+    data_inicio = serializers.DateTimeField(required=False)
+    data_fim = serializers.DateTimeField(required=False)
+    duracao_slot = serializers.IntegerField(required=False, min_value=5, max_value=1440)
+    
+    def validate(self, attrs):
+        """Normaliza as janelas em uma lista de tuplas (inicio, fim) e limita o tamanho da consulta."""
+        if attrs.get('janelas'):
+            janelas = [(janela['inicio'], janela['fim']) for janela in attrs['janelas']]
+        elif all(attrs.get(campo) for campo in ('data_inicio', 'data_fim', 'duracao_slot')):
+            if attrs['data_inicio'] >= attrs['data_fim']:
+                raise serializers.ValidationError("A data de início deve ser anterior à data de fim.")
+            janelas = []
+            duracao = timedelta(minutes=attrs['duracao_slot'])
+            inicio = attrs['data_inicio']
+            while inicio + duracao <= attrs['data_fim'] and len(janelas) <= self.MAX_CELULAS:
+                janelas.append((inicio, inicio + duracao))
+                inicio += duracao
+        else:
+            raise serializers.ValidationError(
+                "Informe janelas ou data_inicio, data_fim e duracao_slot."
+            )
+        
+        if not janelas:
+            raise serializers.ValidationError("O período não comporta nenhum slot.")
+        
+        salas = list(dict.fromkeys(attrs['salas']))
+        if len(salas) * len(janelas) > self.MAX_CELULAS:
+            raise serializers.ValidationError(
+                f"A consulta excede o limite de {self.MAX_CELULAS} combinações de sala e janela."
+            )
+        
+        return {'salas': salas, 'janelas': janelas}
+
+
+class ProximosHorariosSerializer(serializers.Serializer):
+    """Serializer para os parâmetros da busca de próximos horários livres."""
+    
+    HORIZONTE_PADRAO = timedelta(days=30)
+    HORIZONTE_MAXIMO = timedelta(days=90)
+    
+    duracao = serializers.IntegerField(min_value=15, max_value=1440, help_text="Duração em minutos.")
+    quantidade = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    data_inicio = serializers.DateTimeField(required=False)
+    data_fim = serializers.DateTimeField(required=False)
+    
+    def validate(self, attrs):
+        """Define o período de busca, que nunca começa no passado."""
+        agora = timezone.now()
+        # Sem data de início, ou com uma data no passado, a busca começa no
+        # próximo múltiplo de 15 minutos
+        resto = timedelta(minutes=agora.minute % 15, seconds=agora.second, microseconds=agora.microsecond)
+        proximo_slot = agora - resto + (timedelta(minutes=15) if resto else timedelta(0))
+        
+        inicio = max(attrs.get('data_inicio', proximo_slot), proximo_slot)
+        fim = attrs.get('data_fim', inicio + self.HORIZONTE_PADRAO)
+        
+        if inicio >= fim:
+            raise serializers.ValidationError("A data de fim deve ser posterior à data de início.")
+        if fim - inicio > self.HORIZONTE_MAXIMO:
+            raise serializers.ValidationError(
+                f"O período de busca não pode exceder {self.HORIZONTE_MAXIMO.days} dias."
+            )
+        
+        attrs['data_inicio'] = inicio
+        attrs['data_fim'] = fim
+        attrs['duracao'] = timedelta(minutes=attrs['duracao'])
+        return attrs
+
+
+class HorarioLivreSerializer(serializers.Serializer):
+    """Serializer para um horário livre encontrado na busca."""
+    
+    sala = serializers.IntegerField()
+    sala_nome = serializers.CharField()
+    horario_inicio = serializers.DateTimeField()
+    horario_fim = serializers.DateTimeField()
+    valor_total = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class HorarioLoteSerializer(serializers.Serializer):
+    """Serializer para um horário de agendamento do lote."""
+    
+    # Inteiro em vez de PrimaryKeyRelatedField: as salas do lote são buscadas juntas
+    sala = serializers.IntegerField(min_value=1)
+    horario_inicio = serializers.DateTimeField()
+    horario_fim = serializers.DateTimeField()
+    
+    def validate(self, attrs):
+        if attrs['horario_inicio'] >= attrs['horario_fim']:
+            raise serializers.ValidationError("O horário de início deve ser anterior ao horário de fim.")
+        return attrs
+
+
+class RecorrenciaSerializer(HorarioLoteSerializer):
+    """Serializer para uma regra de recorrência; o horário informado é a primeira ocorrência."""
+    
+    frequencia = serializers.ChoiceField(choices=recorrencia.FREQUENCIAS)
+    intervalo = serializers.IntegerField(min_value=1, max_value=52, default=1)
+    dias_semana = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), required=False, min_length=1, max_length=7,
+        help_text="Dias da semana das ocorrências semanais (0 = segunda-feira)."
+    )
+    ocorrencias = serializers.IntegerField(min_value=1, required=False)
+    ate = serializers.DateField(required=False, help_text="Data da última ocorrência possível.")
+    
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if 'ocorrencias' not in attrs and 'ate' not in attrs:
+            raise serializers.ValidationError("Informe ocorrencias ou ate.")
+        if attrs.get('dias_semana') and attrs['frequencia'] != recorrencia.SEMANAL:
+            raise serializers.ValidationError("dias_semana só se aplica à frequência semanal.")
+        return attrs
+
+
+class AgendamentoLoteSerializer(serializers.Serializer):
+    """Serializer para a criação de vários agendamentos a partir de uma lista ou de uma recorrência.
+    
+    Sem ``parcial``, o lote é recusado por inteiro se algum horário for recusado.
+    """
+    
+    MAX_AGENDAMENTOS = 200
+    
+    agendamentos = HorarioLoteSerializer(many=True, required=False)
+    recorrencia = RecorrenciaSerializer(required=False)
+    parcial = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        """Normaliza o lote em uma lista de tuplas (sala, horario_inicio, horario_fim)."""
+        if ('agendamentos' in attrs) == ('recorrencia' in attrs):
+            raise serializers.ValidationError("Informe agendamentos ou recorrencia.")
+        
+        if 'agendamentos' in attrs:
+            horarios = [
+                (item['sala'], item['horario_inicio'], item['horario_fim']) for item in attrs['agendamentos']
+            ]
+        else:
+            regra = attrs['recorrencia']
+            try:
+                ocorrencias = recorrencia.expandir(
+                    regra['horario_inicio'],
+                    regra['horario_fim'],
+                    regra['frequencia'],
+                    intervalo=regra['intervalo'],
+                    dias_semana=regra.get('dias_semana'),
+                    ocorrencias=regra.get('ocorrencias'),
+                    ate=regra.get('ate'),
+                    limite=self.MAX_AGENDAMENTOS,
+                )
+            except recorrencia.RecorrenciaExcedida as erro:
+                raise serializers.ValidationError({'recorrencia': [str(erro)]})
+            horarios = [(regra['sala'], inicio, fim) for inicio, fim in ocorrencias]
+        
+        if not horarios:
+            raise serializers.ValidationError("O lote não contém nenhum agendamento.")
+        if len(horarios) > self.MAX_AGENDAMENTOS:
+            raise serializers.ValidationError(
+                f"O lote excede o limite de {self.MAX_AGENDAMENTOS} agendamentos."
+            )
+        
+        return {'horarios': horarios, 'parcial': attrs['parcial']}
+
+
+class SerieAgendamentoSerializer(serializers.ModelSerializer):
+    """Serializer para as séries de agendamentos; o horário informado é a primeira ocorrência.
+    
+    Sem ``ocorrencias`` nem ``ate``, a série não termina. Na criação, as
+    ocorrências são comparadas com os agendamentos e as demais séries da sala
+    até ``BOOKINGS_SERIES_HORIZONTE_DIAS`` dias à frente (ou até o último
+    agendamento da sala, se for mais distante).
+    """
+    
+    MAX_CONFLITOS = 10
+    
+    sala_detail = SalaSerializer(source='sala', read_only=True)
+    valor_ocorrencia = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    
+    class Meta:
+        model = SerieAgendamento
+        fields = ['id', 'sala', 'cliente', 'horario_inicio', 'horario_fim', 'frequencia', 'intervalo',
+                  'dias_semana', 'ocorrencias', 'ate', 'status', 'valor_ocorrencia',
+                  'data_criacao', 'data_atualizacao', 'sala_detail']
+        read_only_fields = ['cliente', 'status', 'data_criacao', 'data_atualizacao']
+        extra_kwargs = {
+            'intervalo': {'min_value': 1, 'max_value': 52},
+            'ocorrencias': {'min_value': 1},
+        }
+    
+    def validate_dias_semana(self, value):
+        if not isinstance(value, list) or not all(isinstance(dia, int) and 0 <= dia <= 6 for dia in value):
+            raise serializers.ValidationError("Informe uma lista de dias da semana entre 0 (segunda) e 6 (domingo).")
+        return sorted(set(value))
+    
+    def validate(self, attrs):
+        """Valida o horário da primeira ocorrência e normaliza os dias da semana."""
+        if attrs['horario_inicio'] >= attrs['horario_fim']:
+            raise serializers.ValidationError("O horário de início deve ser anterior ao horário de fim.")
+        if attrs['horario_inicio'] < timezone.now():
+            raise serializers.ValidationError("Não é possível agendar para uma data/hora passada.")
+        if attrs['horario_fim'] - attrs['horario_inicio'] > timedelta(days=1):
+            raise serializers.ValidationError("Cada ocorrência pode durar no máximo 24 horas.")
+        if attrs.get('ate') and attrs['ate'] < timezone.localdate(attrs['horario_inicio']):
+            raise serializers.ValidationError("A data final deve ser posterior à primeira ocorrência.")
+        
+        if attrs['frequencia'] == recorrencia.SEMANAL:
+            attrs['dias_semana'] = attrs.get('dias_semana') or [timezone.localtime(attrs['horario_inicio']).weekday()]
+        elif attrs.get('dias_semana'):
+            raise serializers.ValidationError("dias_semana só se aplica à frequência semanal.")
+        else:
+            attrs['dias_semana'] = []
+        return attrs
+    
+    def create(self, validated_data):
+        """Grava a série com a linha da sala bloqueada, recusando ocorrências em conflito."""
+        with transaction.atomic():
+            sala = validated_data['sala']
+            list(Sala.objects.select_for_update().filter(pk=sala.pk).values_list('pk', flat=True))
+            serie = SerieAgendamento(**validated_data)
+            conflitos = self._ocorrencias_em_conflito(serie)
+            if conflitos:
+                raise serializers.ValidationError({
+                    api_settings.NON_FIELD_ERRORS_KEY: [MENSAGEM_CONFLITO],
+                    'ocorrencias_conflitantes': conflitos,
+                })
+            serie.save()
+            return serie
+    
+    def _ocorrencias_em_conflito(self, serie):
+        """Retorna o início das primeiras ocorrências da série que conflitam com a sala."""
+        inicio = serie.horario_inicio
+        fim = timezone.now() + timedelta(days=getattr(settings, 'BOOKINGS_SERIES_HORIZONTE_DIAS', 366))
+        ultimo = Agendamento.objects.ativos().filter(sala=serie.sala).order_by('-horario_fim').values_list(
+            'horario_fim', flat=True
+        ).first()
+        if ultimo is not None:
+            fim = max(fim, ultimo)
+        
+        existentes = Agendamento.objects.ativos().filter(
+            sala=serie.sala, horario_inicio__lt=fim, horario_fim__gt=inicio
+        ).values_list('id', 'horario_inicio', 'horario_fim').order_by()
+        indice = IndiceSala(existentes, carregar_series([serie.sala_id])[serie.sala_id])
+        
+        conflitos = []
+        for ocorrencia_inicio, ocorrencia_fim in serie.ocorrencias_entre(inicio, fim):
+            if indice.tem_conflito(ocorrencia_inicio, ocorrencia_fim):
+                conflitos.append(serializers.DateTimeField().to_representation(ocorrencia_inicio))
+                if len(conflitos) >= self.MAX_CONFLITOS:
+                    break
+        return conflitos
+
+
+class OcorrenciasSerieSerializer(serializers.Serializer):
+    """Serializer para o período da listagem de ocorrências de uma série."""
+    
+    PERIODO_MAXIMO = timedelta(days=366)
+    
+    data_inicio = serializers.DateTimeField()
+    data_fim = serializers.DateTimeField()
+    
+    def validate(self, attrs):
+        if attrs['data_inicio'] >= attrs['data_fim']:
+            raise serializers.ValidationError("A data de início deve ser anterior à data de fim.")
+        if attrs['data_fim'] - attrs['data_inicio'] > self.PERIODO_MAXIMO:
+            raise serializers.ValidationError(
+                f"O período não pode exceder {self.PERIODO_MAXIMO.days} dias."
+            )
+        return attrs
+
+
+class OcorrenciaSerieSerializer(serializers.Serializer):
+    """Serializer para cancelar uma ocorrência da série, identificada pelo seu horário de início."""
+    
+    ocorrencia = serializers.DateTimeField()
+    
+    def validate_ocorrencia(self, value):
+        serie = self.context['serie']
+        if serie.status != SerieAgendamento.StatusSerie.ATIVA:
+            raise serializers.ValidationError("A série está cancelada.")
+        if value < timezone.now():
+            raise serializers.ValidationError("Não é possível alterar uma ocorrência passada.")
+        if not any(inicio == value for inicio, _ in serie.ocorrencias_entre(value, value + timedelta(microseconds=1))):
+            raise serializers.ValidationError("A série não tem uma ocorrência neste horário.")
+        if ExcecaoSerie.objects.filter(serie=serie, ocorrencia=value).exists():
+            raise serializers.ValidationError(MENSAGEM_OCORRENCIA_ALTERADA)
+        return value
+
+
+class MoverOcorrenciaSerializer(OcorrenciaSerieSerializer):
+    """Serializer para mover uma ocorrência da série para outro horário (e, opcionalmente, outra sala)."""
+    
+    horario_inicio = serializers.DateTimeField()
+    horario_fim = serializers.DateTimeField()
+    sala = serializers.PrimaryKeyRelatedField(queryset=Sala.objects.all(), required=False)
+
+
+class AnaliseSerializer(serializers.Serializer):
+    """Serializer para os parâmetros da análise de ocupação e receita (dias locais, inclusive)."""
+    
+    PERIODO_PADRAO = timedelta(days=30)
+    PERIODO_MAXIMO = timedelta(days=366)
+    
+    data_inicio = serializers.DateField(required=False)
+    data_fim = serializers.DateField(required=False)
+    sala = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+    
+    def validate(self, attrs):
+        """Sem datas, analisa os últimos 30 dias até hoje."""
+        fim = attrs.get('data_fim') or timezone.localdate()
+        inicio = attrs.get('data_inicio') or fim - self.PERIODO_PADRAO + timedelta(days=1)
+        if inicio > fim:
+            raise serializers.ValidationError("A data de início não pode ser posterior à data de fim.")
+        if fim - inicio >= self.PERIODO_MAXIMO:
+            raise serializers.ValidationError(
+                f"O período não pode exceder {self.PERIODO_MAXIMO.days} dias."
+            )
+        return {'data_inicio': inicio, 'data_fim': fim, 'salas': attrs.get('sala') or None}
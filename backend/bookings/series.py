@@ -0,0 +1,51 @@
+"""
+Ocorrências das séries de agendamentos (``SerieAgendamento``).
+
+As séries ativas de uma sala são carregadas junto com as suas exceções e
+expandidas apenas dentro do período consultado. O índice de disponibilidade
+(``bookings.availability``) guarda as séries de cada sala ao lado dos
+agendamentos comuns; a verificação de conflitos de ``AgendamentoSerializer``
+usa ``conflitos_de_series`` diretamente.
+"""
+from collections import defaultdict
+
+from .models import ExcecaoSerie, SerieAgendamento
+
+
+def carregar_series(sala_ids):
+    """Retorna ``{sala_id: [(serie, excluidas)]}`` com as séries ativas das salas.
+
+    ``excluidas`` é o conjunto dos horários originais das ocorrências canceladas
+    ou movidas. As exceções só são consultadas se houver alguma série.
+    """
+    series = list(
+        SerieAgendamento.objects.filter(sala_id__in=sala_ids, status=SerieAgendamento.StatusSerie.ATIVA).order_by()
+    )
+    por_sala = {sala_id: [] for sala_id in sala_ids}
+    if not series:
+        return por_sala
+
+    excluidas = defaultdict(set)
+    for serie_id, ocorrencia in ExcecaoSerie.objects.filter(serie__in=series).values_list('serie_id', 'ocorrencia'):
+        excluidas[serie_id].add(ocorrencia)
+    for serie in series:
+        por_sala[serie.sala_id].append((serie, frozenset(excluidas[serie.pk])))
+    return por_sala
+
+
+def ocorrencias_sobrepostas(series, inicio, fim):
+    """Retorna ``(inicio, fim, serie_id)`` das ocorrências que se sobrepõem a [inicio, fim), em ordem."""
+    return sorted(
+        (ocorrencia_inicio, ocorrencia_fim, serie.pk)
+        for serie, excluidas in series
+        for ocorrencia_inicio, ocorrencia_fim in serie.ocorrencias_entre(inicio, fim, excluidas)
+    )
+
+
+def conflitos_de_series(sala_id, inicio, fim, excluir_serie=None):
+    """Consulta as séries ativas da sala e retorna as ocorrências que se sobrepõem ao período."""
+    series = [
+        (serie, excluidas) for serie, excluidas in carregar_series([sala_id])[sala_id]
+        if serie.pk != excluir_serie
+    ]
+    return ocorrencias_sobrepostas(series, inicio, fim)
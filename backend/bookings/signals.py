@@ -0,0 +1,39 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .availability import indice_disponibilidade
+from .models import Agendamento, ExcecaoSerie, SerieAgendamento
+
+
+@receiver([post_save, post_delete], sender=Agendamento)
+def invalidar_indice_disponibilidade(sender, instance, **kwargs):
+    """Remove do índice de disponibilidade a sala afetada pelo agendamento."""
+    sala_id, agendamento_id = instance.sala_id, instance.pk
+    indice_disponibilidade.invalidar(sala_id=sala_id, agendamento_id=agendamento_id)
+    # Invalida de novo após o commit, descartando recargas feitas antes da confirmação
+    transaction.on_commit(
+        lambda: indice_disponibilidade.invalidar(sala_id=sala_id, agendamento_id=agendamento_id)
+    )
+
+
+def _invalidar_sala(sala_id):
+    indice_disponibilidade.invalidar(sala_id=sala_id)
+    transaction.on_commit(lambda: indice_disponibilidade.invalidar(sala_id=sala_id))
+
+
+@receiver([post_save, post_delete], sender=SerieAgendamento)
+def invalidar_indice_da_serie(sender, instance, **kwargs):
+    """Remove do índice de disponibilidade a sala da série."""
+    _invalidar_sala(instance.sala_id)
+
+
+@receiver([post_save, post_delete], sender=ExcecaoSerie)
+def invalidar_indice_da_excecao(sender, instance, **kwargs):
+    """Remove do índice de disponibilidade a sala da série da exceção."""
+    try:
+        sala_id = instance.serie.sala_id
+    except SerieAgendamento.DoesNotExist:
+        # Série apagada junto com a exceção: o signal da série invalida a sala
+        return
+    _invalidar_sala(sala_id)
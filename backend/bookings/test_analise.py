@@ -0,0 +1,174 @@
+import json
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from studios.models import Sala
+from users.models import User
+from . import recorrencia
+from .analise import Colunas, analisar, relatorio
+from .models import Agendamento, ExcecaoSerie, SerieAgendamento
+
+
+def horario(dia, hora):
+    return timezone.make_aware(datetime(2030, 1, dia, hora))
+
+
+class AnaliseTest(TestCase):
+    """Testes para o cálculo vetorizado de ocupação e receita."""
+
+    def setUp(self):
+        """Segunda (7/1) e terça (8/1) de 2030, com agendamentos na virada dos dias e fora do período."""
+        self.cliente = User.objects.create_user(email='cliente@test.com', nome='Cliente', user_type='CLIENTE')
+        self.sala = Sala.objects.create(nome='Sala A', capacidade=10, preco_hora=Decimal('100.00'))
+        self.outra_sala = Sala.objects.create(nome='Sala B', capacidade=5, preco_hora=Decimal('80.00'))
+        status_ = Agendamento.StatusAgendamento
+        for sala, inicio, fim, situacao in (
+            (self.sala, horario(7, 9) + timedelta(minutes=30), horario(7, 11), status_.CONFIRMADO),
+            (self.sala, horario(7, 23), horario(8, 1), status_.CONCLUIDO),
+            (self.sala, horario(8, 10), horario(8, 12), status_.PENDENTE),
+            (self.sala, horario(8, 14), horario(8, 15), status_.CANCELADO),
+            (self.sala, horario(6, 23), horario(7, 1), status_.CONFIRMADO),
+            (self.outra_sala, horario(7, 8), horario(7, 9), status_.CONFIRMADO),
+        ):
+            Agendamento.objects.create(
+                sala=sala, cliente=self.cliente, horario_inicio=inicio, horario_fim=fim, status=situacao
+            )
+
+    def test_relatorio(self):
+        """Testa utilização, receita por dia, contagens e mapa de ocupação de uma sala."""
+        resultado = relatorio(date(2030, 1, 7), date(2030, 1, 8), salas=[self.sala.pk])
+        self.assertEqual(resultado['dias'], [date(2030, 1, 7), date(2030, 1, 8)])
+        self.assertEqual(len(resultado['salas']), 1)
+
+        sala = resultado['salas'][0]
+        self.assertEqual(sala['horas_ocupadas'], 6.5)
+        self.assertEqual(sala['utilizacao'], round(6.5 * 100 / 48, 2))
+        self.assertEqual(sala['receita'], '350.00')
+        self.assertEqual(sala['receita_por_dia'], ['350.00', '0.00'])
+        self.assertEqual(sala['receita_pendente'], '200.00')
+        self.assertEqual((sala['agendamentos'], sala['cancelados']), (3, 1))
+
+        mapa = np.array(sala['mapa_ocupacao'])
+        self.assertEqual(mapa.shape, (7, 24))
+        ocupadas = {(int(dia), int(hora)): mapa[dia, hora] for dia, hora in zip(*np.nonzero(mapa))}
+        self.assertEqual(ocupadas, {
+            (0, 0): 100.0, (0, 9): 50.0, (0, 10): 100.0, (0, 23): 100.0,
+            (1, 0): 100.0, (1, 10): 100.0, (1, 11): 100.0,
+        })
+
+    def test_totais_de_todas_as_salas(self):
+        """Testa os totais quando nenhuma sala é informada."""
+        resultado = relatorio(date(2030, 1, 7), date(2030, 1, 8))
+        self.assertEqual([sala['sala'] for sala in resultado['salas']], [self.sala.pk, self.outra_sala.pk])
+        self.assertEqual(resultado['total']['horas_ocupadas'], 7.5)
+        self.assertEqual(resultado['total']['receita'], '430.00')
+        self.assertEqual(resultado['total']['utilizacao'], round(7.5 * 100 / 96, 2))
+
+    def test_series(self):
+        """Testa que as ocorrências das séries ativas entram na ocupação e na receita, menos as exceções."""
+        serie = SerieAgendamento.objects.create(
+            sala=self.outra_sala, cliente=self.cliente, horario_inicio=horario(6, 14), horario_fim=horario(6, 16),
+            frequencia=recorrencia.DIARIA
+        )
+        ExcecaoSerie.objects.create(serie=serie, ocorrencia=horario(8, 14))
+        SerieAgendamento.objects.create(
+            sala=self.outra_sala, cliente=self.cliente, horario_inicio=horario(6, 18), horario_fim=horario(6, 19),
+            frequencia=recorrencia.DIARIA, status=SerieAgendamento.StatusSerie.CANCELADA
+        )
+
+        sala = relatorio(date(2030, 1, 7), date(2030, 1, 8), salas=[self.outra_sala.pk])['salas'][0]
+        self.assertEqual(sala['horas_ocupadas'], 3.0)
+        self.assertEqual(sala['agendamentos'], 2)
+        self.assertEqual(sala['receita_por_dia'], ['240.00', '0.00'])
+        self.assertEqual(sala['mapa_ocupacao'][0][14], 100.0)
+        self.assertEqual(sala['mapa_ocupacao'][1][14], 0.0)
+
+    def test_igual_ao_calculo_por_agendamento(self):
+        """Compara a ocupação vetorizada com a soma agendamento a agendamento, em dados aleatórios."""
+        aleatorio = random.Random(7)
+        comeco = int(horario(1, 0).timestamp())
+        linhas = []
+        for _ in range(300):
+            inicio = comeco + aleatorio.randrange(-2 * 86400, 12 * 86400, 900)
+            linhas.append((aleatorio.choice([1, 2, 3, 9]), inicio, inicio + aleatorio.randrange(900, 30000, 900)))
+        sala_id, inicio, fim = (np.array(coluna, dtype=np.int64) for coluna in zip(*linhas))
+        colunas = Colunas(
+            sala_id, inicio, fim, np.full(len(linhas), 100, dtype=np.int64),
+            np.full(len(linhas), Agendamento.StatusAgendamento.CONFIRMADO, dtype='<U10')
+        )
+
+        analise = analisar(colunas, [3, 1, 2], date(2030, 1, 1), date(2030, 1, 10))
+        fim_periodo = comeco + 10 * 86400
+        esperado = [
+            sum(max(0, min(f, fim_periodo) - max(i, comeco)) for s, i, f in linhas if s == sala)
+            for sala in (1, 2, 3)
+        ]
+        self.assertEqual(analise.segundos_ocupados.tolist(), esperado)
+        # O mapa, ponderado pelas horas de cada célula no período, devolve o total ocupado
+        vezes = np.bincount([(date(2030, 1, 1) + timedelta(days=dia)).weekday() for dia in range(10)], minlength=7)
+        self.assertTrue(np.allclose(
+            (analise.mapa_ocupacao * vezes[None, :, None] * 3600 / 100).sum(axis=(1, 2)), esperado
+        ))
+
+
+class AnaliseViewTest(APITestCase):
+    """Testes para o endpoint e o comando de análise."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.admin = User.objects.create_superuser(email='admin@test.com', password='senha123', nome='Admin')
+        self.cliente = User.objects.create_user(email='cliente@test.com', nome='Cliente', user_type='CLIENTE')
+        self.sala = Sala.objects.create(nome='Sala A', capacidade=10, preco_hora=Decimal('100.00'))
+        Agendamento.objects.create(
+            sala=self.sala, cliente=self.cliente, horario_inicio=horario(7, 10), horario_fim=horario(7, 12),
+            status=Agendamento.StatusAgendamento.CONFIRMADO
+        )
+        self.url = reverse('agendamento-analise')
+
+    def test_apenas_staff(self):
+        """Testa que clientes não acessam a análise."""
+        self.client.force_authenticate(user=self.cliente)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_endpoint(self):
+        """Testa o relatório e a validação do período."""
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(self.url, {
+            'data_inicio': '2030-01-07', 'data_fim': '2030-01-07', 'sala': self.sala.pk
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['salas'][0]['receita'], '200.00')
+        self.assertEqual(response.data['salas'][0]['horas_ocupadas'], 2.0)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['dias']), 30)
+
+        for parametros in (
+            {'data_inicio': '2030-01-08', 'data_fim': '2030-01-07'},
+            {'data_inicio': '2030-01-01', 'data_fim': '2031-01-02'},
+        ):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get(self.url, parametros).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comando(self):
+        """Testa o resumo em texto e o relatório em JSON."""
+        saida = StringIO()
+        call_command('relatorio_ocupacao', '--inicio', '2030-01-07', '--fim', '2030-01-07', stdout=saida)
+        self.assertIn('Sala A', saida.getvalue())
+        self.assertIn('200.00', saida.getvalue())
+
+        saida = StringIO()
+        call_command('relatorio_ocupacao', '--inicio', '2030-01-07', '--fim', '2030-01-07', '--json', stdout=saida)
+        self.assertEqual(json.loads(saida.getvalue())['total']['receita'], '200.00')
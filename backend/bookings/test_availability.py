@@ -0,0 +1,395 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from decimal import Decimal
+from datetime import timedelta
+
+from .availability import IndiceSala, indice_disponibilidade, horarios_livres, proximos_horarios_livres
+from .models import Agendamento
+from studios.models import Sala
+from users.models import User
+
+
+class IndiceSalaTest(TestCase):
+    """Testes para o índice ordenado de intervalos de uma sala."""
+
+    def setUp(self):
+        """Configura os intervalos de teste."""
+        self.base = timezone.now().replace(microsecond=0)
+        self.indice = IndiceSala([
+            (3, self.hora(10), self.hora(12)),
+            (1, self.hora(0), self.hora(2)),
+            (2, self.hora(3), self.hora(9)),
+            (4, self.hora(4), self.hora(5)),
+        ])
+
+    def hora(self, horas):
+        return self.base + timedelta(hours=horas)
+
+    def test_intervalos_ordenados_por_inicio(self):
+        """Testa que os intervalos são ordenados independentemente da ordem de entrada."""
+        self.assertEqual(self.indice.ids, [1, 2, 4, 3])
+        self.assertEqual(len(self.indice), 4)
+
+    def test_periodo_livre(self):
+        """Testa período entre intervalos sem conflito."""
+        self.assertFalse(self.indice.tem_conflito(self.hora(9), self.hora(10)))
+        self.assertEqual(self.indice.conflitos(self.hora(9), self.hora(10)), [])
+
+    def test_limites_nao_conflitam(self):
+        """Testa que intervalos adjacentes não são considerados sobrepostos."""
+        self.assertFalse(self.indice.tem_conflito(self.hora(2), self.hora(3)))
+        self.assertFalse(self.indice.tem_conflito(self.hora(12), self.hora(13)))
+
+    def test_conflito_com_intervalo_longo(self):
+        """Testa conflito com intervalo que começa antes e termina depois do período."""
+        self.assertTrue(self.indice.tem_conflito(self.hora(6), self.hora(7)))
+        self.assertEqual(self.indice.conflitos(self.hora(6), self.hora(7)), [2])
+
+    def test_multiplos_conflitos(self):
+        """Testa período que se sobrepõe a vários intervalos."""
+        self.assertEqual(self.indice.conflitos(self.hora(1), self.hora(11)), [1, 2, 4, 3])
+        self.assertEqual(
+            self.indice.intervalos(self.hora(4), self.hora(5)),
+            [(self.hora(3), self.hora(9)), (self.hora(4), self.hora(5))]
+        )
+
+    def test_horarios_livres_preenche_lacunas(self):
+        """Testa a varredura das lacunas entre intervalos ocupados."""
+        ocupados = self.indice.intervalos(self.hora(0), self.hora(14))
+        slots = list(horarios_livres(ocupados, self.hora(0), self.hora(14), timedelta(hours=1)))
+
+        self.assertEqual(slots, [
+            (self.hora(2), self.hora(3)),
+            (self.hora(9), self.hora(10)),
+            (self.hora(12), self.hora(13)),
+            (self.hora(13), self.hora(14)),
+        ])
+
+    def test_proximos_horarios_intercala_salas(self):
+        """Testa que os slots de várias salas são retornados em ordem de início."""
+        outra = IndiceSala([(9, self.hora(0), self.hora(1))])
+        slots = proximos_horarios_livres(
+            {1: self.indice, 2: outra}, self.hora(0), self.hora(14), timedelta(hours=1), 3
+        )
+
+        self.assertEqual(slots, [
+            (2, self.hora(1), self.hora(2)),
+            (1, self.hora(2), self.hora(3)),
+            (2, self.hora(2), self.hora(3)),
+        ])
+
+    def test_indice_vazio(self):
+        """Testa índice sem intervalos."""
+        indice = IndiceSala([])
+        self.assertFalse(indice.tem_conflito(self.hora(0), self.hora(1)))
+        self.assertEqual(indice.conflitos(self.hora(0), self.hora(1)), [])
+
+
+class IndiceDisponibilidadeTest(APITestCase):
+    """Testes para o cache de índices usado pelo endpoint de disponibilidade."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        self.sala = Sala.objects.create(
+            nome='Sala Teste',
+            capacidade=10,
+            preco_hora=Decimal('100.00')
+        )
+        self.outra_sala = Sala.objects.create(
+            nome='Outra Sala',
+            capacidade=5,
+            preco_hora=Decimal('80.00')
+        )
+        self.horario_inicio = timezone.now() + timedelta(days=1)
+        self.horario_fim = self.horario_inicio + timedelta(hours=2)
+        self.agendamento = Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.horario_inicio,
+            horario_fim=self.horario_fim
+        )
+        self.disponibilidade_url = reverse('agendamento-disponibilidade')
+        self.client.force_authenticate(user=self.cliente)
+
+    def consultar(self, inicio, fim, sala=None):
+        return self.client.get(self.disponibilidade_url, {
+            'sala_id': (sala or self.sala).id,
+            'data_inicio': inicio.isoformat(),
+            'data_fim': fim.isoformat()
+        })
+
+    def test_consulta_repetida_usa_indice(self):
+        """Testa que, com o índice carregado, horários livres não consultam o banco."""
+        self.consultar(self.horario_fim, self.horario_fim + timedelta(hours=1))
+
+        with self.assertNumQueries(0):
+            response = self.consultar(
+                self.horario_fim + timedelta(hours=3),
+                self.horario_fim + timedelta(hours=4)
+            )
+
+        self.assertTrue(response.data['disponivel'])
+
+    def test_carrega_varias_salas_em_uma_consulta(self):
+        """Testa que salas ausentes do cache são carregadas juntas."""
+        # Uma consulta para os agendamentos e outra para as séries de todas as salas
+        with self.assertNumQueries(2):
+            indices = indice_disponibilidade.obter_varios([self.sala.id, self.outra_sala.id])
+
+        self.assertEqual(indices[self.sala.id].ids, [self.agendamento.id])
+        self.assertEqual(len(indices[self.outra_sala.id]), 0)
+
+    def test_invalidacao_ao_criar_agendamento(self):
+        """Testa que um novo agendamento invalida o índice da sala."""
+        inicio = self.horario_fim + timedelta(hours=1)
+        fim = inicio + timedelta(hours=1)
+        self.assertTrue(self.consultar(inicio, fim).data['disponivel'])
+
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=inicio,
+            horario_fim=fim
+        )
+
+        response = self.consultar(inicio, fim)
+        self.assertFalse(response.data['disponivel'])
+        self.assertEqual(len(response.data['agendamentos_conflitantes']), 1)
+
+    def test_invalidacao_ao_cancelar_e_excluir(self):
+        """Testa que cancelamento e exclusão liberam o horário no índice."""
+        self.assertFalse(self.consultar(self.horario_inicio, self.horario_fim).data['disponivel'])
+
+        self.agendamento.status = 'CANCELADO'
+        self.agendamento.save()
+        self.assertTrue(self.consultar(self.horario_inicio, self.horario_fim).data['disponivel'])
+
+        self.agendamento.status = 'PENDENTE'
+        self.agendamento.save()
+        self.assertFalse(self.consultar(self.horario_inicio, self.horario_fim).data['disponivel'])
+
+        self.agendamento.delete()
+        self.assertTrue(self.consultar(self.horario_inicio, self.horario_fim).data['disponivel'])
+
+    def test_invalidacao_ao_trocar_de_sala(self):
+        """Testa que mover o agendamento invalida a sala de origem e a de destino."""
+        self.assertFalse(self.consultar(self.horario_inicio, self.horario_fim).data['disponivel'])
+        self.assertTrue(
+            self.consultar(self.horario_inicio, self.horario_fim, sala=self.outra_sala).data['disponivel']
+        )
+
+        self.agendamento.sala = self.outra_sala
+        self.agendamento.save()
+
+        self.assertTrue(self.consultar(self.horario_inicio, self.horario_fim).data['disponivel'])
+        self.assertFalse(
+            self.consultar(self.horario_inicio, self.horario_fim, sala=self.outra_sala).data['disponivel']
+        )
+
+    def test_data_sem_fuso_horario(self):
+        """Testa que datas sem fuso são interpretadas no fuso padrão."""
+        inicio = timezone.make_naive(self.horario_inicio)
+        fim = timezone.make_naive(self.horario_fim)
+
+        response = self.consultar(inicio, fim)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['disponivel'])
+
+
+class DisponibilidadeLoteTest(APITestCase):
+    """Testes para o endpoint de disponibilidade em lote."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        self.sala = Sala.objects.create(nome='Sala A', capacidade=10, preco_hora=Decimal('100.00'))
+        self.outra_sala = Sala.objects.create(nome='Sala B', capacidade=5, preco_hora=Decimal('80.00'))
+        self.base = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+        # Sala A ocupada na segunda hora; Sala B ocupada na terceira e quarta horas
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.base + timedelta(hours=1),
+            horario_fim=self.base + timedelta(hours=2)
+        )
+        Agendamento.objects.create(
+            sala=self.outra_sala,
+            cliente=self.cliente,
+            horario_inicio=self.base + timedelta(hours=2),
+            horario_fim=self.base + timedelta(hours=4)
+        )
+        # Agendamentos cancelados não ocupam a sala
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.base,
+            horario_fim=self.base + timedelta(hours=1),
+            status='CANCELADO'
+        )
+
+        self.url = reverse('agendamento-disponibilidade-lote')
+        self.client.force_authenticate(user=self.cliente)
+
+    def test_periodo_dividido_em_slots(self):
+        """Testa a geração de slots a partir de um período."""
+        response = self.client.post(self.url, {
+            'salas': [self.sala.id, self.outra_sala.id],
+            'data_inicio': self.base.isoformat(),
+            'data_fim': (self.base + timedelta(hours=4)).isoformat(),
+            'duracao_slot': 60
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['janelas']), 4)
+        self.assertEqual(response.data['salas'], {
+            str(self.sala.id): '1011',
+            str(self.outra_sala.id): '1100',
+        })
+
+    def test_janelas_explicitas(self):
+        """Testa janelas informadas explicitamente, inclusive sobrepostas."""
+        response = self.client.post(self.url, {
+            'salas': [self.sala.id],
+            'janelas': [
+                {'inicio': self.base.isoformat(), 'fim': (self.base + timedelta(minutes=90)).isoformat()},
+                {'inicio': (self.base + timedelta(hours=2)).isoformat(),
+                 'fim': (self.base + timedelta(hours=3)).isoformat()},
+            ]
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['salas'], {str(self.sala.id): '01'})
+
+    def test_consultas_agrupadas(self):
+        """Testa que todas as salas são resolvidas com uma consulta de agendamentos e uma de séries."""
+        dados = {
+            'salas': [self.sala.id, self.outra_sala.id],
+            'data_inicio': self.base.isoformat(),
+            'data_fim': (self.base + timedelta(days=7)).isoformat(),
+            'duracao_slot': 30
+        }
+
+        # Uma consulta valida as salas, outra carrega os agendamentos e outra as séries
+        with self.assertNumQueries(3):
+            response = self.client.post(self.url, dados, format='json')
+        self.assertEqual(len(response.data['salas'][str(self.sala.id)]), 7 * 48)
+
+        with self.assertNumQueries(1):
+            self.client.post(self.url, dados, format='json')
+
+    def test_parametros_invalidos(self):
+        """Testa validação de parâmetros obrigatórios, salas inexistentes e limite de tamanho."""
+        response = self.client.post(self.url, {'salas': [self.sala.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, {
+            'salas': [self.sala.id, 99999],
+            'janelas': [{'inicio': self.base.isoformat(), 'fim': (self.base + timedelta(hours=1)).isoformat()}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('99999', str(response.data))
+
+        response = self.client.post(self.url, {
+            'salas': [self.sala.id],
+            'data_inicio': self.base.isoformat(),
+            'data_fim': (self.base + timedelta(days=365)).isoformat(),
+            'duracao_slot': 5
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('limite', str(response.data))
+
+
+class ProximosHorariosTest(APITestCase):
+    """Testes para a busca dos próximos horários livres."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        self.sala_grande = Sala.objects.create(nome='Sala Grande', capacidade=20, preco_hora=Decimal('200.00'))
+        self.sala_pequena = Sala.objects.create(nome='Sala Pequena', capacidade=4, preco_hora=Decimal('50.00'))
+        Sala.objects.create(nome='Sala Inativa', capacidade=30, preco_hora=Decimal('10.00'), is_disponivel=False)
+        self.base = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+
+        Agendamento.objects.create(
+            sala=self.sala_grande,
+            cliente=self.cliente,
+            horario_inicio=self.base,
+            horario_fim=self.base + timedelta(hours=3)
+        )
+
+        self.url = reverse('agendamento-proximos-horarios')
+        self.client.force_authenticate(user=self.cliente)
+
+    def buscar(self, **params):
+        params.setdefault('data_inicio', self.base.isoformat())
+        return self.client.get(self.url, params)
+
+    def test_busca_em_todas_as_salas(self):
+        """Testa que os primeiros slots livres de todas as salas ativas são intercalados."""
+        response = self.buscar(duracao=60, quantidade=3)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(item['sala'], item['horario_inicio']) for item in response.data],
+            [
+                (self.sala_pequena.id, self.base.isoformat().replace('+00:00', 'Z')),
+                (self.sala_pequena.id, (self.base + timedelta(hours=1)).isoformat().replace('+00:00', 'Z')),
+                (self.sala_pequena.id, (self.base + timedelta(hours=2)).isoformat().replace('+00:00', 'Z')),
+            ]
+        )
+        self.assertEqual(response.data[0]['valor_total'], '50.00')
+
+    def test_filtros_de_sala(self):
+        """Testa os filtros de capacidade mínima e preço máximo."""
+        response = self.buscar(duracao=90, quantidade=1, capacidade_min=10)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['sala'], self.sala_grande.id)
+        self.assertEqual(response.data[0]['sala_nome'], 'Sala Grande')
+        self.assertEqual(
+            response.data[0]['horario_inicio'],
+            (self.base + timedelta(hours=3)).isoformat().replace('+00:00', 'Z')
+        )
+        self.assertEqual(response.data[0]['valor_total'], '300.00')
+
+        response = self.buscar(duracao=60, capacidade_min=10, preco_max=100)
+        self.assertEqual(response.data, [])
+
+    def test_parametros_invalidos(self):
+        """Testa validação da duração e do período de busca."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('duracao', response.data)
+
+        response = self.buscar(duracao=60, data_fim=(self.base + timedelta(days=365)).isoformat())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.buscar(duracao=60, capacidade_min='muitos')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_inicio_no_passado(self):
+        """Testa que uma data de início no passado é trocada pelo próximo múltiplo de 15 minutos."""
+        response = self.buscar(duracao=60, quantidade=1, data_inicio=(self.base - timedelta(days=2)).isoformat())
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        inicio = timezone.datetime.fromisoformat(response.data[0]['horario_inicio'].replace('Z', '+00:00'))
+        self.assertGreaterEqual(inicio, timezone.now())
+        self.assertEqual((inicio.minute % 15, inicio.second, inicio.microsecond), (0, 0, 0))
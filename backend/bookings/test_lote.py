@@ -0,0 +1,182 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from studios.models import Sala
+from users.models import User
+from . import recorrencia
+from .availability import indice_disponibilidade
+from .models import Agendamento
+
+
+class ExpandirRecorrenciaTest(TestCase):
+    """Testes para a expansão das regras de recorrência."""
+
+    def setUp(self):
+        """Quarta-feira, 10h às 11h."""
+        self.inicio = timezone.make_aware(datetime(2030, 1, 2, 10, 0))
+        self.fim = self.inicio + timedelta(hours=1)
+
+    def test_diaria_com_intervalo(self):
+        """Testa a recorrência a cada dois dias."""
+        horarios = recorrencia.expandir(self.inicio, self.fim, recorrencia.DIARIA, intervalo=2, ocorrencias=3)
+        self.assertEqual([inicio.day for inicio, _ in horarios], [2, 4, 6])
+        self.assertTrue(all(fim - inicio == timedelta(hours=1) for inicio, fim in horarios))
+
+    def test_semanal_em_varios_dias(self):
+        """Testa que dias da semana anteriores à primeira ocorrência começam na semana seguinte."""
+        horarios = recorrencia.expandir(
+            self.inicio, self.fim, recorrencia.SEMANAL, dias_semana=[0, 2, 4], ate=date(2030, 1, 14)
+        )
+        self.assertEqual([inicio.day for inicio, _ in horarios], [2, 4, 7, 9, 11, 14])
+        self.assertTrue(all(inicio.hour == 10 for inicio, _ in horarios))
+
+    def test_limite(self):
+        """Testa que regras com ocorrências demais são recusadas."""
+        with self.assertRaises(recorrencia.RecorrenciaExcedida):
+            recorrencia.expandir(self.inicio, self.fim, recorrencia.DIARIA, ate=date(2031, 1, 1), limite=50)
+
+
+class AgendamentoLoteTest(APITestCase):
+    """Testes para a criação de agendamentos em lote."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        self.sala = Sala.objects.create(nome='Sala 1', capacidade=10, preco_hora=Decimal('100.00'))
+        self.outra_sala = Sala.objects.create(nome='Sala 2', capacidade=5, preco_hora=Decimal('80.00'))
+        self.inicio = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        self.existente = Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.inicio + timedelta(hours=10),
+            horario_fim=self.inicio + timedelta(hours=12)
+        )
+        self.client.force_authenticate(user=self.cliente)
+        self.url = reverse('agendamento-lote')
+
+    def item(self, sala, horas, duracao=2):
+        inicio = self.inicio + timedelta(hours=horas)
+        return {
+            'sala': sala.pk,
+            'horario_inicio': inicio.isoformat(),
+            'horario_fim': (inicio + timedelta(hours=duracao)).isoformat(),
+        }
+
+    def test_criar_lista(self):
+        """Testa a criação de uma lista, com os valores calculados por sala."""
+        response = self.client.post(self.url, {
+            'agendamentos': [self.item(self.sala, 0), self.item(self.outra_sala, 0), self.item(self.sala, 2, 1)]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['criados'], 3)
+        resultados = response.data['resultados']
+        self.assertEqual([resultado['status'] for resultado in resultados], ['criado'] * 3)
+        self.assertEqual(
+            [resultado['agendamento']['valor_total'] for resultado in resultados], ['200.00', '160.00', '100.00']
+        )
+        criado = Agendamento.objects.get(pk=resultados[0]['agendamento']['id'])
+        self.assertEqual(criado.cliente, self.cliente)
+        self.assertEqual(criado.status, Agendamento.StatusAgendamento.PENDENTE)
+
+    def test_consultas_nao_dependem_do_tamanho_do_lote(self):
+        """Testa que o número de consultas é o mesmo para 5 e para 50 agendamentos."""
+        def consultas(horas):
+            itens = [self.item(self.outra_sala, hora, 1) for hora in horas]
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.post(self.url, {'agendamentos': itens}, format='json')
+            self.assertEqual(response.data['criados'], len(itens))
+            return len(contexto.captured_queries)
+
+        self.assertEqual(consultas(range(0, 5)), consultas(range(100, 150)))
+
+    def test_conflitos_recusam_o_lote(self):
+        """Testa os conflitos com o banco e dentro do lote, sem criar nada."""
+        response = self.client.post(self.url, {
+            'agendamentos': [
+                self.item(self.sala, 0),
+                self.item(self.sala, 11),
+                self.item(self.sala, 1),
+                self.item(self.outra_sala, 0),
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['criados'], 0)
+        resultados = response.data['resultados']
+        self.assertEqual(
+            [resultado['status'] for resultado in resultados], ['valido', 'conflito', 'conflito', 'valido']
+        )
+        self.assertEqual(resultados[1]['agendamentos_conflitantes'], [self.existente.pk])
+        self.assertEqual(resultados[2]['conflitos_no_lote'], [0])
+        self.assertEqual(Agendamento.objects.count(), 1)
+
+    def test_parcial(self):
+        """Testa que, com parcial, os horários aceitos são criados."""
+        passado = timezone.now() - timedelta(days=1)
+        response = self.client.post(self.url, {
+            'parcial': True,
+            'agendamentos': [
+                self.item(self.sala, 11),
+                self.item(self.sala, 0),
+                {'sala': 999, 'horario_inicio': self.item(self.sala, 0)['horario_inicio'],
+                 'horario_fim': self.item(self.sala, 0)['horario_fim']},
+                {'sala': self.sala.pk, 'horario_inicio': passado.isoformat(),
+                 'horario_fim': (passado + timedelta(hours=1)).isoformat()},
+            ]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['criados'], 1)
+        self.assertEqual(
+            [resultado['status'] for resultado in response.data['resultados']],
+            ['conflito', 'criado', 'invalido', 'invalido']
+        )
+        self.assertEqual(Agendamento.objects.count(), 2)
+
+    def test_recorrencia_semanal(self):
+        """Testa a criação das ocorrências de uma recorrência semanal."""
+        primeira = self.item(self.outra_sala, 0)
+        response = self.client.post(self.url, {
+            'recorrencia': dict(primeira, frequencia='SEMANAL', ocorrencias=12)
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['criados'], 12)
+        inicios = list(
+            Agendamento.objects.filter(sala=self.outra_sala).order_by('horario_inicio')
+            .values_list('horario_inicio', flat=True)
+        )
+        self.assertEqual(inicios, [self.inicio + timedelta(weeks=semana) for semana in range(12)])
+
+    def test_validacao(self):
+        """Testa lotes vazios, ambíguos ou grandes demais."""
+        primeira = self.item(self.sala, 0)
+        for dados in (
+            {},
+            {'agendamentos': []},
+            {'agendamentos': [primeira], 'recorrencia': dict(primeira, frequencia='DIARIA', ocorrencias=2)},
+            {'recorrencia': dict(primeira, frequencia='DIARIA')},
+            {'recorrencia': dict(primeira, frequencia='DIARIA', ocorrencias=500)},
+            {'agendamentos': [dict(primeira, horario_fim=primeira['horario_inicio'])]},
+        ):
+            with self.subTest(dados=dados):
+                response = self.client.post(self.url, dados, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Agendamento.objects.count(), 1)
+
+    def test_indice_de_disponibilidade_atualizado(self):
+        """Testa que os agendamentos criados em lote aparecem na disponibilidade."""
+        inicio = self.inicio + timedelta(hours=3)
+        self.assertFalse(indice_disponibilidade.obter(self.sala.pk).tem_conflito(inicio, inicio + timedelta(hours=1)))
+
+        self.client.post(self.url, {'agendamentos': [self.item(self.sala, 3)]}, format='json')
+        self.assertTrue(indice_disponibilidade.obter(self.sala.pk).tem_conflito(inicio, inicio + timedelta(hours=1)))
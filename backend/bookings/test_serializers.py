@@ -1,3 +1,5 @@
+from unittest import mock, skipUnless
+from django.db import connection, transaction, IntegrityError
 from django.test import TestCase
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -190,6 +192,90 @@ class AgendamentoSerializerTest(TestCase):
         # O valor_total deve ser calculado automaticamente, não o fornecido
         self.assertEqual(agendamento.valor_total, Decimal('200.00'))  # 2 horas * 100/hora
 
+    
+    def test_conflito_concorrente_na_gravacao(self):
+        """Testa que um conflito criado entre a validação e a gravação é rejeitado."""
+        data = {
+            'sala': self.sala.id,
+            'cliente': self.cliente.id,
+            'horario_inicio': self.horario_inicio.isoformat(),
+            'horario_fim': self.horario_fim.isoformat(),
+            'status': 'PENDENTE'
+        }
+        serializer = AgendamentoSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        
+        # Simula outra requisição reservando o mesmo horário após a validação
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.horario_inicio + timedelta(minutes=30),
+            horario_fim=self.horario_fim,
+            status='CONFIRMADO'
+        )
+        
+        with self.assertRaises(ValidationError) as contexto:
+            serializer.save()
+        
+        self.assertIn('Já existe um agendamento para este horário nesta sala.', str(contexto.exception))
+        self.assertEqual(Agendamento.objects.count(), 1)
+    
+    def test_conflito_concorrente_na_atualizacao(self):
+        """Testa que a atualização também é verificada novamente na gravação."""
+        agendamento = Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.horario_fim,
+            horario_fim=self.horario_fim + timedelta(hours=1)
+        )
+        serializer = AgendamentoSerializer(agendamento, data={
+            'sala': self.sala.id,
+            'cliente': self.cliente.id,
+            'horario_inicio': self.horario_inicio.isoformat(),
+            'horario_fim': self.horario_fim.isoformat()
+        })
+        self.assertTrue(serializer.is_valid())
+        
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.horario_inicio,
+            horario_fim=self.horario_inicio + timedelta(minutes=30)
+        )
+        
+        with self.assertRaises(ValidationError):
+            serializer.save()
+        
+        agendamento.refresh_from_db()
+        self.assertEqual(agendamento.horario_inicio, self.horario_fim)
+    
+    @skipUnless(connection.vendor == 'postgresql', 'Restrição de exclusão disponível apenas no PostgreSQL.')
+    def test_restricao_de_exclusao_no_banco(self):
+        """Testa que o banco rejeita agendamentos ativos sobrepostos na mesma sala."""
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.horario_inicio,
+            horario_fim=self.horario_fim
+        )
+        
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Agendamento.objects.create(
+                sala=self.sala,
+                cliente=self.cliente,
+                horario_inicio=self.horario_inicio + timedelta(minutes=30),
+                horario_fim=self.horario_fim + timedelta(minutes=30)
+            )
+        
+        # Agendamentos cancelados não participam da restrição
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.horario_inicio,
+            horario_fim=self.horario_fim,
+            status='CANCELADO'
+        )
+
 
 class AgendamentoStatusUpdateSerializerTest(TestCase):
     """Testes para o AgendamentoStatusUpdateSerializer."""
@@ -291,4 +377,17 @@ class AgendamentoStatusUpdateSerializerTest(TestCase):
         serializer = AgendamentoStatusUpdateSerializer(
             self.agendamento, data=data, partial=True
         )
-        self.assertTrue(serializer.is_valid())
\ No newline at end of file
+        self.assertTrue(serializer.is_valid())
+    
+    def test_conflito_na_restricao(self):
+        """Testa que a violação da restrição de sobreposição vira erro de validação."""
+        serializer = AgendamentoStatusUpdateSerializer(
+            self.agendamento, data={'status': 'CONFIRMADO'}, partial=True
+        )
+        self.assertTrue(serializer.is_valid())
+        
+        erro = IntegrityError(f'violates exclusion constraint "{Agendamento.RESTRICAO_SEM_SOBREPOSICAO}"')
+        with mock.patch.object(Agendamento, 'save', side_effect=erro):
+            with self.assertRaises(ValidationError) as contexto:
+                serializer.save()
+        self.assertIn('Já existe um agendamento para este horário nesta sala.', str(contexto.exception.detail))
@@ -0,0 +1,274 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.test import APITestCase
+
+from studios.models import Sala
+from users.models import User
+from . import recorrencia
+from .availability import indice_disponibilidade
+from .models import Agendamento, ExcecaoSerie, SerieAgendamento
+from .serializers import AgendamentoSerializer, OcorrenciaSerieSerializer
+
+
+class OcorrenciasSerieTest(TestCase):
+    """Testes para a expansão das ocorrências de uma série dentro de um período."""
+
+    def setUp(self):
+        """Série semanal às segundas e quartas, 10h às 11h, a partir de quarta-feira."""
+        self.cliente = User.objects.create_user(email='cliente@test.com', nome='Cliente', user_type='CLIENTE')
+        self.sala = Sala.objects.create(nome='Sala 1', capacidade=10, preco_hora=Decimal('100.00'))
+        self.inicio = timezone.make_aware(datetime(2030, 1, 2, 10, 0))
+        self.serie = SerieAgendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.inicio,
+            horario_fim=self.inicio + timedelta(hours=1),
+            frequencia=recorrencia.SEMANAL,
+            dias_semana=[0, 2],
+        )
+
+    def test_apenas_o_periodo_consultado(self):
+        """Testa que uma série sem fim é expandida só no período, mesmo anos depois do início."""
+        inicio = timezone.make_aware(datetime(2035, 3, 1))
+        ocorrencias = self.serie.ocorrencias_entre(inicio, inicio + timedelta(days=7))
+        self.assertEqual([horario.weekday() for horario, _ in ocorrencias], [0, 2])
+        self.assertTrue(all(inicio <= horario < inicio + timedelta(days=7) for horario, _ in ocorrencias))
+        self.assertTrue(all(horario.hour == 10 for horario, _ in ocorrencias))
+
+    def test_ocorrencia_em_andamento(self):
+        """Testa que a ocorrência que começa antes do período e termina dentro dele é incluída."""
+        meio = self.inicio + timedelta(minutes=30)
+        self.assertEqual(self.serie.ocorrencias_entre(meio, meio + timedelta(minutes=1)), [
+            (self.inicio, self.inicio + timedelta(hours=1))
+        ])
+
+    def test_igual_a_expansao_completa(self):
+        """Testa que pular as ocorrências anteriores não altera a contagem das séries limitadas."""
+        self.serie.ocorrencias = 20
+        todas = recorrencia.expandir(
+            self.inicio, self.inicio + timedelta(hours=1), recorrencia.SEMANAL, dias_semana=[0, 2], ocorrencias=20
+        )
+        ocorrencias = self.serie.ocorrencias_entre(todas[12][0], todas[-1][1] + timedelta(days=30))
+        self.assertEqual(ocorrencias, todas[12:])
+
+    def test_excecoes_e_indice(self):
+        """Testa que o índice de disponibilidade considera as ocorrências, menos as exceções."""
+        segunda = self.inicio + timedelta(days=5)
+        indice = indice_disponibilidade.obter(self.sala.pk)
+        self.assertTrue(indice.tem_conflito(segunda, segunda + timedelta(minutes=30)))
+        self.assertFalse(indice.tem_conflito(segunda + timedelta(hours=1), segunda + timedelta(hours=2)))
+
+        ExcecaoSerie.objects.create(serie=self.serie, ocorrencia=segunda)
+        indice = indice_disponibilidade.obter(self.sala.pk)
+        self.assertFalse(indice.tem_conflito(segunda, segunda + timedelta(minutes=30)))
+        self.assertEqual(
+            indice.intervalos(self.inicio, segunda + timedelta(days=3)),
+            [(self.inicio, self.inicio + timedelta(hours=1)),
+             (segunda + timedelta(days=2), segunda + timedelta(days=2, hours=1))]
+        )
+
+
+class SerieAgendamentoViewTest(APITestCase):
+    """Testes para a API de séries de agendamentos."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.cliente = User.objects.create_user(email='cliente@test.com', nome='Cliente', user_type='CLIENTE')
+        self.outro = User.objects.create_user(email='outro@test.com', nome='Outro', user_type='CLIENTE')
+        self.sala = Sala.objects.create(nome='Sala 1', capacidade=10, preco_hora=Decimal('100.00'))
+        self.inicio = (timezone.now() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        self.client.force_authenticate(user=self.cliente)
+        self.url = reverse('serieagendamento-list')
+        response = self.client.post(self.url, {
+            'sala': self.sala.pk,
+            'horario_inicio': self.inicio.isoformat(),
+            'horario_fim': (self.inicio + timedelta(hours=2)).isoformat(),
+            'frequencia': 'SEMANAL',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.serie = SerieAgendamento.objects.get(pk=response.data['id'])
+
+    def semana(self, numero, horas=0):
+        return self.inicio + timedelta(weeks=numero, hours=horas)
+
+    def iso(self, horario):
+        return serializers.DateTimeField().to_representation(horario)
+
+    def disponibilidade(self, inicio, fim):
+        return self.client.get(reverse('agendamento-disponibilidade'), {
+            'sala_id': self.sala.pk, 'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat()
+        })
+
+    def test_criacao(self):
+        """Testa os valores preenchidos na criação da série."""
+        self.assertEqual(self.serie.cliente, self.cliente)
+        self.assertEqual(self.serie.dias_semana, [timezone.localtime(self.inicio).weekday()])
+        response = self.client.get(reverse('serieagendamento-detail', args=[self.serie.pk]))
+        self.assertEqual(response.data['valor_ocorrencia'], '200.00')
+
+        self.client.force_authenticate(user=self.outro)
+        response = self.client.get(reverse('serieagendamento-detail', args=[self.serie.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_disponibilidade(self):
+        """Testa que uma ocorrência distante aparece na disponibilidade sem ter sido gravada."""
+        response = self.disponibilidade(self.semana(40, 1), self.semana(40, 3))
+        self.assertFalse(response.data['disponivel'])
+        self.assertEqual(response.data['agendamentos_conflitantes'], [])
+        self.assertEqual(response.data['series_conflitantes'], [
+            {'serie': self.serie.pk, 'horario_inicio': self.semana(40), 'horario_fim': self.semana(40, 2)}
+        ])
+        self.assertTrue(self.disponibilidade(self.semana(40, 2), self.semana(40, 3)).data['disponivel'])
+        self.assertEqual(Agendamento.objects.count(), 0)
+
+    def test_agendamento_em_conflito_com_a_serie(self):
+        """Testa que um agendamento comum não pode ocupar uma ocorrência da série."""
+        dados = {
+            'sala': self.sala.pk,
+            'cliente': self.outro.pk,
+            'horario_inicio': self.semana(3, 1).isoformat(),
+            'horario_fim': self.semana(3, 4).isoformat(),
+        }
+        self.client.force_authenticate(user=self.outro)
+        response = self.client.post(reverse('agendamento-list'), dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('agendamento-lote'), {'agendamentos': [
+            {key: dados[key] for key in ('sala', 'horario_inicio', 'horario_fim')}
+        ]}, format='json')
+        self.assertEqual(response.data['resultados'][0]['series_conflitantes'], [self.serie.pk])
+
+    def test_serie_criada_durante_o_agendamento(self):
+        """Testa que as séries são verificadas de novo ao gravar, após a validação."""
+        serializer = AgendamentoSerializer(data={
+            'sala': self.sala.pk,
+            'cliente': self.outro.pk,
+            'horario_inicio': self.semana(0, 5).isoformat(),
+            'horario_fim': self.semana(0, 6).isoformat(),
+        })
+        self.assertTrue(serializer.is_valid())
+        SerieAgendamento.objects.create(
+            sala=self.sala, cliente=self.cliente, horario_inicio=self.semana(0, 5),
+            horario_fim=self.semana(0, 7), frequencia=recorrencia.DIARIA
+        )
+        with self.assertRaises(serializers.ValidationError):
+            serializer.save()
+        self.assertEqual(Agendamento.objects.count(), 0)
+
+    def test_serie_em_conflito(self):
+        """Testa que uma série não pode ocupar ocorrências de outra série ou agendamentos existentes."""
+        Agendamento.objects.create(
+            sala=self.sala, cliente=self.outro, horario_inicio=self.semana(0, 5), horario_fim=self.semana(0, 6)
+        )
+        dados = {
+            'sala': self.sala.pk,
+            'horario_inicio': self.semana(0, 5).isoformat(),
+            'horario_fim': self.semana(0, 6).isoformat(),
+            'frequencia': 'DIARIA',
+            'ocorrencias': 3,
+        }
+        response = self.client.post(self.url, dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['ocorrencias_conflitantes'], [self.iso(self.semana(0, 5))])
+
+        dados.update(horario_inicio=self.semana(0, 25).isoformat(), horario_fim=self.semana(0, 27).isoformat())
+        response = self.client.post(self.url, dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Diária sem fim: alcança a ocorrência semanal seguinte
+        dados.update(horario_inicio=self.semana(0, 4 * 24 + 1).isoformat(), horario_fim=self.semana(0, 4 * 24 + 2).isoformat())
+        del dados['ocorrencias']
+        response = self.client.post(self.url, dados, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['ocorrencias_conflitantes'][0], self.iso(self.semana(1, 1)))
+
+    def test_validacao(self):
+        """Testa regras inválidas."""
+        base = {
+            'sala': self.sala.pk,
+            'horario_inicio': self.semana(1, 5).isoformat(),
+            'horario_fim': self.semana(1, 6).isoformat(),
+            'frequencia': 'DIARIA',
+        }
+        for dados in (
+            dict(base, horario_fim=base['horario_inicio']),
+            dict(base, horario_fim=self.semana(1, 40).isoformat()),
+            dict(base, dias_semana=[1]),
+            dict(base, frequencia='SEMANAL', dias_semana=[9]),
+            dict(base, ate=str(timezone.localdate(self.inicio))),
+            dict(base, intervalo=0),
+        ):
+            with self.subTest(dados=dados):
+                response = self.client.post(self.url, dados, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(SerieAgendamento.objects.count(), 1)
+
+    def test_cancelar_ocorrencia(self):
+        """Testa o cancelamento de uma única ocorrência."""
+        url = reverse('serieagendamento-cancelar-ocorrencia', args=[self.serie.pk])
+        self.assertFalse(self.disponibilidade(self.semana(2), self.semana(2, 1)).data['disponivel'])
+
+        response = self.client.post(url, {'ocorrencia': self.semana(2).isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(self.disponibilidade(self.semana(2), self.semana(2, 1)).data['disponivel'])
+
+        for ocorrencia in (self.semana(2), self.semana(2, 1), self.semana(-1)):
+            with self.subTest(ocorrencia=ocorrencia):
+                response = self.client.post(url, {'ocorrencia': ocorrencia.isoformat()}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ExcecaoSerie.objects.count(), 1)
+
+    def test_cancelamentos_simultaneos(self):
+        """Testa que a segunda de duas requisições que passaram pela validação recebe 400."""
+        url = reverse('serieagendamento-cancelar-ocorrencia', args=[self.serie.pk])
+        self.client.post(url, {'ocorrencia': self.semana(2).isoformat()}, format='json')
+        # A validação não enxerga a exceção gravada pela outra requisição
+        with mock.patch.object(OcorrenciaSerieSerializer, 'validate_ocorrencia', lambda self, valor: valor):
+            response = self.client.post(url, {'ocorrencia': self.semana(2).isoformat()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ExcecaoSerie.objects.count(), 1)
+
+    def test_mover_ocorrencia(self):
+        """Testa que a ocorrência movida vira um agendamento, que pode ocupar o horário original."""
+        url = reverse('serieagendamento-mover-ocorrencia', args=[self.serie.pk])
+        response = self.client.post(url, {
+            'ocorrencia': self.semana(1).isoformat(),
+            'horario_inicio': self.semana(1, 1).isoformat(),
+            'horario_fim': self.semana(1, 3).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        agendamento = Agendamento.objects.get(pk=response.data['id'])
+        self.assertEqual(agendamento.cliente, self.cliente)
+        self.assertEqual(agendamento.valor_total, Decimal('200.00'))
+
+        response = self.disponibilidade(self.semana(1), self.semana(1, 1))
+        self.assertTrue(response.data['disponivel'])
+
+        # Não pode ser movida para cima de outra ocorrência
+        response = self.client.post(url, {
+            'ocorrencia': self.semana(2).isoformat(),
+            'horario_inicio': self.semana(3).isoformat(),
+            'horario_fim': self.semana(3, 1).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ExcecaoSerie.objects.filter(ocorrencia=self.semana(2)).exists())
+
+        response = self.client.get(reverse('serieagendamento-ocorrencias', args=[self.serie.pk]), {
+            'data_inicio': self.semana(0).isoformat(), 'data_fim': self.semana(3).isoformat()
+        })
+        self.assertEqual([ocorrencia['status'] for ocorrencia in response.data], ['agendada', 'movida', 'agendada'])
+        self.assertEqual(response.data[1]['agendamento'], agendamento.pk)
+
+    def test_excluir_cancela_a_serie(self):
+        """Testa que excluir a série a cancela e libera os horários."""
+        response = self.client.delete(reverse('serieagendamento-detail', args=[self.serie.pk]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.serie.refresh_from_db()
+        self.assertEqual(self.serie.status, SerieAgendamento.StatusSerie.CANCELADA)
+        self.assertTrue(self.disponibilidade(self.semana(2), self.semana(2, 1)).data['disponivel'])
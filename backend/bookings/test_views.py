@@ -287,6 +287,21 @@ class AgendamentoViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Formato de data inválido', str(response.data))
     
+    def test_disponibilidade_sala_invalida(self):
+        """Testa endpoint de disponibilidade com um sala_id que não é numérico."""
+        self.client.force_authenticate(user=self.cliente)
+        
+        params = {
+            'sala_id': 'sala',
+            'data_inicio': self.horario_inicio.isoformat(),
+            'data_fim': self.horario_fim.isoformat()
+        }
+        
+        response = self.client.get(self.disponibilidade_url, params)
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sala_id deve ser um número inteiro', str(response.data))
+    
     def test_filtros_agendamentos(self):
         """Testa filtros nos agendamentos."""
         self.client.force_authenticate(user=self.admin)
@@ -372,4 +387,56 @@ class AgendamentoViewSetTest(APITestCase):
         
         response = self.client.get(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['id'], self.agendamento.id)
\ No newline at end of file
+        self.assertEqual(response.data['id'], self.agendamento.id)
+    
+    def _exportar(self, **parametros):
+        response = self.client.get(reverse('agendamento-exportar'), parametros)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+    
+    def test_exportar_ndjson(self):
+        """Testa a exportação em NDJSON, uma linha JSON por agendamento."""
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.outro_cliente,
+            horario_inicio=self.horario_fim,
+            horario_fim=self.horario_fim + timedelta(hours=1)
+        )
+        self.client.force_authenticate(user=self.admin)
+        
+        response, conteudo = self._exportar()
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        linhas = [json.loads(linha) for linha in conteudo.splitlines()]
+        self.assertEqual(len(linhas), 2)
+        exportado = next(linha for linha in linhas if linha['id'] == self.agendamento.id)
+        self.assertEqual(exportado['sala_nome'], 'Sala Teste')
+        self.assertEqual(exportado['cliente_email'], 'cliente@test.com')
+        self.assertEqual(exportado['valor_total'], '200.00')
+    
+    def test_exportar_csv_com_filtros_e_escopo(self):
+        """Testa a exportação em CSV respeitando filtros e o escopo do cliente."""
+        Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.outro_cliente,
+            horario_inicio=self.horario_fim,
+            horario_fim=self.horario_fim + timedelta(hours=1)
+        )
+        self.client.force_authenticate(user=self.cliente)
+        
+        response, conteudo = self._exportar(formato='csv', status='PENDENTE')
+        self.assertIn('agendamentos.csv', response['Content-Disposition'])
+        linhas = conteudo.splitlines()
+        self.assertTrue(linhas[0].startswith('id,sala,sala_nome,cliente,cliente_email'))
+        self.assertEqual(len(linhas), 2)
+        self.assertTrue(linhas[1].startswith(f'{self.agendamento.id},{self.sala.id},Sala Teste,'))
+        
+        _, conteudo = self._exportar(formato='csv', status='CANCELADO')
+        self.assertEqual(len(conteudo.splitlines()), 1)
+    
+    def test_exportar_formato_invalido(self):
+        """Testa que formatos não suportados retornam 400."""
+        self.client.force_authenticate(user=self.admin)
+        
+        response = self.client.get(reverse('agendamento-exportar'), {'formato': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
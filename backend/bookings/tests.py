@@ -1,6 +1,10 @@
+from io import StringIO
+from unittest import mock
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
@@ -8,6 +12,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from decimal import Decimal
 from datetime import datetime, timedelta
 from django.utils import timezone
+from .management.commands.explain_queries import Command as ExplainQueriesCommand
 from .models import Agendamento as Booking
 from studios.models import Sala as Studio
 
@@ -345,4 +350,38 @@ class BookingAPITest(APITestCase):
         
         # Verifica se o agendamento foi removido do banco
         booking_exists = Booking.objects.filter(id=booking_id).exists()
-        self.assertFalse(booking_exists)
\ No newline at end of file
+        self.assertFalse(booking_exists)
+
+
+class ExplainQueriesCommandTest(TestCase):
+    """Testes para o comando que analisa os planos das consultas."""
+
+    def test_consultas_de_conflito_usam_indices(self):
+        """Testa que as consultas de disponibilidade não fazem varredura completa."""
+        saida = StringIO()
+        call_command('explain_queries', stdout=saida)
+
+        linhas = saida.getvalue().splitlines()
+        self.assertIn('OK        AgendamentoSerializer.validate (conflitos)', linhas)
+        self.assertIn('OK        IndiceDisponibilidade._carregar', linhas)
+        self.assertIn('OK        AgendamentoViewSet.list (cliente)', linhas)
+        self.assertIn('OK        AgendamentoViewSet.list ?sala=1', linhas)
+
+    def test_falha_com_varredura_completa(self):
+        """Testa que --fail-on-seq-scan encerra com erro quando há varreduras."""
+        # A descrição da sala não tem índice, então a consulta sempre faz varredura completa
+        consultas = [('Sala por descrição', Studio.objects.filter(descricao='Sala de ensaio'))]
+        with mock.patch.object(ExplainQueriesCommand, '_consultas', return_value=consultas):
+            saida = StringIO()
+            with self.assertRaises(CommandError):
+                call_command('explain_queries', '--fail-on-seq-scan', stdout=saida)
+            self.assertIn('SEQ SCAN  Sala por descrição: studios_sala', saida.getvalue())
+
+            call_command('explain_queries', '--fail-on-seq-scan', '--ignore-table', 'studios_sala', stdout=StringIO())
+
+    def test_tabelas_ignoradas(self):
+        """Testa que tabelas ignoradas não são relatadas."""
+        saida = StringIO()
+        call_command('explain_queries', '--ignore-table', 'studios_sala', stdout=saida)
+
+        self.assertNotIn('studios_sala', saida.getvalue())
@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AgendamentoViewSet
+from .views import AgendamentoViewSet, SerieAgendamentoViewSet
 
 router = DefaultRouter()
+router.register('series', SerieAgendamentoViewSet)
 router.register('', AgendamentoViewSet)
 
 urlpatterns = [
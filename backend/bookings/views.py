@@ -1,24 +1,74 @@
 from rest_framework import viewsets, permissions, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Q
 
-from .models import Agendamento
-from .serializers import AgendamentoSerializer, AgendamentoStatusUpdateSerializer
+import csv
+from decimal import Decimal
 
+from .analise import relatorio
+from .availability import indice_disponibilidade, proximos_horarios_livres
+from .lote import criar_em_lote
+from .models import Agendamento, ExcecaoSerie, SerieAgendamento
+from .serializers import (
+    AgendamentoSerializer, AgendamentoStatusUpdateSerializer, AgendamentoExportacaoSerializer,
+    AgendamentoLoteSerializer, DisponibilidadeLoteSerializer, JanelaSerializer,
+    ProximosHorariosSerializer, HorarioLivreSerializer, AnaliseSerializer, SerieAgendamentoSerializer,
+    OcorrenciasSerieSerializer, OcorrenciaSerieSerializer, MoverOcorrenciaSerializer,
+    MENSAGEM_OCORRENCIA_ALTERADA
+)
+from studios.filters import SalaFilter
+from studios.models import Sala
+from studioflow.listagem_rapida import ListagemRapidaMixin, obter_plano
+from studioflow.mixins import GetCondicionalMixin
 
-class AgendamentoViewSet(viewsets.ModelViewSet):
+
+def _converter_data(valor):
+    """Converte uma data ISO para datetime, assumindo o fuso padrão se não houver um."""
+    data = timezone.datetime.fromisoformat(valor)
+    if timezone.is_naive(data):
+        data = timezone.make_aware(data)
+    return data
+
+
+class _Eco:
+    """Buffer que apenas devolve o que recebe, para gerar CSV linha a linha."""
+    
+    def write(self, valor):
+        return valor
+
+
+def _linhas_csv(itens, colunas):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(colunas)
+    for item in itens:
+        yield escritor.writerow([item[coluna] for coluna in colunas])
+
+
+def _linhas_ndjson(itens):
+    codificador = JSONEncoder(ensure_ascii=False)
+    for item in itens:
+        yield codificador.encode(item) + '\n'
+
+
+class AgendamentoViewSet(GetCondicionalMixin, ListagemRapidaMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar agendamentos de salas."""
     
-    queryset = Agendamento.objects.all()
+    queryset = Agendamento.objects.select_related('sala', 'cliente')
     serializer_class = AgendamentoSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'sala', 'cliente']
     search_fields = ['sala__nome', 'cliente__nome', 'cliente__email']
     ordering_fields = ['horario_inicio', 'horario_fim', 'valor_total', 'status']
+    ordenacao_cursor = ['-horario_inicio', '-id']
+    campos_versao = ('data_atualizacao', 'sala__data_atualizacao', 'cliente__data_atualizacao')
     
     def get_queryset(self):
         """Filtra os agendamentos com base no tipo de usuário."""
@@ -36,6 +86,27 @@ class AgendamentoViewSet(viewsets.ModelViewSet):
         """Salva o agendamento com o cliente atual."""
         serializer.save(cliente=self.request.user)
     
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """Cria vários agendamentos do usuário de uma vez, a partir de uma lista ou de uma recorrência.
+        
+        Retorna um resultado por horário, na ordem do lote (ou das ocorrências):
+        criado, conflito, invalido ou, se o lote foi recusado, valido. Responde
+        201 quando algum agendamento foi criado e 400 caso contrário.
+        """
+        serializer = AgendamentoLoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        resultados, criados = criar_em_lote(request.user, **serializer.validated_data)
+        for resultado in resultados:
+            if 'agendamento' in resultado:
+                resultado['agendamento'] = AgendamentoSerializer(resultado['agendamento']).data
+        return Response(
+            {'criados': criados, 'resultados': resultados},
+            status=status.HTTP_201_CREATED if criados else status.HTTP_400_BAD_REQUEST
+        )
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         """Endpoint para atualizar o status de um agendamento."""
@@ -61,25 +132,33 @@ class AgendamentoViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            # Converte as strings para datetime
-            horario_inicio = timezone.datetime.fromisoformat(data_inicio)
-            horario_fim = timezone.datetime.fromisoformat(data_fim)
-            
-            # Verifica se há agendamentos conflitantes
-            agendamentos_conflitantes = Agendamento.objects.filter(
-                sala_id=sala_id,
-                status__in=['PENDENTE', 'CONFIRMADO'],
-                horario_inicio__lt=horario_fim,
-                horario_fim__gt=horario_inicio
+            sala_id = int(sala_id)
+        except ValueError:
+            return Response(
+                {"error": "O parâmetro sala_id deve ser um número inteiro."},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        try:
+            # Converte as datas para os tipos esperados
+            horario_inicio = _converter_data(data_inicio)
+            horario_fim = _converter_data(data_fim)
             
-            disponivel = not agendamentos_conflitantes.exists()
+            # Verifica os conflitos no índice em memória da sala, incluindo as séries
+            indice = indice_disponibilidade.obter(sala_id)
+            conflitos = indice.conflitos(horario_inicio, horario_fim)
+            conflitos_de_series = indice.conflitos_de_series(horario_inicio, horario_fim)
+            disponivel = not conflitos and not conflitos_de_series
             
             return Response({
                 "disponivel": disponivel,
                 "agendamentos_conflitantes": AgendamentoSerializer(
-                    agendamentos_conflitantes, many=True
-                ).data if not disponivel else []
+                    self.queryset.filter(pk__in=conflitos), many=True
+                ).data if conflitos else [],
+                "series_conflitantes": [
+                    {'serie': serie_id, 'horario_inicio': inicio, 'horario_fim': fim}
+                    for inicio, fim, serie_id in conflitos_de_series
+                ]
             })
             
         except (ValueError, TypeError):
@@ -87,3 +166,243 @@ class AgendamentoViewSet(viewsets.ModelViewSet):
                 {"error": "Formato de data inválido. Use o formato ISO (YYYY-MM-DDTHH:MM:SS)."},
                 status=status.HTTP_400_BAD_REQUEST
             )
+    
+    @action(detail=False, methods=['post'], url_path='disponibilidade-lote')
+    def disponibilidade_lote(self, request):
+        """Verifica a disponibilidade de várias salas em várias janelas de uma só vez.
+        
+        Retorna, para cada sala, uma string com um caractere por janela:
+        '1' quando a sala está livre e '0' quando há conflito.
+        """
+        serializer = DisponibilidadeLoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        salas = serializer.validated_data['salas']
+        janelas = serializer.validated_data['janelas']
+        
+        salas_existentes = set(Sala.objects.filter(pk__in=salas).values_list('pk', flat=True))
+        salas_inexistentes = [sala_id for sala_id in salas if sala_id not in salas_existentes]
+        if salas_inexistentes:
+            return Response(
+                {"salas": [f"Salas não encontradas: {salas_inexistentes}."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Salas fora do cache são carregadas juntas em uma única consulta
+        indices = indice_disponibilidade.obter_varios(salas)
+        
+        return Response({
+            "janelas": JanelaSerializer(
+                [{'inicio': inicio, 'fim': fim} for inicio, fim in janelas], many=True
+            ).data,
+            "salas": {
+                str(sala_id): ''.join(
+                    '0' if indices[sala_id].tem_conflito(inicio, fim) else '1'
+                    for inicio, fim in janelas
+                )
+                for sala_id in salas
+            }
+        })
+    
+    @action(detail=False, methods=['get'], url_path='proximos-horarios')
+    def proximos_horarios(self, request):
+        """Busca os próximos horários livres com a duração pedida entre todas as salas.
+        
+        Aceita os filtros de SalaFilter (capacidade_min, preco_max, etc.) para
+        restringir as salas consideradas.
+        """
+        parametros = ProximosHorariosSerializer(data=request.query_params)
+        if not parametros.is_valid():
+            return Response(parametros.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        filtro = SalaFilter(request.query_params, queryset=Sala.objects.filter(is_disponivel=True))
+        if not filtro.is_valid():
+            return Response(filtro.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        dados = parametros.validated_data
+        duracao = dados['duracao']
+        salas = {sala.pk: sala for sala in filtro.qs.only('id', 'nome', 'preco_hora')}
+        
+        slots = proximos_horarios_livres(
+            indice_disponibilidade.obter_varios(list(salas)),
+            dados['data_inicio'],
+            dados['data_fim'],
+            duracao,
+            dados['quantidade']
+        )
+        
+        horas = Decimal(str(duracao.total_seconds() / 3600))
+        return Response(HorarioLivreSerializer([
+            {
+                'sala': sala_id,
+                'sala_nome': salas[sala_id].nome,
+                'horario_inicio': inicio,
+                'horario_fim': fim,
+                'valor_total': salas[sala_id].preco_hora * horas,
+            }
+            for sala_id, inicio, fim in slots
+        ], many=True).data)
+    
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def analise(self, request):
+        """Relatório de ocupação e receita por sala no período (apenas staff).
+        
+        Retorna, por sala, a utilização, as horas ocupadas, a receita total e
+        por dia e o mapa de ocupação (dia da semana x hora do dia, em percentual).
+        Aceita data_inicio e data_fim (padrão: últimos 30 dias) e sala (repetível).
+        """
+        parametros = AnaliseSerializer(data=request.query_params)
+        if not parametros.is_valid():
+            return Response(parametros.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(relatorio(**parametros.validated_data))
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exporta os agendamentos filtrados em NDJSON (padrão) ou CSV, em streaming.
+        
+        Aceita os mesmos filtros, busca e ordenação da listagem. As linhas são lidas
+        do banco em blocos, de modo que a memória usada não depende do total exportado.
+        """
+        formato = request.query_params.get('formato', 'ndjson')
+        if formato not in ('ndjson', 'csv'):
+            return Response(
+                {"error": "O parâmetro formato deve ser 'ndjson' ou 'csv'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        plano = obter_plano(AgendamentoExportacaoSerializer)
+        linhas = self.filter_queryset(self.get_queryset()).values_list(*plano.colunas).iterator(
+            chunk_size=getattr(settings, 'BOOKINGS_EXPORTACAO_CHUNK_SIZE', 2000)
+        )
+        itens = plano.gerar(linhas)
+        
+        if formato == 'csv':
+            conteudo = _linhas_csv(itens, AgendamentoExportacaoSerializer.Meta.fields)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            conteudo = _linhas_ndjson(itens)
+            content_type = 'application/x-ndjson; charset=utf-8'
+        
+        response = StreamingHttpResponse(conteudo, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="agendamentos.{formato}"'
+        return response
+
+
+class SerieAgendamentoViewSet(viewsets.ModelViewSet):
+    """ViewSet para gerenciar séries de agendamentos (agendamentos recorrentes).
+    
+    As ocorrências são calculadas a partir da regra; cancelar ou mover uma
+    ocorrência grava apenas a exceção. Excluir a série a cancela.
+    """
+    
+    queryset = SerieAgendamento.objects.select_related('sala', 'cliente')
+    serializer_class = SerieAgendamentoSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status', 'sala', 'frequencia']
+    ordering_fields = ['horario_inicio', 'data_criacao']
+    
+    def get_queryset(self):
+        """Filtra as séries com base no tipo de usuário."""
+        user = self.request.user
+        queryset = super().get_queryset()
+        
+        if user.is_staff or user.is_superuser:
+            return queryset
+        return queryset.filter(cliente=user)
+    
+    def perform_create(self, serializer):
+        """Salva a série com o cliente atual."""
+        serializer.save(cliente=self.request.user)
+    
+    def perform_destroy(self, instance):
+        """Cancela a série em vez de apagá-la; as ocorrências movidas continuam agendadas."""
+        instance.status = SerieAgendamento.StatusSerie.CANCELADA
+        instance.save(update_fields=['status', 'data_atualizacao'])
+    
+    @action(detail=True, methods=['get'])
+    def ocorrencias(self, request, pk=None):
+        """Lista as ocorrências da série no período, com o status de cada uma.
+        
+        O status é agendada, cancelada ou movida (com o id do agendamento que a substitui).
+        """
+        serie = self.get_object()
+        parametros = OcorrenciasSerieSerializer(data=request.query_params)
+        if not parametros.is_valid():
+            return Response(parametros.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        inicio = parametros.validated_data['data_inicio']
+        fim = parametros.validated_data['data_fim']
+        excecoes = {
+            excecao.ocorrencia: excecao
+            for excecao in serie.excecoes.filter(ocorrencia__lt=fim).order_by()
+        }
+        
+        ocorrencias = []
+        for ocorrencia_inicio, ocorrencia_fim in serie.ocorrencias_entre(inicio, fim):
+            excecao = excecoes.get(ocorrencia_inicio)
+            if serie.status == SerieAgendamento.StatusSerie.CANCELADA:
+                situacao = 'cancelada'
+            elif excecao is None:
+                situacao = 'agendada'
+            else:
+                situacao = 'movida' if excecao.agendamento_id else 'cancelada'
+            ocorrencias.append({
+                'horario_inicio': ocorrencia_inicio,
+                'horario_fim': ocorrencia_fim,
+                'status': situacao,
+                'agendamento': excecao.agendamento_id if excecao else None,
+            })
+        return Response(ocorrencias)
+    
+    @action(detail=True, methods=['post'], url_path='cancelar-ocorrencia')
+    def cancelar_ocorrencia(self, request, pk=None):
+        """Cancela uma ocorrência da série, identificada pelo seu horário de início."""
+        serie = self.get_object()
+        serializer = OcorrenciaSerieSerializer(data=request.data, context={'serie': serie})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        self._criar_excecao(serie, serializer.validated_data['ocorrencia'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    @action(detail=True, methods=['post'], url_path='mover-ocorrencia')
+    def mover_ocorrencia(self, request, pk=None):
+        """Move uma ocorrência da série para outro horário, criando um agendamento comum.
+        
+        A exceção é gravada antes da validação do agendamento, de modo que o novo
+        horário pode se sobrepor à própria ocorrência movida.
+        """
+        serie = self.get_object()
+        serializer = MoverOcorrenciaSerializer(data=request.data, context={'serie': serie})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        dados = serializer.validated_data
+        with transaction.atomic():
+            excecao = self._criar_excecao(serie, dados['ocorrencia'])
+            agendamento_serializer = AgendamentoSerializer(data={
+                'sala': dados.get('sala', serie.sala).pk,
+                'cliente': serie.cliente_id,
+                'horario_inicio': dados['horario_inicio'],
+                'horario_fim': dados['horario_fim'],
+            })
+            # Um ValidationError aqui desfaz a transação e, com ela, a exceção da série
+            agendamento_serializer.is_valid(raise_exception=True)
+            excecao.agendamento = agendamento_serializer.save()
+            excecao.save(update_fields=['agendamento'])
+        return Response(agendamento_serializer.data, status=status.HTTP_201_CREATED)
+    
+    def _criar_excecao(self, serie, ocorrencia):
+        """Grava a exceção da ocorrência.
+        
+        Duas requisições simultâneas podem passar pela validação; a restrição
+        única (excecao_serie_unica) recusa a segunda, que responde 400.
+        """
+        try:
+            with transaction.atomic():
+                return ExcecaoSerie.objects.create(serie=serie, ocorrencia=ocorrencia)
+        except IntegrityError:
+            raise ValidationError({'ocorrencia': [MENSAGEM_OCORRENCIA_ALTERADA]})
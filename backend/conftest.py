@@ -17,6 +17,30 @@ from bookings.models import Agendamento as Booking
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def limpar_indice_disponibilidade():
+    """Garante que o índice de disponibilidade em memória não vaze entre testes."""
+    from bookings.availability import indice_disponibilidade
+    indice_disponibilidade.limpar()
+    yield
+    indice_disponibilidade.limpar()
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache():
+    """Garante que respostas guardadas no cache não vazem entre testes."""
+    from django.core.cache import cache
+    from subscriptions.direitos import limpar_cache_direitos
+    from users.authentication import limpar_cache_autenticacao
+    cache.clear()
+    limpar_cache_autenticacao()
+    limpar_cache_direitos()
+    yield
+    cache.clear()
+    limpar_cache_autenticacao()
+    limpar_cache_direitos()
+
+
 @pytest.fixture
 def admin_user():
     """Fixture para criar um usuário administrador."""
@@ -0,0 +1,374 @@
+"""
+Instrumentação de desempenho das requisições.
+
+``InstrumentacaoMiddleware`` mede, para cada requisição, o tempo total, o tempo
+gasto no banco, o número de consultas e o tamanho da resposta, e agrupa as
+medidas por endpoint: o nome da rota (``agendamento-disponibilidade``,
+``subscription-current``...) e a action do viewset ou, fora dos viewsets, o
+método HTTP.
+
+As medidas vão para histogramas no estilo HDR (precisão relativa fixa em toda a
+faixa de valores), de onde saem os quantis publicados em ``/metrics`` no
+formato texto do Prometheus, junto com as métricas do pool de hash de senhas e
+dos clientes do Mercado Pago.
+
+As consultas são medidas por um execute wrapper instalado em todas as conexões,
+que só registra algo quando há uma requisição em andamento no contexto atual
+(inclusive nas views assíncronas, cujo acesso ao banco roda em outra thread).
+Requisições acima de ``INSTRUMENTACAO_LIMITE_LENTO`` segundos guardam o SQL
+executado (sem os parâmetros) em uma amostra publicada em ``/metrics/lentas``.
+"""
+import hmac
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+
+logger = logging.getLogger(__name__)
+
+QUANTIS = (0.5, 0.9, 0.99, 0.999)
+
+
+class HistogramaHDR:
+    """
+    Histograma com erro relativo máximo de ``2 ** -bits_subdivisao``.
+
+    Os valores (inteiros, na unidade ``escala``) são agrupados pelo expoente
+    de base 2 e, dentro dele, pelos ``bits_subdivisao`` bits mais
+    significativos, de modo que a memória cresce com o logaritmo da faixa de
+    valores e não com a quantidade de observações.
+    """
+
+    def __init__(self, escala=1, bits_subdivisao=7):
+        self.escala = escala
+        self.bits = bits_subdivisao
+        self.contagens = {}
+        self.total = 0
+        self.soma = 0
+        self.maximo = 0
+
+    def observar(self, valor):
+        valor = max(int(round(valor / self.escala)), 0)
+        expoente = max(valor.bit_length() - self.bits, 0)
+        indice = (expoente << self.bits) + (valor >> expoente)
+        self.contagens[indice] = self.contagens.get(indice, 0) + 1
+        self.total += 1
+        self.soma += valor
+        self.maximo = max(self.maximo, valor)
+
+    def _limite_superior(self, indice):
+        expoente, mantissa = divmod(indice, 1 << self.bits)
+        return ((mantissa + 1) << expoente) - 1
+
+    def quantis(self, quantis=QUANTIS):
+        """Valor de cada quantil, na unidade original (limitado ao máximo observado)."""
+        resultado = dict.fromkeys(quantis, 0)
+        if not self.total:
+            return resultado
+        pendentes = sorted(quantis)
+        acumulado = 0
+        for indice in sorted(self.contagens):
+            acumulado += self.contagens[indice]
+            while pendentes and acumulado >= pendentes[0] * self.total:
+                resultado[pendentes.pop(0)] = min(self._limite_superior(indice), self.maximo) * self.escala
+            if not pendentes:
+                break
+        for quantil in pendentes:
+            resultado[quantil] = self.maximo * self.escala
+        return resultado
+
+
+class _Coletor:
+    """Consultas da requisição em andamento."""
+
+    __slots__ = ('consultas', 'segundos_banco', 'sql', 'sql_maximo')
+
+    def __init__(self, sql_maximo):
+        self.consultas = 0
+        self.segundos_banco = 0.0
+        self.sql = []
+        self.sql_maximo = sql_maximo
+
+
+_coletor = ContextVar('instrumentacao_coletor', default=None)
+
+
+def medir_consulta(execute, sql, params, many, context):
+    """Execute wrapper que soma o tempo das consultas da requisição em andamento."""
+    coletor = _coletor.get()
+    if coletor is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracao = time.perf_counter() - inicio
+        coletor.consultas += 1
+        coletor.segundos_banco += duracao
+        if len(coletor.sql) < coletor.sql_maximo:
+            coletor.sql.append((sql, duracao))
+
+
+def instalar(conexao):
+    """Instala ``medir_consulta`` na conexão, uma única vez."""
+    if medir_consulta not in conexao.execute_wrappers:
+        # Na primeira posição, para não ser removido por ``execute_wrapper()``,
+        # que sempre retira o último wrapper da lista
+        conexao.execute_wrappers.insert(0, medir_consulta)
+
+
+def _ao_conectar(sender, connection, **kwargs):
+    instalar(connection)
+
+
+connection_created.connect(_ao_conectar)
+
+
+class Registro:
+    """Histogramas e contadores por endpoint, e a amostra de requisições lentas."""
+
+    MEDIDAS = {
+        'duracao_segundos': ('Tempo total da requisição, em segundos.', 1e-6),
+        'banco_segundos': ('Tempo gasto em consultas ao banco, em segundos.', 1e-6),
+        'consultas': ('Consultas ao banco por requisição.', 1),
+        'resposta_bytes': ('Tamanho do corpo da resposta, em bytes.', 1),
+    }
+
+    def __init__(self):
+        self.limpar()
+
+    def limpar(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._requisicoes = {}
+        self._lentas = deque(maxlen=settings.INSTRUMENTACAO_AMOSTRAS_LENTAS)
+
+    def registrar(self, endpoint, acao, metodo, status, medidas):
+        with self._lock:
+            histogramas = self._histogramas.get((endpoint, acao))
+            if histogramas is None:
+                histogramas = self._histogramas[(endpoint, acao)] = {
+                    nome: HistogramaHDR(escala) for nome, (_, escala) in self.MEDIDAS.items()
+                }
+            for nome, valor in medidas.items():
+                histogramas[nome].observar(valor)
+            chave = (endpoint, acao, metodo, str(status))
+            self._requisicoes[chave] = self._requisicoes.get(chave, 0) + 1
+
+    def amostrar(self, amostra):
+        with self._lock:
+            self._lentas.appendleft(amostra)
+
+    def lentas(self):
+        """Requisições lentas, da mais recente para a mais antiga."""
+        with self._lock:
+            return list(self._lentas)
+
+    def exportar(self):
+        """Linhas no formato texto do Prometheus."""
+        with self._lock:
+            requisicoes = sorted(self._requisicoes.items())
+            resumos = {
+                nome: [(chave, h[nome].quantis(), h[nome].soma, h[nome].total)
+                       for chave, h in sorted(self._histogramas.items())]
+                for nome in self.MEDIDAS
+            }
+
+        linhas = [
+            '# HELP studioflow_http_requisicoes_total Requisições atendidas.',
+            '# TYPE studioflow_http_requisicoes_total counter',
+        ]
+        for (endpoint, acao, metodo, status), total in requisicoes:
+            rotulos = _rotulos(endpoint=endpoint, acao=acao, metodo=metodo, status=status)
+            linhas.append(f'studioflow_http_requisicoes_total{rotulos} {total}')
+
+        for nome, (ajuda, escala) in self.MEDIDAS.items():
+            metrica = f'studioflow_http_{nome}'
+            linhas += [f'# HELP {metrica} {ajuda}', f'# TYPE {metrica} summary']
+            for (endpoint, acao), quantis, soma, total in resumos[nome]:
+                for quantil, valor in quantis.items():
+                    rotulos = _rotulos(endpoint=endpoint, acao=acao, quantile=quantil)
+                    linhas.append(f'{metrica}{rotulos} {_numero(valor)}')
+                rotulos = _rotulos(endpoint=endpoint, acao=acao)
+                linhas.append(f'{metrica}_sum{rotulos} {_numero(soma * escala)}')
+                linhas.append(f'{metrica}_count{rotulos} {total}')
+        return linhas
+
+
+registro = Registro()
+
+
+def _numero(valor):
+    return repr(round(valor, 6)) if isinstance(valor, float) else str(valor)
+
+
+def _rotulos(**rotulos):
+    if not rotulos:
+        return ''
+    pares = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for nome, valor in rotulos.items()
+    )
+    return '{' + pares + '}'
+
+
+def endpoint_da_requisicao(request):
+    """Nome da rota e action do viewset (ou método HTTP) da requisição."""
+    match = getattr(request, 'resolver_match', None)
+    metodo = request.method.lower()
+    if match is None:
+        return 'nao_resolvido', metodo
+    acoes = getattr(match.func, 'actions', None)
+    return match.view_name, (acoes or {}).get(metodo, metodo)
+
+
+class InstrumentacaoMiddleware:
+    """Registra tempo, consultas e bytes de cada requisição em ``registro``."""
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _iniciar(self):
+        for conexao in connections.all(initialized_only=True):
+            instalar(conexao)
+        coletor = _Coletor(settings.INSTRUMENTACAO_SQL_MAXIMO)
+        return coletor, _coletor.set(coletor), time.perf_counter()
+
+    def _concluir(self, request, response, coletor, token, inicio):
+        duracao = time.perf_counter() - inicio
+        _coletor.reset(token)
+        endpoint, acao = endpoint_da_requisicao(request)
+        medidas = {
+            'duracao_segundos': duracao,
+            'banco_segundos': coletor.segundos_banco,
+            'consultas': coletor.consultas,
+        }
+        if not response.streaming:
+            medidas['resposta_bytes'] = len(response.content)
+        registro.registrar(endpoint, acao, request.method, response.status_code, medidas)
+
+        if duracao >= settings.INSTRUMENTACAO_LIMITE_LENTO:
+            amostra = {
+                'endpoint': endpoint,
+                'acao': acao,
+                'metodo': request.method,
+                'caminho': request.path,
+                'status': response.status_code,
+                'data': timezone.now().isoformat(),
+                'duracao_segundos': round(duracao, 6),
+                'banco_segundos': round(coletor.segundos_banco, 6),
+                'consultas': coletor.consultas,
+                'sql': [{'sql': sql, 'segundos': round(segundos, 6)} for sql, segundos in coletor.sql],
+            }
+            registro.amostrar(amostra)
+            logger.warning(
+                'Requisição lenta: %s %s (%s) em %.3fs, %d consulta(s) em %.3fs',
+                request.method, request.path, endpoint, duracao, coletor.consultas, coletor.segundos_banco
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        coletor, token, inicio = self._iniciar()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            _coletor.reset(token)
+            raise
+        return self._concluir(request, response, coletor, token, inicio)
+
+    async def __acall__(self, request):
+        coletor, token, inicio = self._iniciar()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            _coletor.reset(token)
+            raise
+        return self._concluir(request, response, coletor, token, inicio)
+
+
+def _metricas_do_pool_de_hash():
+    from users.hashing import pool_de_hash
+
+    contadores = {'concluidos', 'rejeitados', 'segundos_de_hash'}
+    linhas = []
+    for nome, valor in pool_de_hash.metricas().items():
+        tipo, sufixo = ('counter', '_total') if nome in contadores else ('gauge', '')
+        metrica = f'studioflow_hash_pool_{nome}{sufixo}'
+        linhas += [f'# TYPE {metrica} {tipo}', f'{metrica} {_numero(valor)}']
+    return linhas
+
+
+def _metricas_do_mercado_pago():
+    from subscriptions.pagamentos import clientes_ativos
+
+    clientes = [(cliente.url_base, cliente.metricas()) for cliente in clientes_ativos()]
+    linhas = [
+        '# HELP studioflow_mercadopago_latencia_segundos Latência das chamadas à API do Mercado Pago.',
+        '# TYPE studioflow_mercadopago_latencia_segundos histogram',
+    ]
+    for url, metricas in clientes:
+        for operacao, histograma in sorted(metricas['latencia'].items()):
+            for limite, acumulado in histograma['buckets']:
+                rotulos = _rotulos(cliente=url, operacao=operacao, le=limite)
+                linhas.append(f'studioflow_mercadopago_latencia_segundos_bucket{rotulos} {acumulado}')
+            rotulos = _rotulos(cliente=url, operacao=operacao)
+            linhas.append(f'studioflow_mercadopago_latencia_segundos_sum{rotulos} {_numero(histograma["soma"])}')
+            linhas.append(f'studioflow_mercadopago_latencia_segundos_count{rotulos} {histograma["total"]}')
+
+    linhas.append('# TYPE studioflow_mercadopago_resultados_total counter')
+    for url, metricas in clientes:
+        for chave, total in sorted(metricas['resultados'].items()):
+            operacao, resultado = chave.rsplit(':', 1)
+            rotulos = _rotulos(cliente=url, operacao=operacao, resultado=resultado)
+            linhas.append(f'studioflow_mercadopago_resultados_total{rotulos} {total}')
+
+    for metrica, tipo, valor in (
+        ('circuito_aberto', 'gauge', lambda m: int(m['circuito'] != 'fechado')),
+        ('orcamento_retentativas', 'gauge', lambda m: m['orcamento_retentativas']),
+        ('conexoes_criadas_total', 'counter', lambda m: m['conexoes_criadas']),
+    ):
+        linhas.append(f'# TYPE studioflow_mercadopago_{metrica} {tipo}')
+        for url, metricas in clientes:
+            linhas.append(f'studioflow_mercadopago_{metrica}{_rotulos(cliente=url)} {_numero(valor(metricas))}')
+    return linhas
+
+
+def _autorizar(request):
+    """Exige ``Authorization: Bearer <METRICAS_TOKEN>``; sem token configurado, as métricas ficam desligadas."""
+    token = settings.METRICAS_TOKEN
+    if not token:
+        raise Http404
+    return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+
+
+@require_safe
+def metricas(request):
+    """Métricas da aplicação no formato texto do Prometheus."""
+    if not _autorizar(request):
+        return HttpResponse(status=401)
+    linhas = registro.exportar() + _metricas_do_pool_de_hash() + _metricas_do_mercado_pago()
+    return HttpResponse('\n'.join(linhas) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_safe
+def requisicoes_lentas(request):
+    """Amostra das requisições lentas mais recentes, com o SQL executado."""
+    if not _autorizar(request):
+        return HttpResponse(status=401)
+    return JsonResponse({'limite_segundos': settings.INSTRUMENTACAO_LIMITE_LENTO, 'requisicoes': registro.lentas()})
@@ -0,0 +1,227 @@
+"""
+Renderização rápida das listagens a partir de ``values_list()``.
+
+O ``ModelSerializer`` instancia um objeto do modelo por linha e despacha
+``get_attribute``/``to_representation`` campo a campo, o que domina o tempo de
+CPU em páginas grandes. Aqui os campos do serializer são analisados uma única
+vez e transformados em um plano: as colunas a buscar no banco e, para cada
+campo, a posição da coluna e a conversão a aplicar. Cada linha vira um ``dict``
+com as mesmas chaves, na mesma ordem e com os mesmos valores que o serializer
+produziria, de modo que o JSON gerado é idêntico.
+
+Campos que não podem ser lidos diretamente de uma coluna (``SerializerMethodField``,
+propriedades, relações reversas ou muitos-para-muitos) tornam o serializer
+incompatível com o plano, e a listagem usa o caminho normal do DRF.
+"""
+import decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+class PlanoIncompativel(Exception):
+    """O serializer possui um campo que não pode ser lido de uma coluna."""
+
+
+def _converter_data_hora(campo):
+    """Equivalente a ``DateTimeField.to_representation`` no formato ISO 8601."""
+    formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+    if formato is None:
+        return None
+    if formato.lower() != ISO_8601:
+        return campo.to_representation
+
+    fuso = campo.timezone if hasattr(campo, 'timezone') else campo.default_timezone()
+    if fuso is None:
+        return campo.to_representation
+
+    def converter(valor):
+        if valor.tzinfo is None:
+            return campo.to_representation(valor)
+        texto = valor.astimezone(fuso).isoformat()
+        if texto.endswith('+00:00'):
+            return texto[:-6] + 'Z'
+        return texto
+    return converter
+
+
+def _converter_decimal(campo):
+    """Equivalente a ``DecimalField.to_representation`` com ``coerce_to_string``."""
+    coerce_to_string = getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or campo.localize or campo.decimal_places is None:
+        return campo.to_representation
+
+    expoente = decimal.Decimal('.1') ** campo.decimal_places
+    arredondamento = campo.rounding
+
+    def converter(valor):
+        if not isinstance(valor, decimal.Decimal):
+            return campo.to_representation(valor)
+        contexto = decimal.getcontext().copy()
+        if campo.max_digits is not None:
+            contexto.prec = campo.max_digits
+        return '{:f}'.format(valor.quantize(expoente, rounding=arredondamento, context=contexto))
+    return converter
+
+
+def _converter_escolha(campo):
+    """``ChoiceField`` devolve o próprio valor quando as chaves já são strings."""
+    if all(isinstance(chave, str) for chave in campo.choices):
+        return None
+    return campo.to_representation
+
+
+# Conversões por classe exata do campo; subclasses podem redefinir
+# to_representation e por isso usam o método do próprio campo.
+# ``None`` indica que o valor vindo do banco já é a representação final.
+CONVERSORES = {
+    fields.DateTimeField: _converter_data_hora,
+    fields.DecimalField: _converter_decimal,
+    fields.ChoiceField: _converter_escolha,
+    fields.CharField: lambda campo: None,
+    fields.EmailField: lambda campo: None,
+    fields.IntegerField: lambda campo: None,
+    fields.BooleanField: lambda campo: None,
+    fields.ReadOnlyField: lambda campo: None,
+    relations.PrimaryKeyRelatedField: lambda campo: (
+        None if campo.pk_field is None else campo.pk_field.to_representation
+    ),
+}
+
+
+class PlanoListagem:
+    """Plano pré-compilado para renderizar as linhas de um serializer."""
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.colunas = []
+        self._posicoes = {}
+        self._campos = self._compilar(serializer, serializer_class.Meta.model, [])
+
+    def _coluna(self, caminho):
+        """Registra a coluna do ``values_list`` e retorna sua posição."""
+        nome = '__'.join(caminho)
+        if nome not in self._posicoes:
+            self._posicoes[nome] = len(self.colunas)
+            self.colunas.append(nome)
+        return self._posicoes[nome]
+
+    def _resolver(self, modelo, atributos):
+        """Segue o ``source`` do campo pelos relacionamentos e retorna o campo de modelo final."""
+        if not atributos:
+            raise PlanoIncompativel('*')
+        campo_modelo = None
+        for posicao, atributo in enumerate(atributos):
+            if campo_modelo is not None:
+                # Um relacionamento intermediário nulo exigiria as regras de
+                # default/allow_null do DRF; esses casos usam o caminho normal
+                if not campo_modelo.is_relation or campo_modelo.null:
+                    raise PlanoIncompativel(atributo)
+                modelo = campo_modelo.related_model
+            try:
+                campo_modelo = modelo._meta.get_field(atributo)
+            except FieldDoesNotExist:
+                raise PlanoIncompativel(atributo)
+            if not campo_modelo.concrete or campo_modelo.many_to_many:
+                raise PlanoIncompativel(atributo)
+        return campo_modelo
+
+    def _compilar(self, serializer, modelo, prefixo):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            raise PlanoIncompativel(type(serializer).__name__)
+
+        campos = []
+        for campo in serializer._readable_fields:
+            campo_modelo = self._resolver(modelo, campo.source_attrs)
+            caminho = prefixo + campo.source_attrs
+            posicao = self._coluna(caminho)
+
+            if isinstance(campo, serializers.BaseSerializer):
+                if isinstance(campo, serializers.ListSerializer) or not campo_modelo.is_relation:
+                    raise PlanoIncompativel(campo.field_name)
+                aninhado = self._compilar(campo, campo_modelo.related_model, caminho)
+                campos.append((campo.field_name, posicao, None, aninhado))
+                continue
+
+            if type(campo) is relations.PrimaryKeyRelatedField:
+                if not campo_modelo.is_relation:
+                    raise PlanoIncompativel(campo.field_name)
+            elif campo_modelo.is_relation or type(campo).get_attribute is not fields.Field.get_attribute:
+                raise PlanoIncompativel(campo.field_name)
+
+            campos.append((campo.field_name, posicao, campo, None))
+        return campos
+
+    def _preparar(self, campos):
+        """Obtém os conversores, que dependem do fuso ativo na requisição."""
+        passos = []
+        for nome, posicao, campo, aninhado in campos:
+            if aninhado is not None:
+                passos.append((nome, posicao, None, self._preparar(aninhado)))
+                continue
+            fabrica = CONVERSORES.get(type(campo))
+            conversor = fabrica(campo) if fabrica else campo.to_representation
+            passos.append((nome, posicao, conversor, None))
+        return passos
+
+    def renderizar(self, linhas):
+        """Converte as tuplas de ``values_list(*self.colunas)`` nos dicts do serializer."""
+        return list(self.gerar(linhas))
+
+    def gerar(self, linhas):
+        """Versão preguiçosa de ``renderizar``, que produz um dict por vez."""
+        passos = self._preparar(self._campos)
+
+        def montar(linha, passos):
+            item = {}
+            for nome, posicao, conversor, aninhado in passos:
+                valor = linha[posicao]
+                if valor is None:
+                    item[nome] = None
+                elif aninhado is not None:
+                    item[nome] = montar(linha, aninhado)
+                elif conversor is None:
+                    item[nome] = valor
+                else:
+                    item[nome] = conversor(valor)
+            return item
+
+        for linha in linhas:
+            yield montar(linha, passos)
+
+
+_planos = {}
+
+
+def obter_plano(serializer_class):
+    """Retorna o plano do serializer, ou ``None`` se ele não for compatível."""
+    if serializer_class not in _planos:
+        try:
+            _planos[serializer_class] = PlanoListagem(serializer_class)
+        except PlanoIncompativel:
+            _planos[serializer_class] = None
+    return _planos[serializer_class]
+
+
+class ListagemRapidaMixin:
+    """Renderiza a ação ``list`` com ``PlanoListagem`` em vez do serializer.
+
+    Só é usada quando ``STUDIOFLOW_LISTAGEM_RAPIDA = True``; sem essa configuração
+    a listagem continua sendo feita pelo serializer.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plano = None
+        if getattr(settings, 'STUDIOFLOW_LISTAGEM_RAPIDA', False):
+            plano = obter_plano(self.get_serializer_class())
+        if plano is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*plano.colunas)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plano.renderizar(page))
+        return Response(plano.renderizar(queryset))
@@ -0,0 +1,78 @@
+"""
+Mixins compartilhados pelos ViewSets da API.
+"""
+import hashlib
+import time
+
+from django.db.models import Count, Max
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class NaoModificado(APIException):
+    """Interrompe a requisição condicional cujo ETag não mudou."""
+
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+class GetCondicionalMixin:
+    """Responde 304 a GETs condicionais antes de consultar e serializar os dados.
+
+    O ETag é um resumo de ``Max`` dos ``campos_versao`` e da contagem de linhas
+    do queryset visível para o usuário, calculados em uma única consulta, junto
+    com a URL, o usuário e o formato da resposta. Quando o ETag coincide com o
+    ``If-None-Match`` a ação nem chega a ser executada.
+
+    ``campos_versao`` deve incluir o ``data_atualizacao`` dos objetos aninhados
+    na resposta. Se a representação depende da hora atual, ``janela_versao``
+    (em segundos) faz o ETag mudar ao menos uma vez por janela.
+    """
+
+    acoes_condicionais = ('list', 'retrieve')
+    campos_versao = ('data_atualizacao',)
+    janela_versao = None
+
+    def queryset_versao(self):
+        """Retorna o queryset cujas linhas compõem a resposta da ação atual."""
+        if self.action == 'list':
+            return self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            return self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return self.get_queryset()
+
+    def _etag_condicional(self, request):
+        agregados = {f'max_{posicao}': Max(campo) for posicao, campo in enumerate(self.campos_versao)}
+        versao = self.queryset_versao().order_by().aggregate(total=Count('pk'), **agregados)
+        partes = [
+            request.get_full_path(), request.get_host(), request.user.pk,
+            request.accepted_renderer.format, sorted(versao.items()),
+        ]
+        if self.janela_versao:
+            partes.append(int(time.time() // self.janela_versao))
+        return '"%s"' % hashlib.md5(repr(partes).encode('utf-8')).hexdigest()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag_condicional = None
+        if request.method in ('GET', 'HEAD') and self.action in self.acoes_condicionais:
+            self.etag_condicional = self._etag_condicional(request)
+            etags = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+            if '*' in etags or self.etag_condicional in [etag.removeprefix('W/') for etag in etags]:
+                raise NaoModificado()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NaoModificado):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag_condicional', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+        return response
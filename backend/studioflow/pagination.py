@@ -0,0 +1,164 @@
+"""
+Paginação padrão da API, com um modo por cursor (keyset) opcional.
+
+Sem o parâmetro ``cursor`` a paginação continua sendo por número de página.
+Com ``?cursor=`` (vazio na primeira página) as páginas são obtidas pela
+posição do último registro entregue, com desempate pela chave primária, em
+vez de ``OFFSET``; o custo de cada página não depende da sua profundidade.
+Nesse modo o ``COUNT(*)`` só é feito quando ``?com_total=1`` é informado, e
+o tamanho da página pode ser escolhido com ``?page_size=`` (até 1000); na
+paginação por número de página o tamanho continua fixo.
+
+A ordenação usada no modo por cursor é o atributo ``ordenacao_cursor`` do
+ViewSet ou, na falta dele, o ``ordering`` do modelo. O parâmetro ``ordering``
+da requisição é ignorado nesse modo, e os campos da ordenação não podem ser
+nulos.
+"""
+import json
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PaginacaoPadrao(PageNumberPagination):
+    """Paginação por número de página ou por cursor, conforme a requisição."""
+
+    cursor_query_param = 'cursor'
+    tamanho_query_param = 'page_size'
+    tamanho_maximo = 1000
+    total_query_param = 'com_total'
+    mensagem_cursor_invalido = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.por_cursor = self.cursor_query_param in request.query_params
+        if not self.por_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.tamanho = self._tamanho(request)
+        self.modelo = queryset.model
+        self.ordenacao = self._ordenacao(queryset, view)
+        self.colunas = getattr(queryset.query, 'values_select', ())
+        self.total = None
+        if request.query_params.get(self.total_query_param) in ('1', 'true', 'True'):
+            self.total = queryset.count()
+
+        posicao, para_tras = self._decodificar(request.query_params.get(self.cursor_query_param))
+        ordenacao = [self._inverter(campo) for campo in self.ordenacao] if para_tras else self.ordenacao
+        queryset = queryset.order_by(*ordenacao)
+        if posicao is not None:
+            queryset = queryset.filter(self._apos(ordenacao, posicao))
+
+        registros = list(queryset[:self.tamanho + 1])
+        tem_mais = len(registros) > self.tamanho
+        registros = registros[:self.tamanho]
+        if para_tras:
+            registros.reverse()
+            self.tem_anterior, self.tem_proxima = tem_mais, True
+        else:
+            self.tem_anterior, self.tem_proxima = posicao is not None, tem_mais
+
+        self.primeiro = self._posicao(registros[0]) if registros else None
+        self.ultimo = self._posicao(registros[-1]) if registros else None
+        return registros
+
+    def get_paginated_response(self, data):
+        if not self.por_cursor:
+            return super().get_paginated_response(data)
+
+        resposta = OrderedDict()
+        if self.total is not None:
+            resposta['count'] = self.total
+        resposta['next'] = self._link(self.ultimo, False) if self.tem_proxima and self.ultimo else None
+        resposta['previous'] = self._link(self.primeiro, True) if self.tem_anterior and self.primeiro else None
+        resposta['results'] = data
+        return Response(resposta)
+
+    def _tamanho(self, request):
+        """Retorna o tamanho da página por cursor, que pode ser escolhido com ``?page_size=``."""
+        try:
+            return _positive_int(
+                request.query_params[self.tamanho_query_param], strict=True, cutoff=self.tamanho_maximo
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def _ordenacao(self, queryset, view):
+        """Retorna a ordenação do cursor, terminada pela chave primária."""
+        opcoes = queryset.model._meta
+        chave = opcoes.pk.name
+        ordenacao = []
+        for campo in getattr(view, 'ordenacao_cursor', None) or opcoes.ordering:
+            direcao, nome = ('-', campo[1:]) if campo.startswith('-') else ('', campo)
+            nome = chave if nome == 'pk' else nome
+            if '__' in nome or opcoes.get_field(nome).null:
+                raise ImproperlyConfigured(
+                    f'A ordenação por cursor exige campos diretos e não nulos: {campo!r}.'
+                )
+            ordenacao.append(direcao + nome)
+
+        if not any(campo.lstrip('-') == chave for campo in ordenacao):
+            direcao = '-' if ordenacao and ordenacao[-1].startswith('-') else ''
+            ordenacao.append(direcao + chave)
+        return ordenacao
+
+    @staticmethod
+    def _inverter(campo):
+        return campo[1:] if campo.startswith('-') else '-' + campo
+
+    @staticmethod
+    def _apos(ordenacao, posicao):
+        """Monta o filtro dos registros posteriores à posição na ordenação informada."""
+        filtro = Q()
+        iguais = {}
+        for campo, valor in zip(ordenacao, posicao):
+            nome = campo.lstrip('-')
+            operador = 'lt' if campo.startswith('-') else 'gt'
+            filtro |= Q(**iguais, **{f'{nome}__{operador}': valor})
+            iguais[nome] = valor
+        return filtro
+
+    def _posicao(self, registro):
+        """Extrai os valores da ordenação de uma instância, dict ou tupla de values_list."""
+        nomes = [campo.lstrip('-') for campo in self.ordenacao]
+        if isinstance(registro, dict):
+            return [registro[nome] for nome in nomes]
+        if isinstance(registro, tuple):
+            try:
+                return [registro[self.colunas.index(nome)] for nome in nomes]
+            except ValueError:
+                raise ImproperlyConfigured(
+                    f'O values_list paginado por cursor precisa incluir as colunas {nomes}.'
+                )
+        return [getattr(registro, nome) for nome in nomes]
+
+    def _decodificar(self, cursor):
+        """Retorna ``(posicao, para_tras)``; a primeira página não tem posição."""
+        if not cursor:
+            return None, False
+        try:
+            dados = json.loads(b64decode(cursor.encode('ascii')).decode('utf-8'))
+            valores = dados['p']
+            if len(valores) != len(self.ordenacao):
+                raise ValueError
+            posicao = [
+                self.modelo._meta.get_field(campo.lstrip('-')).to_python(valor)
+                for campo, valor in zip(self.ordenacao, valores)
+            ]
+            return posicao, bool(dados.get('r'))
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.mensagem_cursor_invalido)
+
+    def _link(self, posicao, para_tras):
+        dados = {'p': [str(valor) if not isinstance(valor, (int, str)) else valor for valor in posicao]}
+        if para_tras:
+            dados['r'] = 1
+        cursor = b64encode(json.dumps(dados).encode('utf-8')).decode('ascii')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "studioflow.instrumentacao.InstrumentacaoMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -101,6 +102,20 @@ DATABASES = {
 }
 
 
+# Cache
+# Em memória local por padrão; o docker-compose (e staging/produção) aponta para um
+# servidor compatível com o protocolo Redis, ex.: CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# e CACHE_LOCATION=redis://redis:6379/1 (o cliente redis já vem com channels-redis).
+# A autenticação JWT só confia nas claims do token (usuário e direito de acesso, sem
+# consultas) com um cache compartilhado; com o cache local ela lê o usuário do banco
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "studioflow"),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -148,13 +163,13 @@ AUTH_USER_MODEL = "users.User"
 # REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "studioflow.pagination.PaginacaoPadrao",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -200,6 +215,8 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
     "SLIDING_TOKEN_LIFETIME": timedelta(hours=1),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenComClaimsObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenComClaimsRefreshSerializer",
 }
 
 # Media files
@@ -221,3 +238,77 @@ DEFAULT_FROM_EMAIL = os.environ.get("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
 
 # Frontend URL
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:3000")
+
+# Tempo (em segundos) que o índice de disponibilidade de uma sala fica em memória
+BOOKINGS_INDICE_DISPONIBILIDADE_TTL = int(os.environ.get("BOOKINGS_INDICE_DISPONIBILIDADE_TTL", 60))
+
+# Renderiza as listagens de salas e agendamentos sem instanciar o serializer por linha (opcional)
+STUDIOFLOW_LISTAGEM_RAPIDA = os.environ.get("STUDIOFLOW_LISTAGEM_RAPIDA", "False") == "True"
+
+# Quantidade de agendamentos lidos do banco por vez na exportação em streaming
+BOOKINGS_EXPORTACAO_CHUNK_SIZE = int(os.environ.get("BOOKINGS_EXPORTACAO_CHUNK_SIZE", 2000))
+
+# Tempo (em segundos) que as respostas públicas de salas ficam no cache
+STUDIOS_CACHE_TIMEOUT = int(os.environ.get("STUDIOS_CACHE_TIMEOUT", 300))
+
+# Tempo (em segundos) que cada processo reutiliza o usuário montado a partir do token
+USERS_CACHE_AUTENTICACAO_TTL = int(os.environ.get("USERS_CACHE_AUTENTICACAO_TTL", 30))
+
+# Threads dedicadas ao hash de senhas e quantos cálculos podem esperar por elas
+# antes de as requisições de login, registro e troca de senha receberem 429
+USERS_HASH_WORKERS = int(os.environ.get("USERS_HASH_WORKERS", 4))
+USERS_HASH_FILA_MAXIMA = int(os.environ.get("USERS_HASH_FILA_MAXIMA", 32))
+
+# Fila de saída de emails (comando enviar_emails): emails por lote, tentativas
+# antes de desistir, espera base (em segundos) entre tentativas, dobrada a cada
+# falha, e por quanto tempo um lote fica reservado para o worker que o pegou
+USERS_EMAIL_LOTE = int(os.environ.get("USERS_EMAIL_LOTE", 100))
+USERS_EMAIL_MAX_TENTATIVAS = int(os.environ.get("USERS_EMAIL_MAX_TENTATIVAS", 5))
+USERS_EMAIL_BACKOFF_BASE = int(os.environ.get("USERS_EMAIL_BACKOFF_BASE", 60))
+USERS_EMAIL_RESERVA = int(os.environ.get("USERS_EMAIL_RESERVA", 300))
+
+# Mercado Pago: credenciais da API, segredo das assinaturas do webhook e a
+# classe do gateway (subscriptions.gateway.GatewayFalso dispensa a API)
+MERCADOPAGO_ACCESS_TOKEN = os.environ.get("MERCADOPAGO_ACCESS_TOKEN", "")
+MERCADOPAGO_WEBHOOK_SECRET = os.environ.get("MERCADOPAGO_WEBHOOK_SECRET", "")
+MERCADOPAGO_API_URL = os.environ.get("MERCADOPAGO_API_URL", "https://api.mercadopago.com")
+SUBSCRIPTIONS_GATEWAY = os.environ.get("SUBSCRIPTIONS_GATEWAY", "subscriptions.gateway.GatewayMercadoPago")
+
+# Processamento das notificações do webhook (comando processar_webhooks):
+# notificações por lote, tentativas, espera base (em segundos) entre tentativas
+# e por quanto tempo um lote fica reservado para o worker que o pegou
+SUBSCRIPTIONS_WEBHOOK_LOTE = int(os.environ.get("SUBSCRIPTIONS_WEBHOOK_LOTE", 100))
+SUBSCRIPTIONS_WEBHOOK_MAX_TENTATIVAS = int(os.environ.get("SUBSCRIPTIONS_WEBHOOK_MAX_TENTATIVAS", 8))
+SUBSCRIPTIONS_WEBHOOK_BACKOFF_BASE = int(os.environ.get("SUBSCRIPTIONS_WEBHOOK_BACKOFF_BASE", 30))
+SUBSCRIPTIONS_WEBHOOK_RESERVA = int(os.environ.get("SUBSCRIPTIONS_WEBHOOK_RESERVA", 120))
+
+# Assinaturas alteradas por lote pelo comando expirar_assinaturas
+SUBSCRIPTIONS_CICLO_CHUNK = int(os.environ.get("SUBSCRIPTIONS_CICLO_CHUNK", 5000))
+
+# Tempo (em segundos) que cada processo reutiliza o direito de acesso de um usuário
+SUBSCRIPTIONS_DIREITOS_TTL = int(os.environ.get("SUBSCRIPTIONS_DIREITOS_TTL", 30))
+
+# Tempo (em segundos) que navegadores e CDNs podem reutilizar o catálogo de planos
+SUBSCRIPTIONS_PLANOS_MAX_AGE = int(os.environ.get("SUBSCRIPTIONS_PLANOS_MAX_AGE", 86400))
+
+# Cliente HTTP do Mercado Pago: timeout (em segundos) de cada chamada, conexões
+# mantidas no pool, tentativas por chamada idempotente e o circuit breaker
+# (falhas seguidas para abrir e segundos até a chamada de teste)
+MERCADOPAGO_TIMEOUT = float(os.environ.get("MERCADOPAGO_TIMEOUT", 5))
+MERCADOPAGO_POOL_MAXIMO = int(os.environ.get("MERCADOPAGO_POOL_MAXIMO", 10))
+MERCADOPAGO_TENTATIVAS = int(os.environ.get("MERCADOPAGO_TENTATIVAS", 3))
+MERCADOPAGO_CIRCUITO_FALHAS = int(os.environ.get("MERCADOPAGO_CIRCUITO_FALHAS", 5))
+MERCADOPAGO_CIRCUITO_ESPERA = int(os.environ.get("MERCADOPAGO_CIRCUITO_ESPERA", 30))
+
+# Instrumentação das requisições (studioflow.instrumentacao): duração (em
+# segundos) a partir da qual a requisição entra na amostra de lentas, tamanho
+# da amostra, consultas guardadas por requisição e o token exigido em /metrics
+# (vazio desliga o endpoint)
+INSTRUMENTACAO_LIMITE_LENTO = float(os.environ.get("INSTRUMENTACAO_LIMITE_LENTO", 1))
+INSTRUMENTACAO_AMOSTRAS_LENTAS = int(os.environ.get("INSTRUMENTACAO_AMOSTRAS_LENTAS", 50))
+INSTRUMENTACAO_SQL_MAXIMO = int(os.environ.get("INSTRUMENTACAO_SQL_MAXIMO", 100))
+METRICAS_TOKEN = os.environ.get("METRICAS_TOKEN", "")
+
+# Dias à frente em que as ocorrências de uma nova série de agendamentos são
+# comparadas com os agendamentos e as séries da sala (séries sem fim)
+BOOKINGS_SERIES_HORIZONTE_DIAS = int(os.environ.get("BOOKINGS_SERIES_HORIZONTE_DIAS", 366))
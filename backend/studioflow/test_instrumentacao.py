@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from bookings.models import Agendamento
+from studios.models import Sala
+from users.models import User
+from .instrumentacao import HistogramaHDR, registro
+
+TOKEN = 'token-de-metricas'
+
+
+def ler_metricas(texto):
+    """Converte o formato texto do Prometheus em ``{'nome{rotulos}': valor}``."""
+    return {
+        linha.rsplit(' ', 1)[0]: float(linha.rsplit(' ', 1)[1])
+        for linha in texto.splitlines() if linha and not linha.startswith('#')
+    }
+
+
+class HistogramaHDRTest(TestCase):
+    """Testes para o histograma de precisão relativa fixa."""
+
+    def test_quantis(self):
+        """Testa que os quantis ficam dentro do erro relativo do histograma."""
+        histograma = HistogramaHDR()
+        for valor in range(1, 100001):
+            histograma.observar(valor)
+        quantis = histograma.quantis()
+        for quantil, esperado in ((0.5, 50000), (0.99, 99000), (0.999, 99900)):
+            self.assertAlmostEqual(quantis[quantil] / esperado, 1, delta=2 ** -7)
+        self.assertEqual((histograma.total, histograma.maximo), (100000, 100000))
+        # Poucos buckets para 100 mil valores distintos
+        self.assertLess(len(histograma.contagens), 1500)
+
+    def test_escala(self):
+        """Testa valores fracionários registrados em microssegundos."""
+        histograma = HistogramaHDR(escala=1e-6)
+        histograma.observar(0.25)
+        self.assertAlmostEqual(histograma.quantis()[0.5], 0.25, delta=0.25 * 2 ** -7)
+
+
+@override_settings(METRICAS_TOKEN=TOKEN)
+class InstrumentacaoMiddlewareTest(APITestCase):
+    """Testes para a coleta por endpoint e o endpoint /metrics."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        registro.limpar()
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        sala = Sala.objects.create(nome='Sala 1', capacidade=10, preco_hora=Decimal('100.00'))
+        inicio = timezone.now() + timedelta(days=1)
+        Agendamento.objects.create(
+            sala=sala, cliente=self.user, horario_inicio=inicio, horario_fim=inicio + timedelta(hours=1)
+        )
+
+    def metricas(self):
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return ler_metricas(response.content.decode())
+
+    def test_medidas_por_endpoint_e_action(self):
+        """Testa consultas, bytes e contagem registrados com o nome da rota e a action."""
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('agendamento-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Lido antes da próxima requisição, que limpa o log de consultas
+        total_consultas = len(consultas)
+
+        metricas = self.metricas()
+        rotulos = '{endpoint="agendamento-list",acao="list"}'
+        self.assertEqual(
+            metricas['studioflow_http_requisicoes_total'
+                     '{endpoint="agendamento-list",acao="list",metodo="GET",status="200"}'],
+            1
+        )
+        self.assertEqual(metricas[f'studioflow_http_consultas_sum{rotulos}'], total_consultas)
+        self.assertEqual(metricas[f'studioflow_http_resposta_bytes_sum{rotulos}'], len(response.content))
+        self.assertEqual(metricas[f'studioflow_http_duracao_segundos_count{rotulos}'], 1)
+        self.assertGreater(metricas[f'studioflow_http_banco_segundos_sum{rotulos}'], 0)
+        self.assertIn('studioflow_http_duracao_segundos{endpoint="agendamento-list",acao="list",quantile="0.99"}',
+                      metricas)
+        self.assertIn('studioflow_hash_pool_trabalhadores', metricas)
+
+    async def test_requisicao_assincrona(self):
+        """Testa que as consultas também são medidas quando o middleware roda em modo assíncrono."""
+        response = await self.async_client.post(
+            reverse('token_obtain_pair'),
+            {'email': 'cliente@test.com', 'password': 'senha123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        linhas = ler_metricas('\n'.join(registro.exportar()))
+        self.assertGreaterEqual(
+            linhas['studioflow_http_consultas_sum{endpoint="token_obtain_pair",acao="post"}'], 1
+        )
+
+    @override_settings(INSTRUMENTACAO_LIMITE_LENTO=0)
+    def test_amostra_de_requisicoes_lentas(self):
+        """Testa que as requisições acima do limite guardam o SQL executado."""
+        self.client.force_authenticate(user=self.user)
+        with self.assertLogs('studioflow.instrumentacao', 'WARNING'):
+            self.client.get(reverse('agendamento-list'))
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(reverse('metrics-lentas'), HTTP_AUTHORIZATION=f'Bearer {TOKEN}')
+        amostra = response.json()['requisicoes'][-1]
+        self.assertEqual((amostra['endpoint'], amostra['acao']), ('agendamento-list', 'list'))
+        self.assertEqual(len(amostra['sql']), amostra['consultas'])
+        self.assertTrue(any('bookings_agendamento' in consulta['sql'] for consulta in amostra['sql']))
+
+    def test_token(self):
+        """Testa que /metrics exige o token e fica desligado sem ele."""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer errado')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        with override_settings(METRICAS_TOKEN=''):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ')
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
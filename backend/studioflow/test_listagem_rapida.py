@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from datetime import timedelta
+
+from bookings.models import Agendamento
+from bookings.serializers import AgendamentoSerializer
+from studios.models import Sala
+from users.models import User
+from studioflow.listagem_rapida import PlanoListagem, obter_plano
+
+
+class PlanoListagemTest(TestCase):
+    """Testes para a compilação do plano de renderização."""
+
+    def test_colunas_do_agendamento(self):
+        """Testa que os campos aninhados viram colunas com o caminho da relação."""
+        plano = obter_plano(AgendamentoSerializer)
+        self.assertIn('sala', plano.colunas)
+        self.assertIn('sala__preco_hora', plano.colunas)
+        self.assertIn('cliente__email', plano.colunas)
+        self.assertNotIn('cliente__password', plano.colunas)
+
+    def test_serializer_incompativel(self):
+        """Testa que campos calculados fazem a listagem usar o serializer."""
+        class SalaComMetodoSerializer(serializers.ModelSerializer):
+            rotulo = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Sala
+                fields = ['id', 'rotulo']
+
+            def get_rotulo(self, obj):
+                return obj.nome
+
+        self.assertIsNone(obter_plano(SalaComMetodoSerializer))
+
+
+class ListagemRapidaTest(APITestCase):
+    """Testes que comparam a listagem rápida com a renderização do serializer."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            nome='Admin Teste',
+            user_type='ADMIN',
+            is_staff=True
+        )
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        sala_inteira = Sala.objects.create(nome='Sala A', capacidade=5, preco_hora=Decimal('100'))
+        sala_centavos = Sala.objects.create(
+            nome='Sala B', capacidade=8, preco_hora=Decimal('87.50'), is_disponivel=False
+        )
+        inicio = timezone.now().replace(microsecond=123456) + timedelta(days=1)
+        for horas, sala in enumerate([sala_inteira, sala_centavos, sala_inteira]):
+            Agendamento.objects.create(
+                sala=sala,
+                cliente=self.cliente,
+                horario_inicio=inicio + timedelta(hours=horas * 2),
+                horario_fim=inicio + timedelta(hours=horas * 2 + 1, minutes=30)
+            )
+        self.client.force_authenticate(user=self.admin)
+
+    def comparar(self, url):
+        """Verifica que as duas renderizações produzem exatamente os mesmos bytes."""
+        renderizar = mock.patch.object(PlanoListagem, 'renderizar', autospec=True, side_effect=PlanoListagem.renderizar)
+        with override_settings(STUDIOFLOW_LISTAGEM_RAPIDA=True), renderizar as plano:
+            rapida = self.client.get(url)
+        self.assertTrue(plano.called)
+        # As respostas de salas ficam no cache (studios.cache); sem a configuração, a listagem usa o serializer
+        cache.clear()
+        with renderizar as plano:
+            normal = self.client.get(url)
+        self.assertFalse(plano.called)
+        self.assertEqual(rapida.status_code, 200)
+        self.assertEqual(rapida.content, normal.content)
+        return rapida
+
+    def test_listagem_de_agendamentos_identica(self):
+        """Testa a listagem de agendamentos, com salas e clientes aninhados."""
+        response = self.comparar(reverse('agendamento-list'))
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['results'][0]['sala_detail']['preco_hora'], '100.00')
+
+    def test_listagem_com_filtros_e_ordenacao_identica(self):
+        """Testa que filtros, ordenação e paginação são aplicados às linhas."""
+        self.comparar(reverse('agendamento-list') + '?ordering=horario_fim&status=PENDENTE')
+        self.comparar(reverse('agendamento-list') + '?search=Sala B')
+        self.comparar(reverse('sala-list') + '?ordering=-preco_hora')
+
+    def test_listagem_de_salas_identica(self):
+        """Testa a listagem de salas, inclusive para usuários anônimos."""
+        self.client.force_authenticate(user=None)
+        response = self.comparar(reverse('sala-list'))
+        self.assertEqual(response.data['count'], 2)
+
+    @override_settings(TIME_ZONE='America/Sao_Paulo')
+    def test_fuso_ativo_identico(self):
+        """Testa que os horários são convertidos para o fuso ativo como no serializer."""
+        response = self.comparar(reverse('agendamento-list'))
+        self.assertTrue(response.data['results'][0]['horario_inicio'].endswith('-03:00'))
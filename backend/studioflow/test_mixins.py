@@ -0,0 +1,94 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from datetime import timedelta
+
+from bookings.models import Agendamento
+from studios.models import Sala
+from users.models import User
+
+
+class GetCondicionalTest(APITestCase):
+    """Testes para as respostas 304 dos ViewSets com GetCondicionalMixin."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        self.sala = Sala.objects.create(nome='Sala Teste', capacidade=10, preco_hora=Decimal('100.00'))
+        inicio = timezone.now() + timedelta(days=1)
+        self.agendamento = Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=inicio,
+            horario_fim=inicio + timedelta(hours=1)
+        )
+        self.client.force_authenticate(user=self.cliente)
+
+    def assertNaoModificado(self, url):
+        """Verifica que a segunda requisição, com o ETag da primeira, recebe 304."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        # Apenas a consulta que calcula a versão
+        self.assertEqual(len(contexto.captured_queries), 1)
+        return etag
+
+    def test_endpoints_respondem_304(self):
+        """Testa as listagens e os endpoints consultados pelo PWA."""
+        for nome in ('agendamento-list', 'subscription-current', 'user-me'):
+            with self.subTest(endpoint=nome):
+                self.assertNaoModificado(reverse(nome))
+        self.assertNaoModificado(reverse('agendamento-detail', kwargs={'pk': self.agendamento.pk}))
+
+    def test_alteracao_muda_etag(self):
+        """Testa que alterar um agendamento, sua sala ou o usuário muda o ETag."""
+        url = reverse('agendamento-list')
+        etag = self.assertNaoModificado(url)
+
+        for objeto in (self.agendamento, self.sala, self.cliente):
+            objeto.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotEqual(response['ETag'], etag)
+            etag = response['ETag']
+
+    def test_exclusao_muda_etag(self):
+        """Testa que excluir uma linha muda o ETag, mesmo sem alterar o máximo."""
+        outro = Agendamento.objects.create(
+            sala=self.sala,
+            cliente=self.cliente,
+            horario_inicio=self.agendamento.horario_inicio - timedelta(hours=2),
+            horario_fim=self.agendamento.horario_inicio - timedelta(hours=1)
+        )
+        url = reverse('agendamento-list')
+        etag = self.assertNaoModificado(url)
+
+        outro.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_depende_do_usuario_e_dos_parametros(self):
+        """Testa que o ETag não é compartilhado entre usuários nem entre URLs."""
+        url = reverse('user-me')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'page': 2})['ETag'], etag)
+
+        outro = User.objects.create_user(email='outro@test.com', nome='Outro', user_type='CLIENTE')
+        self.client.force_authenticate(user=outro)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['email'], 'outro@test.com')
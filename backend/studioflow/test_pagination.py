@@ -0,0 +1,122 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from decimal import Decimal
+from datetime import timedelta
+
+from bookings.models import Agendamento
+from studios.models import Sala
+from users.models import User
+
+
+class PaginacaoPorCursorTest(APITestCase):
+    """Testes para a paginação por cursor das listagens."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            nome='Admin Teste',
+            user_type='ADMIN',
+            is_staff=True
+        )
+        self.cliente = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            user_type='CLIENTE'
+        )
+        salas = [
+            Sala.objects.create(nome=f'Sala {i}', capacidade=10, preco_hora=Decimal('100.00'))
+            for i in range(3)
+        ]
+        # Vários agendamentos com o mesmo horário de início, em salas diferentes
+        inicio = timezone.now() + timedelta(days=1)
+        for hora in range(8):
+            for sala in salas:
+                Agendamento.objects.create(
+                    sala=sala,
+                    cliente=self.cliente,
+                    horario_inicio=inicio + timedelta(hours=hora),
+                    horario_fim=inicio + timedelta(hours=hora, minutes=30)
+                )
+        self.url = reverse('agendamento-list')
+        self.client.force_authenticate(user=self.admin)
+
+    def percorrer(self, url):
+        """Segue os links ``next`` e retorna os ids de todas as páginas."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_paginacao_por_numero_continua_padrao(self):
+        """Testa que sem o parâmetro cursor a resposta mantém o formato por página."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 24)
+        self.assertEqual(len(response.data['results']), 10)
+
+        # O tamanho da página só pode ser escolhido no modo por cursor
+        response = self.client.get(self.url + '?page_size=20')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_percorre_todos_os_agendamentos_sem_repetir(self):
+        """Testa que as páginas seguem -horario_inicio com desempate pelo id."""
+        ids = self.percorrer(self.url + '?cursor=&page_size=5')
+        esperados = list(
+            Agendamento.objects.order_by('-horario_inicio', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, esperados)
+
+    def test_sem_contagem_por_padrao(self):
+        """Testa que o modo por cursor não executa COUNT, a não ser que seja pedido."""
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(self.url + '?cursor=')
+        self.assertNotIn('count', response.data)
+        # A única agregação é a do ETag (GetCondicionalMixin), que também usa MAX
+        contagens = [c['sql'] for c in contexto.captured_queries if 'COUNT(' in c['sql']]
+        self.assertTrue(all('MAX(' in sql for sql in contagens))
+
+        response = self.client.get(self.url + '?cursor=&com_total=1')
+        self.assertEqual(response.data['count'], 24)
+
+    def test_pagina_profunda_com_mesmo_numero_de_consultas(self):
+        """Testa que uma página profunda custa o mesmo número de consultas que a primeira."""
+        with CaptureQueriesContext(connection) as primeira:
+            response = self.client.get(self.url + '?cursor=&page_size=2')
+        url = response.data['next']
+        for _ in range(8):
+            url = self.client.get(url).data['next']
+        with CaptureQueriesContext(connection) as profunda:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(len(profunda.captured_queries), len(primeira.captured_queries))
+
+    def test_link_anterior(self):
+        """Testa que o link previous volta para a página anterior."""
+        primeira = self.client.get(self.url + '?cursor=&page_size=7')
+        self.assertIsNone(primeira.data['previous'])
+        segunda = self.client.get(primeira.data['next'])
+        volta = self.client.get(segunda.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in volta.data['results']],
+            [item['id'] for item in primeira.data['results']]
+        )
+        self.assertIsNone(volta.data['previous'])
+
+    def test_cursor_invalido(self):
+        """Testa que um cursor malformado retorna 404."""
+        response = self.client.get(self.url + '?cursor=nao-e-um-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_usuarios_ordenados_por_nome(self):
+        """Testa a paginação dos usuários por nome, com nomes repetidos."""
+        for i in range(6):
+            User.objects.create_user(email=f'repetido{i}@test.com', nome='Mesmo Nome')
+        ids = self.percorrer(reverse('user-list') + '?cursor=&page_size=4')
+        self.assertEqual(ids, list(User.objects.order_by('nome', 'id').values_list('id', flat=True)))
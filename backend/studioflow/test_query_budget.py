@@ -0,0 +1,79 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from decimal import Decimal
+from datetime import timedelta
+
+from bookings.models import Agendamento
+from studios.models import Sala
+from users.models import User
+
+
+# Número máximo de consultas por requisição de cada endpoint de listagem.
+# O valor não pode depender da quantidade de registros na página (N+1).
+# Além da contagem e da página, cada listagem calcula a versão usada no ETag
+# (GetCondicionalMixin e, nas salas, studios.cache quando não há cache).
+ORCAMENTO_CONSULTAS = {
+    'agendamento-list': 3,
+    'sala-list': 3,
+    'user-list': 3,
+    'subscription-list': 3,
+}
+
+
+class OrcamentoConsultasListagemTest(APITestCase):
+    """Testes que garantem um número fixo de consultas nas listagens da API."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.admin = User.objects.create_user(
+            email='admin@test.com',
+            nome='Admin Teste',
+            user_type='ADMIN',
+            is_staff=True
+        )
+        self.inicio = timezone.now() + timedelta(days=1)
+        self.criados = 0
+        self.client.force_authenticate(user=self.admin)
+
+    def criar_registros(self, quantidade):
+        """Cria salas, clientes (com assinatura) e agendamentos distintos."""
+        for _ in range(quantidade):
+            self.criados += 1
+            sala = Sala.objects.create(
+                nome=f'Sala {self.criados}',
+                capacidade=10,
+                preco_hora=Decimal('100.00')
+            )
+            cliente = User.objects.create_user(
+                email=f'cliente{self.criados}@test.com',
+                nome=f'Cliente {self.criados}',
+                user_type='CLIENTE'
+            )
+            Agendamento.objects.create(
+                sala=sala,
+                cliente=cliente,
+                horario_inicio=self.inicio + timedelta(hours=self.criados),
+                horario_fim=self.inicio + timedelta(hours=self.criados + 1)
+            )
+
+    def contar_consultas(self, nome_url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(reverse(nome_url))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(contexto.captured_queries)
+
+    def test_listagens_respeitam_orcamento(self):
+        """Testa que cada listagem respeita o orçamento, com uma ou várias linhas."""
+        self.criar_registros(1)
+        com_uma_linha = {nome: self.contar_consultas(nome) for nome in ORCAMENTO_CONSULTAS}
+
+        self.criar_registros(9)
+        for nome, orcamento in ORCAMENTO_CONSULTAS.items():
+            with self.subTest(endpoint=nome):
+                consultas = self.contar_consultas(nome)
+                self.assertLessEqual(consultas, orcamento)
+                self.assertEqual(consultas, com_uma_linha[nome])
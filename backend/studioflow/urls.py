@@ -24,6 +24,7 @@ from rest_framework_simplejwt.views import (
     TokenVerifyView,
 )
 from users.views import CustomTokenObtainPairView
+from studioflow.instrumentacao import metricas, requisicoes_lentas
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
@@ -55,6 +56,10 @@ urlpatterns = [
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/verify/', TokenVerifyView.as_view(), name='token_verify'),
     
+    # Métricas no formato do Prometheus
+    path('metrics', metricas, name='metrics'),
+    path('metrics/lentas', requisicoes_lentas, name='metrics-lentas'),
+    
     # API Auth
     path('api/auth/', include('rest_framework.urls')),
     
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class StudiosConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "studios"
+
+    def ready(self):
+        """Importa os signals quando o app é carregado."""
+        import studios.signals
@@ -0,0 +1,122 @@
+"""
+Cache das respostas públicas de salas.
+
+As respostas de ``list`` e ``retrieve`` do ``SalaViewSet`` são guardadas no
+cache ``default`` (memória local por padrão, ou um servidor compatível com o
+protocolo Redis, conforme ``CACHE_BACKEND``/``CACHE_LOCATION``). As chaves
+incluem uma versão que os signals de ``Sala`` incrementam a cada alteração,
+o que invalida de uma só vez todas as respostas guardadas.
+
+As respostas também levam ``ETag`` e ``Last-Modified`` calculados a partir de
+``data_atualizacao``, e requisições condicionais recebem 304 sem que nada seja
+serializado.
+
+Atenção: ``QuerySet.update()`` e ``bulk_create()`` não disparam signals; quem
+usar essas operações deve chamar ``invalidar_salas()``.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+CHAVE_VERSAO = 'studios:salas:versao'
+
+
+def versao_salas():
+    """Retorna a versão atual das salas, criando-a se ainda não existir."""
+    versao = cache.get(CHAVE_VERSAO)
+    if versao is None:
+        # Começa de um valor único para não reaproveitar chaves de uma versão
+        # anterior que tenha sido descartada do cache
+        cache.add(CHAVE_VERSAO, time.time_ns(), timeout=None)
+        versao = cache.get(CHAVE_VERSAO)
+    return versao
+
+
+def invalidar_salas():
+    """Descarta todas as respostas de salas guardadas no cache."""
+    try:
+        cache.incr(CHAVE_VERSAO)
+    except ValueError:
+        cache.set(CHAVE_VERSAO, time.time_ns(), timeout=None)
+
+
+class CacheDeRespostaMixin:
+    """Guarda em cache as respostas de ``list``/``retrieve`` e responde a GETs condicionais.
+
+    Só os parâmetros que alteram a resposta (filtros do ``filterset_class``,
+    busca, ordenação, paginação e formato) fazem parte da chave; a ordem em que
+    aparecem e parâmetros desconhecidos são ignorados.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._responder_com_cache(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._responder_com_cache(request, super().retrieve, *args, **kwargs)
+
+    def _parametros_da_chave(self):
+        nomes = {api_settings.URL_FORMAT_OVERRIDE, api_settings.SEARCH_PARAM, api_settings.ORDERING_PARAM}
+        filterset_class = getattr(self, 'filterset_class', None)
+        if filterset_class is not None:
+            nomes.update(filterset_class.base_filters)
+        paginator = self.paginator
+        if paginator is not None:
+            for atributo in ('page_query_param', 'page_size_query_param', 'cursor_query_param',
+                             'tamanho_query_param', 'total_query_param'):
+                if getattr(paginator, atributo, None):
+                    nomes.add(getattr(paginator, atributo))
+        return nomes
+
+    def _chave_cache(self, request):
+        nomes = self._parametros_da_chave()
+        parametros = sorted(
+            (nome, valores) for nome, valores in request.query_params.lists() if nome in nomes
+        )
+        # Os links de paginação usam o host, e o formato depende do renderer negociado
+        identificacao = repr((
+            self.action, self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            request.get_host(), request.accepted_renderer.format, parametros
+        ))
+        resumo = hashlib.md5(identificacao.encode('utf-8')).hexdigest()
+        return f'studios:salas:{versao_salas()}:{resumo}'
+
+    def _validadores(self, chave):
+        """Calcula ETag e Last-Modified a partir do ``data_atualizacao`` das linhas da resposta."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup]})
+        resumo = queryset.order_by().aggregate(ultima=Max('data_atualizacao'), total=Count('pk'))
+        ultima = resumo['ultima']
+        etag = hashlib.md5(
+            f'{chave}:{resumo["total"]}:{ultima.isoformat() if ultima else ""}'.encode('utf-8')
+        ).hexdigest()
+        return f'"{etag}"', int(ultima.timestamp()) if ultima else None
+
+    def _responder_com_cache(self, request, acao, *args, **kwargs):
+        chave = self._chave_cache(request)
+        entrada = cache.get(chave)
+        if entrada is None:
+            response = acao(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            etag, ultima = self._validadores(chave)
+            entrada = {'data': response.data, 'etag': etag, 'ultima_modificacao': ultima}
+            cache.set(chave, entrada, getattr(settings, 'STUDIOS_CACHE_TIMEOUT', 300))
+        else:
+            response = Response(entrada['data'])
+
+        response['ETag'] = entrada['etag']
+        if entrada['ultima_modificacao'] is not None:
+            response['Last-Modified'] = http_date(entrada['ultima_modificacao'])
+        return get_conditional_response(
+            request, etag=entrada['etag'], last_modified=entrada['ultima_modificacao'], response=response
+        )
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidar_salas
+from .models import Sala
+
+
+@receiver([post_save, post_delete], sender=Sala)
+def invalidar_cache_salas(sender, instance, **kwargs):
+    """Descarta as respostas de salas guardadas no cache."""
+    invalidar_salas()
+    # Invalida de novo após o commit, descartando respostas geradas antes da confirmação
+    transaction.on_commit(invalidar_salas)
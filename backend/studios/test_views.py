@@ -3,6 +3,8 @@ from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from decimal import Decimal
 import json
 
@@ -354,4 +356,76 @@ class SalaViewSetTest(APITestCase):
         expected_fields = ['id', 'nome', 'descricao', 'capacidade', 'preco_hora', 
                           'is_disponivel', 'data_criacao', 'data_atualizacao']
         for field in expected_fields:
-            self.assertIn(field, response.data)
\ No newline at end of file
+            self.assertIn(field, response.data)
+
+
+class SalaCacheTest(APITestCase):
+    """Testes para o cache das respostas públicas de salas."""
+    
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.sala = Sala.objects.create(
+            nome='Sala Cache',
+            capacidade=10,
+            preco_hora=Decimal('100.00')
+        )
+        self.list_url = reverse('sala-list')
+        self.detail_url = reverse('sala-detail', kwargs={'pk': self.sala.pk})
+    
+    def test_segunda_listagem_sem_consultas(self):
+        """Testa que a mesma listagem, com parâmetros em outra ordem, vem do cache."""
+        primeira = self.client.get(self.list_url, {'capacidade_min': 5, 'ordering': 'nome'})
+        
+        with CaptureQueriesContext(connection) as contexto:
+            segunda = self.client.get(self.list_url + '?ordering=nome&capacidade_min=5&_=123')
+        
+        self.assertEqual(len(contexto.captured_queries), 0)
+        self.assertEqual(segunda.content, primeira.content)
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+        self.assertIn('Last-Modified', segunda)
+    
+    def test_parametros_diferentes_nao_compartilham_cache(self):
+        """Testa que filtros diferentes geram respostas diferentes."""
+        self.client.get(self.list_url)
+        response = self.client.get(self.list_url, {'capacidade_min': 50})
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_alteracao_invalida_cache(self):
+        """Testa que salvar ou excluir uma sala descarta as respostas guardadas."""
+        antes = self.client.get(self.list_url)
+        
+        self.sala.nome = 'Sala Renomeada'
+        self.sala.save()
+        depois = self.client.get(self.list_url)
+        self.assertEqual(depois.data['results'][0]['nome'], 'Sala Renomeada')
+        self.assertNotEqual(depois['ETag'], antes['ETag'])
+        
+        self.sala.delete()
+        self.assertEqual(self.client.get(self.list_url).data['count'], 0)
+    
+    def test_if_none_match_retorna_304(self):
+        """Testa que o ETag da resposta permite GETs condicionais."""
+        for url in (self.list_url, self.detail_url):
+            etag = self.client.get(url)['ETag']
+            
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b'')
+            
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='"outro"')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_if_modified_since_retorna_304(self):
+        """Testa que o Last-Modified derivado de data_atualizacao permite GETs condicionais."""
+        ultima_modificacao = self.client.get(self.detail_url)['Last-Modified']
+        
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=ultima_modificacao)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_sala_inexistente_nao_e_guardada(self):
+        """Testa que respostas de erro não são guardadas no cache."""
+        url = reverse('sala-detail', kwargs={'pk': self.sala.pk + 1})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        Sala.objects.create(nome='Nova', capacidade=5, preco_hora=Decimal('50.00'))
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
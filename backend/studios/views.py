@@ -2,10 +2,12 @@ from rest_framework import viewsets, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Sala
 from .serializers import SalaSerializer
+from .cache import CacheDeRespostaMixin
 from .filters import SalaFilter
+from studioflow.listagem_rapida import ListagemRapidaMixin
 
 
-class SalaViewSet(viewsets.ModelViewSet):
+class SalaViewSet(CacheDeRespostaMixin, ListagemRapidaMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar salas de estúdio."""
     
     queryset = Sala.objects.all()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Subscription
+from .models import Subscription, WebhookEvento
 
 
 @admin.register(Subscription)
@@ -89,4 +89,14 @@ class SubscriptionAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         """Otimiza a query para incluir dados do usuário."""
-        return super().get_queryset(request).select_related('usuario')
\ No newline at end of file
+        return super().get_queryset(request).select_related('usuario')
+
+
+@admin.register(WebhookEvento)
+class WebhookEventoAdmin(admin.ModelAdmin):
+    """Admin para as notificações recebidas pelo webhook do Mercado Pago."""
+
+    list_display = ['topico', 'recurso_id', 'status', 'tentativas', 'data_recebimento', 'data_processamento']
+    list_filter = ['status', 'topico']
+    search_fields = ['recurso_id', 'evento_id']
+    readonly_fields = ['payload', 'data_recebimento', 'data_processamento', 'ultimo_erro']
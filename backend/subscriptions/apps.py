@@ -10,5 +10,6 @@ class SubscriptionsConfig(AppConfig):
     verbose_name = _('Assinaturas')
 
     def ready(self):
-        """Importa os signals quando o app é carregado."""
-        import subscriptions.signals
\ No newline at end of file
+        """Importa os signals e carrega o catálogo de planos quando o app é carregado."""
+        import subscriptions.signals
+        import subscriptions.planos
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Transições de status das assinaturas vencidas.
+
+``expirar_assinaturas`` aplica, em lotes, as transições que antes só eram
+percebidas ao ler cada assinatura:
+
+* TRIAL com ``trial_end`` vencido -> PAST_DUE (ou CANCELED, se o cancelamento
+  foi pedido com ``cancel_at_period_end``);
+* ACTIVE com ``current_period_end`` vencido -> PAST_DUE (ou CANCELED).
+
+Cada lote é um ``SELECT`` limitado pelos índices (status, trial_end) e
+(status, current_period_end) seguido de um ``UPDATE`` pelas chaves, sem
+instanciar os modelos. O ``UPDATE`` repete o filtro, de modo que uma
+assinatura renovada (por um webhook, por exemplo) entre o ``SELECT`` e o
+``UPDATE`` é preservada. Como o ``UPDATE`` não dispara os signals, os direitos
+de acesso e as claims de autenticação dos usuários cujas linhas de fato
+mudaram são atualizados aqui, uma vez por lote.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from users.authentication import invalidar_autenticacao_em_lote
+
+from .direitos import desativar_direitos
+from .models import Subscription
+
+Status = Subscription.StatusSubscription
+
+
+def _transicoes(agora):
+    """Retorna (nome, filtro, novos valores) de cada transição."""
+    trial_vencido = Q(status=Status.TRIAL, trial_end__lt=agora)
+    periodo_vencido = Q(status=Status.ACTIVE, current_period_end__lt=agora)
+    # Preserva a data do pedido de cancelamento, quando houver
+    cancelamento = {'status': Status.CANCELED, 'canceled_at': Coalesce('canceled_at', Value(agora))}
+    atraso = {'status': Status.PAST_DUE}
+    return [
+        ('trial_cancelado', trial_vencido & Q(cancel_at_period_end=True), cancelamento),
+        ('trial_vencido', trial_vencido & Q(cancel_at_period_end=False), atraso),
+        ('periodo_cancelado', periodo_vencido & Q(cancel_at_period_end=True), cancelamento),
+        ('periodo_vencido', periodo_vencido & Q(cancel_at_period_end=False), atraso),
+    ]
+
+
+def _selecionar_lote(filtro, chunk):
+    """Retorna as chaves das até ``chunk`` primeiras assinaturas que atendem ao filtro."""
+    return list(Subscription.objects.filter(filtro).order_by('pk').values_list('pk', flat=True)[:chunk])
+
+
+def _aplicar(filtro, valores, agora, chunk):
+    """Aplica uma transição em lotes de ``chunk`` linhas; retorna quantas mudaram."""
+    total = 0
+    while True:
+        with transaction.atomic():
+            lote = _selecionar_lote(filtro, chunk)
+            if not lote:
+                return total
+            # O filtro é repetido para não sobrescrever linhas alteradas desde o SELECT
+            total += Subscription.objects.filter(filtro, pk__in=lote).update(data_atualizacao=agora, **valores)
+            # Apenas as linhas alteradas por este UPDATE: as demais mudaram por outro caminho
+            usuarios = list(
+                Subscription.objects.filter(pk__in=lote, status=valores['status'], data_atualizacao=agora)
+                .values_list('usuario_id', flat=True)
+            )
+            # Nenhuma das transições mantém a assinatura ativa
+            desativar_direitos(usuarios)
+        invalidar_autenticacao_em_lote(usuarios)
+        if len(lote) < chunk:
+            return total
+
+
+def expirar_assinaturas(agora=None, chunk=None):
+    """Aplica todas as transições vencidas até ``agora``; retorna a contagem por transição."""
+    agora = agora or timezone.now()
+    chunk = chunk or getattr(settings, 'SUBSCRIPTIONS_CICLO_CHUNK', 5000)
+    return {
+        nome: _aplicar(filtro, valores, agora, chunk)
+        for nome, filtro, valores in _transicoes(agora)
+    }
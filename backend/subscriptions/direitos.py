@@ -0,0 +1,145 @@
+"""
+Direitos de acesso por plano.
+
+``DireitoDeAcesso`` é uma projeção da assinatura (plano, ativo, válido até),
+atualizada pelos signals a cada ``Subscription.save`` (inclusive ``cancel``,
+``reactivate`` e o processamento dos webhooks) e em lote por
+``subscriptions.ciclo``. ``obter_direito`` a consulta por usuário, guardando o
+resultado em um LRU local ao processo por ``SUBSCRIPTIONS_DIREITOS_TTL``
+segundos; ``valido_ate`` é comparado na leitura, então o fim de um trial ou de
+um período vale imediatamente, mesmo sem a varredura em lote.
+
+``ExigePlano`` e ``exige_plano`` usam a projeção como permissão do DRF. Com a
+autenticação por claims (``users.authentication``), o direito já vem do token
+em ``user.direito`` e a verificação não consulta o banco nem o LRU.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.permissions import BasePermission
+
+from .models import DireitoDeAcesso, Subscription
+
+MAXIMO_DIREITOS_LOCAIS = 10000
+
+# Planos superiores incluem as funcionalidades dos inferiores
+NIVEL_DO_PLANO = {
+    Subscription.PlanSubscription.BASIC: 1,
+    Subscription.PlanSubscription.PRO: 2,
+}
+
+_direitos_locais = OrderedDict()
+_lock = threading.Lock()
+
+
+class Direito(namedtuple('Direito', 'plano ativo valido_ate')):
+    """Direito de acesso de um usuário, como guardado no cache."""
+
+    __slots__ = ()
+
+    def vigente(self, agora=None):
+        """Se a assinatura dá acesso neste momento."""
+        return self.ativo and (self.valido_ate is None or self.valido_ate > (agora or timezone.now()))
+
+    def inclui(self, plano):
+        """Se o plano do usuário dá acesso às funcionalidades de ``plano``."""
+        return NIVEL_DO_PLANO.get(self.plano, 0) >= NIVEL_DO_PLANO[plano]
+
+
+def projetar(assinatura):
+    """Retorna os campos de ``DireitoDeAcesso`` para a assinatura."""
+    if assinatura.status == Subscription.StatusSubscription.TRIAL:
+        valido_ate = assinatura.trial_end
+    elif assinatura.status == Subscription.StatusSubscription.ACTIVE:
+        valido_ate = assinatura.current_period_end
+    else:
+        valido_ate = None
+    return {'plano': assinatura.plan_id, 'ativo': assinatura.is_active, 'valido_ate': valido_ate}
+
+
+def atualizar_direito(assinatura):
+    """Grava a projeção da assinatura e descarta a cópia local."""
+    DireitoDeAcesso.objects.update_or_create(usuario_id=assinatura.usuario_id, defaults=projetar(assinatura))
+    invalidar_direito(assinatura.usuario_id)
+
+
+def desativar_direitos(user_ids):
+    """Marca como inativos os direitos dos usuários (assinaturas alteradas em lote)."""
+    DireitoDeAcesso.objects.filter(usuario_id__in=user_ids).update(ativo=False, data_atualizacao=timezone.now())
+    user_ids = set(user_ids)
+    with _lock:
+        for user_id in user_ids & _direitos_locais.keys():
+            del _direitos_locais[user_id]
+
+
+def invalidar_direito(user_id):
+    """Descarta a cópia local do direito do usuário."""
+    with _lock:
+        _direitos_locais.pop(user_id, None)
+
+
+def limpar_cache_direitos():
+    """Descarta os direitos guardados neste processo."""
+    with _lock:
+        _direitos_locais.clear()
+
+
+def obter_direito(user_id):
+    """Retorna o ``Direito`` do usuário, ou None se ele não tem assinatura."""
+    agora = time.monotonic()
+    with _lock:
+        entrada = _direitos_locais.get(user_id)
+        if entrada is not None and entrada[0] >= agora:
+            _direitos_locais.move_to_end(user_id)
+            return entrada[1]
+
+    valores = DireitoDeAcesso.objects.filter(usuario_id=user_id).values_list('plano', 'ativo', 'valido_ate').first()
+    direito = Direito(*valores) if valores else None
+    ttl = getattr(settings, 'SUBSCRIPTIONS_DIREITOS_TTL', 30)
+    with _lock:
+        _direitos_locais[user_id] = (agora + ttl, direito)
+        _direitos_locais.move_to_end(user_id)
+        while len(_direitos_locais) > MAXIMO_DIREITOS_LOCAIS:
+            _direitos_locais.popitem(last=False)
+    return direito
+
+
+def direito_do_usuario(user):
+    """Retorna o direito resolvido na autenticação ou, na falta dele, o da projeção."""
+    if hasattr(user, 'direito'):
+        return user.direito
+    return obter_direito(user.pk)
+
+
+class ExigePlano(BasePermission):
+    """
+    Libera a view para usuários com assinatura vigente de ``plano`` ou superior.
+
+    Sem ``plano``, basta uma assinatura vigente. A equipe (``is_staff``) não
+    passa pela verificação.
+    """
+
+    plano = None
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not (user and user.is_authenticated):
+            return False
+        if user.is_staff:
+            return True
+        direito = direito_do_usuario(user)
+        if direito is None or not direito.vigente():
+            self.message = 'Esta funcionalidade requer uma assinatura ativa.'
+            return False
+        if self.plano and not direito.inclui(self.plano):
+            self.message = f'Esta funcionalidade requer o plano {Subscription.PlanSubscription(self.plano).label}.'
+            return False
+        return True
+
+
+def exige_plano(plano):
+    """Retorna a permissão ``ExigePlano`` para ``plano``, para uso em ``permission_classes``."""
+    return type(f'ExigePlano_{plano}', (ExigePlano,), {'plano': plano})
@@ -0,0 +1,88 @@
+"""
+Acesso à API do Mercado Pago.
+
+``obter_gateway`` retorna uma instância da classe configurada em
+``SUBSCRIPTIONS_GATEWAY``. ``GatewayMercadoPago`` usa o cliente com pool de
+conexões de ``subscriptions.pagamentos``; ``GatewayFalso`` guarda os recursos
+em memória e registra as consultas, e é o gateway usado nos testes e em
+desenvolvimento sem credenciais.
+"""
+import uuid
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .pagamentos import CircuitoAberto, ErroGateway, obter_cliente  # noqa: F401
+
+
+def montar_preferencia(plano, usuario):
+    """Corpo da preferência de pagamento do ``plano`` para o ``usuario``."""
+    return {
+        'items': [{
+            'id': plano.id,
+            'title': plano.name,
+            'description': plano.description,
+            'quantity': 1,
+            'currency_id': plano.currency,
+            'unit_price': float(plano.price),
+        }],
+        'payer': {'email': usuario.email},
+        # O processamento dos webhooks localiza a assinatura pelo usuário
+        'external_reference': str(usuario.pk),
+    }
+
+
+class GatewayMercadoPago:
+    """Consulta pagamentos e assinaturas e cria preferências na API do Mercado Pago."""
+
+    def __init__(self, cliente=None):
+        self.cliente = cliente or obter_cliente()
+
+    def buscar_pagamento(self, pagamento_id):
+        return self.cliente.buscar_pagamento(pagamento_id)
+
+    def buscar_assinatura(self, assinatura_id):
+        return self.cliente.buscar_assinatura(assinatura_id)
+
+    def criar_preferencia(self, plano, usuario):
+        return self.cliente.criar_preferencia(montar_preferencia(plano, usuario))
+
+
+class GatewayFalso:
+    """Gateway em memória: os recursos são cadastrados com ``registrar``."""
+
+    recursos = {}
+    consultas = []
+
+    @classmethod
+    def registrar(cls, tipo, recurso_id, dados):
+        cls.recursos[(tipo, str(recurso_id))] = dict(dados, id=recurso_id)
+
+    @classmethod
+    def limpar(cls):
+        cls.recursos.clear()
+        cls.consultas.clear()
+
+    def _buscar(self, tipo, recurso_id):
+        self.consultas.append((tipo, str(recurso_id)))
+        return self.recursos.get((tipo, str(recurso_id)))
+
+    def buscar_pagamento(self, pagamento_id):
+        return self._buscar('payment', pagamento_id)
+
+    def buscar_assinatura(self, assinatura_id):
+        return self._buscar('preapproval', assinatura_id)
+
+    def criar_preferencia(self, plano, usuario):
+        preferencia_id = uuid.uuid4().hex
+        self.registrar('preference', preferencia_id, montar_preferencia(plano, usuario))
+        return {
+            'id': preferencia_id,
+            'init_point': f'https://www.mercadopago.com.br/checkout/v1/redirect?pref_id={preferencia_id}',
+            'sandbox_init_point': f'https://sandbox.mercadopago.com.br/checkout/v1/redirect?pref_id={preferencia_id}',
+        }
+
+
+def obter_gateway():
+    """Instancia o gateway configurado em ``SUBSCRIPTIONS_GATEWAY``."""
+    return import_string(settings.SUBSCRIPTIONS_GATEWAY)()
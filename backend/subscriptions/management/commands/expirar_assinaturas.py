@@ -0,0 +1,38 @@
+"""
+Django command to expire trials and subscription periods
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.ciclo import expirar_assinaturas
+
+
+class Command(BaseCommand):
+    """Django command to apply the pending subscription status transitions"""
+
+    help = (
+        'Move para PAST_DUE ou CANCELED as assinaturas com trial ou período vencido, '
+        'em lotes. Com --continuo, repete a varredura a cada intervalo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk', type=int, default=None, help='Assinaturas alteradas por lote.')
+        parser.add_argument('--continuo', action='store_true', help='Repete a varredura indefinidamente.')
+        parser.add_argument(
+            '--intervalo', type=float, default=300,
+            help='Segundos entre as varreduras (com --continuo).'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        while True:
+            inicio = time.perf_counter()
+            resultado = expirar_assinaturas(chunk=options['chunk'])
+            resumo = ', '.join(f'{nome}: {total}' for nome, total in resultado.items())
+            self.stdout.write(self.style.SUCCESS(
+                f'{resumo} ({time.perf_counter() - inicio:.1f}s)'
+            ))
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
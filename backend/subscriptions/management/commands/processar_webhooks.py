@@ -0,0 +1,44 @@
+"""
+Django command to process the Mercado Pago notifications received by the webhook
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.processamento import processar_pendentes
+
+
+class Command(BaseCommand):
+    """Django command to process the pending webhook events"""
+
+    help = (
+        'Processa as notificações do Mercado Pago gravadas pelo webhook, consultando '
+        'cada recurso uma única vez por lote. Com --continuo, continua verificando a '
+        'fila a cada intervalo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=None, help='Quantidade máxima de notificações por lote.')
+        parser.add_argument('--continuo', action='store_true', help='Não encerra ao esvaziar a fila.')
+        parser.add_argument(
+            '--intervalo', type=float, default=2,
+            help='Segundos de espera quando não há notificações (com --continuo).'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        total_processados = total_falhas = 0
+        while True:
+            processados, falhas = processar_pendentes(limite=options['lote'])
+            total_processados += processados
+            total_falhas += falhas
+            if processados or falhas:
+                self.stdout.write(f'{processados} recurso(s) processado(s), {falhas} falha(s).')
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fila processada: {total_processados} recurso(s), {total_falhas} falha(s).'
+        ))
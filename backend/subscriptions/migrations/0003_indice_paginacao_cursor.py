@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0002_alter_subscription_trial_end'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['-data_criacao', '-id'], name='subscr_criacao_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:28
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0003_indice_paginacao_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topico', models.CharField(max_length=30, verbose_name='tópico')),
+                ('recurso_id', models.CharField(max_length=100, verbose_name='ID do recurso')),
+                ('evento_id', models.CharField(max_length=100, verbose_name='ID do evento')),
+                ('payload', models.JSONField(default=dict, verbose_name='payload')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSADO', 'Processado'), ('IGNORADO', 'Ignorado'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10, verbose_name='status')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='tentativas')),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now, verbose_name='próxima tentativa')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='último erro')),
+                ('data_recebimento', models.DateTimeField(auto_now_add=True, verbose_name='data de recebimento')),
+                ('data_processamento', models.DateTimeField(blank=True, null=True, verbose_name='data de processamento')),
+            ],
+            options={
+                'verbose_name': 'evento de webhook',
+                'verbose_name_plural': 'eventos de webhook',
+                'ordering': ['data_recebimento', 'id'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='webhook_status_prox_idx'), models.Index(fields=['topico', 'recurso_id', 'status'], name='webhook_recurso_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='webhookevento',
+            constraint=models.UniqueConstraint(fields=('topico', 'recurso_id', 'evento_id'), name='webhook_evento_unico'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0005_indices_ciclo'),
+        ('users', '0005_email_pendente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DireitoDeAcesso',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='direito_de_acesso', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+                ('plano', models.CharField(choices=[('studioflow_basic', 'StudioFlow Básico'), ('studioflow_pro', 'StudioFlow Pro')], max_length=20, verbose_name='plano')),
+                ('ativo', models.BooleanField(default=False, verbose_name='ativo')),
+                ('valido_ate', models.DateTimeField(blank=True, null=True, verbose_name='válido até')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='data de atualização')),
+            ],
+            options={
+                'verbose_name': 'direito de acesso',
+                'verbose_name_plural': 'direitos de acesso',
+            },
+        ),
+    ]
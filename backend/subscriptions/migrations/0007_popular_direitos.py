@@ -0,0 +1,39 @@
+from django.db import migrations
+
+LOTE = 5000
+
+
+def popular_direitos(apps, schema_editor):
+    """Cria a projeção de direitos das assinaturas existentes."""
+    Subscription = apps.get_model('subscriptions', 'Subscription')
+    DireitoDeAcesso = apps.get_model('subscriptions', 'DireitoDeAcesso')
+
+    direitos = []
+    for assinatura in Subscription.objects.order_by('pk').iterator(chunk_size=LOTE):
+        if assinatura.status == 'TRIAL':
+            valido_ate = assinatura.trial_end
+        elif assinatura.status == 'ACTIVE':
+            valido_ate = assinatura.current_period_end
+        else:
+            valido_ate = None
+        direitos.append(DireitoDeAcesso(
+            usuario_id=assinatura.usuario_id,
+            plano=assinatura.plan_id,
+            ativo=assinatura.status in ('TRIAL', 'ACTIVE'),
+            valido_ate=valido_ate,
+        ))
+        if len(direitos) >= LOTE:
+            DireitoDeAcesso.objects.bulk_create(direitos, ignore_conflicts=True)
+            direitos = []
+    DireitoDeAcesso.objects.bulk_create(direitos, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0006_direito_de_acesso'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_direitos, migrations.RunPython.noop),
+    ]
@@ -74,6 +74,13 @@ class Subscription(models.Model):
         verbose_name = _('assinatura')
         verbose_name_plural = _('assinaturas')
         ordering = ['-data_criacao']
+        indexes = [
+            # Paginação por cursor da listagem, com desempate pelo id
+            models.Index(fields=['-data_criacao', '-id'], name='subscr_criacao_id_idx'),
+            # Varreduras de subscriptions.ciclo: trials e períodos vencidos
+            models.Index(fields=['status', 'trial_end'], name='subscr_status_trial_idx'),
+            models.Index(fields=['status', 'current_period_end'], name='subscr_status_periodo_idx'),
+        ]
 
     def __str__(self):
         return f'{self.usuario.email} - {self.get_plan_id_display()} ({self.get_status_display()})'
@@ -117,4 +124,84 @@ class Subscription(models.Model):
         """Reativa uma assinatura cancelada."""
         self.cancel_at_period_end = False
         self.canceled_at = None
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+class WebhookEvento(models.Model):
+    """
+    Notificação do Mercado Pago recebida pelo webhook (inbox).
+
+    O webhook apenas grava a notificação e responde; o comando
+    ``processar_webhooks`` consulta o recurso no gateway e atualiza a assinatura.
+    A restrição única descarta as repetições da mesma notificação.
+    """
+
+    class Status(models.TextChoices):
+        PENDENTE = 'PENDENTE', _('Pendente')
+        PROCESSADO = 'PROCESSADO', _('Processado')
+        IGNORADO = 'IGNORADO', _('Ignorado')
+        FALHOU = 'FALHOU', _('Falhou')
+
+    topico = models.CharField(_('tópico'), max_length=30)
+    recurso_id = models.CharField(_('ID do recurso'), max_length=100)
+    evento_id = models.CharField(_('ID do evento'), max_length=100)
+    payload = models.JSONField(_('payload'), default=dict)
+    status = models.CharField(
+        _('status'),
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDENTE
+    )
+    tentativas = models.PositiveIntegerField(_('tentativas'), default=0)
+    proxima_tentativa = models.DateTimeField(_('próxima tentativa'), default=timezone.now)
+    ultimo_erro = models.TextField(_('último erro'), blank=True)
+    data_recebimento = models.DateTimeField(_('data de recebimento'), auto_now_add=True)
+    data_processamento = models.DateTimeField(_('data de processamento'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('evento de webhook')
+        verbose_name_plural = _('eventos de webhook')
+        ordering = ['data_recebimento', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['topico', 'recurso_id', 'evento_id'], name='webhook_evento_unico'
+            ),
+        ]
+        indexes = [
+            # Busca do worker: pendentes cuja próxima tentativa já chegou
+            models.Index(fields=['status', 'proxima_tentativa'], name='webhook_status_prox_idx'),
+            # Agrupamento das notificações pendentes do mesmo recurso
+            models.Index(fields=['topico', 'recurso_id', 'status'], name='webhook_recurso_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.topico} {self.recurso_id} ({self.get_status_display()})'
+
+
+class DireitoDeAcesso(models.Model):
+    """
+    Projeção da assinatura usada nas verificações de acesso por plano.
+
+    Mantida por ``subscriptions.direitos`` a cada gravação da assinatura, guarda
+    apenas o necessário para liberar ou bloquear uma funcionalidade: plano, se a
+    assinatura está ativa e até quando.
+    """
+
+    usuario = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='direito_de_acesso',
+        verbose_name=_('usuário')
+    )
+    plano = models.CharField(_('plano'), max_length=20, choices=Subscription.PlanSubscription.choices)
+    ativo = models.BooleanField(_('ativo'), default=False)
+    valido_ate = models.DateTimeField(_('válido até'), null=True, blank=True)
+    data_atualizacao = models.DateTimeField(_('data de atualização'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('direito de acesso')
+        verbose_name_plural = _('direitos de acesso')
+
+    def __str__(self):
+        return f'{self.usuario_id} - {self.plano} ({"ativo" if self.ativo else "inativo"})'
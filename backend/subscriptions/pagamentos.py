@@ -0,0 +1,308 @@
+"""
+Cliente HTTP da API do Mercado Pago.
+
+``ClienteMercadoPago`` mantém um pool de conexões keep-alive por processo e
+protege os workers de um gateway lento ou fora do ar:
+
+* cada chamada tem timeout (``MERCADOPAGO_TIMEOUT``);
+* falhas de rede, 429 e 5xx são repetidas com espera exponencial, apenas em
+  chamadas idempotentes (GET, ou POST com ``X-Idempotency-Key``) e dentro de um
+  orçamento de retentativas proporcional ao volume de chamadas, para que uma
+  instabilidade não multiplique a carga sobre o gateway;
+* após ``MERCADOPAGO_CIRCUITO_FALHAS`` falhas seguidas o circuito abre e as
+  chamadas falham de imediato com ``CircuitoAberto`` por
+  ``MERCADOPAGO_CIRCUITO_ESPERA`` segundos, quando uma chamada de teste decide
+  se ele fecha;
+* a latência de cada operação é registrada em histogramas (``metricas``).
+
+``obter_cliente`` retorna o cliente compartilhado do processo.
+``subscriptions.servidor_falso`` implementa a API localmente para os testes.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+
+class ErroGateway(Exception):
+    """Falha ao consultar o Mercado Pago; a operação pode ser repetida."""
+
+
+class ErroRequisicao(ErroGateway):
+    """O Mercado Pago recusou a requisição (4xx)."""
+
+    def __init__(self, status, dados):
+        super().__init__(f'HTTP {status}: {dados}')
+        self.status = status
+        self.dados = dados
+
+
+class CircuitoAberto(ErroGateway):
+    """O circuito está aberto; a chamada nem chegou a ser feita."""
+
+
+class Histograma:
+    """Histograma de latências com limites fixos, em segundos."""
+
+    LIMITES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.contagens = [0] * (len(self.LIMITES) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, segundos):
+        self.contagens[bisect_left(self.LIMITES, segundos)] += 1
+        self.soma += segundos
+        self.total += 1
+
+    def dados(self):
+        """Retorna os buckets acumulados (``le``), a soma e o total."""
+        acumulado, buckets = 0, []
+        for limite, contagem in zip(self.LIMITES + ('+Inf',), self.contagens):
+            acumulado += contagem
+            buckets.append((limite, acumulado))
+        return {'buckets': buckets, 'soma': round(self.soma, 6), 'total': self.total}
+
+
+class Disjuntor:
+    """Circuit breaker: fechado, aberto ou meio aberto (uma chamada de teste)."""
+
+    FECHADO, ABERTO, MEIO_ABERTO = 'fechado', 'aberto', 'meio_aberto'
+
+    def __init__(self, limite_falhas, espera):
+        self.limite_falhas = limite_falhas
+        self.espera = espera
+        self.estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO and time.monotonic() >= self._aberto_em + self.espera:
+                self.estado = self.MEIO_ABERTO
+                return True
+            # Aberto, ou meio aberto com a chamada de teste em andamento
+            return False
+
+    def sucesso(self):
+        with self._lock:
+            self.estado = self.FECHADO
+            self._falhas = 0
+
+    def falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self.estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+
+class OrcamentoDeRetentativas:
+    """Cada chamada deposita ``proporcao`` de retentativa; cada retentativa gasta uma."""
+
+    def __init__(self, proporcao=0.2, maximo=10):
+        self.proporcao = proporcao
+        self.maximo = maximo
+        self.saldo = float(maximo)
+        self._lock = threading.Lock()
+
+    def depositar(self):
+        with self._lock:
+            self.saldo = min(self.saldo + self.proporcao, self.maximo)
+
+    def sacar(self):
+        with self._lock:
+            if self.saldo < 1:
+                return False
+            self.saldo -= 1
+            return True
+
+
+class PoolDeConexoes:
+    """Conexões keep-alive com um único host, reutilizadas na ordem LIFO."""
+
+    def __init__(self, url_base, tamanho, timeout):
+        partes = urlsplit(url_base)
+        self._classe = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        self._host, self._porta = partes.hostname, partes.port
+        self.prefixo = partes.path.rstrip('/')
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self._livres = []
+        self._lock = threading.Lock()
+        self.criadas = 0
+
+    def obter(self):
+        with self._lock:
+            if self._livres:
+                return self._livres.pop()
+            self.criadas += 1
+        return self._classe(self._host, self._porta, timeout=self.timeout)
+
+    def devolver(self, conexao):
+        with self._lock:
+            if len(self._livres) < self.tamanho:
+                self._livres.append(conexao)
+                return
+        conexao.close()
+
+    def fechar(self):
+        with self._lock:
+            livres, self._livres = self._livres, []
+        for conexao in livres:
+            conexao.close()
+
+
+class ClienteMercadoPago:
+    """Cliente da API REST do Mercado Pago; seguro para uso entre threads."""
+
+    def __init__(self, access_token, url_base, timeout=5, tamanho_pool=10, tentativas=3,
+                 limite_falhas=5, espera_circuito=30):
+        self.access_token = access_token
+        self.url_base = url_base
+        self.pool = PoolDeConexoes(url_base, tamanho_pool, timeout)
+        self.tentativas = tentativas
+        self.disjuntor = Disjuntor(limite_falhas, espera_circuito)
+        self.orcamento = OrcamentoDeRetentativas()
+        self._histogramas = {}
+        self._resultados = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, operacao, resultado, segundos):
+        with self._lock:
+            self._histogramas.setdefault(operacao, Histograma()).observar(segundos)
+            chave = (operacao, resultado)
+            self._resultados[chave] = self._resultados.get(chave, 0) + 1
+
+    def _enviar(self, metodo, caminho, corpo, cabecalhos):
+        conexao = self.pool.obter()
+        try:
+            conexao.request(metodo, self.pool.prefixo + caminho, body=corpo, headers=cabecalhos)
+            resposta = conexao.getresponse()
+            conteudo = resposta.read()
+        except BaseException:
+            conexao.close()
+            raise
+        if resposta.will_close:
+            conexao.close()
+        else:
+            self.pool.devolver(conexao)
+        try:
+            dados = json.loads(conteudo) if conteudo else None
+        except ValueError:
+            dados = conteudo.decode('utf-8', 'replace')
+        return resposta.status, dados
+
+    def requisitar(self, metodo, caminho, dados=None, operacao=None, chave_idempotencia=None):
+        """
+        Executa a chamada e retorna o JSON da resposta, ou None para 404.
+
+        Levanta ``ErroRequisicao`` para os demais 4xx, ``CircuitoAberto`` com o
+        circuito aberto e ``ErroGateway`` quando as tentativas se esgotam.
+        """
+        operacao = operacao or f'{metodo} {caminho}'
+        if not self.disjuntor.permitir():
+            self._registrar(operacao, 'circuito_aberto', 0.0)
+            raise CircuitoAberto('Circuito do Mercado Pago aberto')
+
+        cabecalhos = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Accept': 'application/json',
+        }
+        corpo = None
+        if dados is not None:
+            corpo = json.dumps(dados).encode('utf-8')
+            cabecalhos['Content-Type'] = 'application/json'
+        if chave_idempotencia:
+            cabecalhos['X-Idempotency-Key'] = chave_idempotencia
+        idempotente = metodo == 'GET' or bool(chave_idempotencia)
+
+        self.orcamento.depositar()
+        tentativa = 0
+        while True:
+            inicio = time.perf_counter()
+            try:
+                status, resposta = self._enviar(metodo, caminho, corpo, cabecalhos)
+            except (OSError, http.client.HTTPException) as exc:
+                erro = ErroGateway(f'{type(exc).__name__} em {operacao}: {exc}')
+            else:
+                if status < 500 and status != 429:
+                    self._registrar(operacao, str(status), time.perf_counter() - inicio)
+                    self.disjuntor.sucesso()
+                    if status == 404:
+                        return None
+                    if status >= 400:
+                        raise ErroRequisicao(status, resposta)
+                    return resposta
+                erro = ErroGateway(f'HTTP {status} em {operacao}')
+            self._registrar(operacao, 'erro', time.perf_counter() - inicio)
+
+            tentativa += 1
+            if tentativa < self.tentativas and idempotente and self.orcamento.sacar():
+                time.sleep(0.05 * 2 ** (tentativa - 1) * random.uniform(0.5, 1.5))
+                continue
+            self.disjuntor.falha()
+            raise erro
+
+    def buscar_pagamento(self, pagamento_id):
+        return self.requisitar('GET', f'/v1/payments/{pagamento_id}', operacao='buscar_pagamento')
+
+    def buscar_assinatura(self, assinatura_id):
+        return self.requisitar('GET', f'/preapproval/{assinatura_id}', operacao='buscar_assinatura')
+
+    def criar_preferencia(self, preferencia, chave_idempotencia=None):
+        return self.requisitar(
+            'POST', '/checkout/preferences', preferencia, operacao='criar_preferencia',
+            chave_idempotencia=chave_idempotencia or str(uuid.uuid4())
+        )
+
+    def metricas(self):
+        """Estado do circuito, saldo de retentativas, resultados e latências por operação."""
+        with self._lock:
+            return {
+                'circuito': self.disjuntor.estado,
+                'orcamento_retentativas': round(self.orcamento.saldo, 2),
+                'conexoes_criadas': self.pool.criadas,
+                'resultados': {f'{operacao}:{resultado}': total
+                               for (operacao, resultado), total in self._resultados.items()},
+                'latencia': {operacao: histograma.dados() for operacao, histograma in self._histogramas.items()},
+            }
+
+
+_clientes = {}
+_lock_clientes = threading.Lock()
+
+
+def obter_cliente(access_token=None, url_base=None):
+    """Retorna o cliente do processo para as credenciais e URL (padrão: settings)."""
+    access_token = access_token or settings.MERCADOPAGO_ACCESS_TOKEN
+    url_base = (url_base or settings.MERCADOPAGO_API_URL).rstrip('/')
+    with _lock_clientes:
+        cliente = _clientes.get((access_token, url_base))
+        if cliente is None:
+            cliente = _clientes[(access_token, url_base)] = ClienteMercadoPago(
+                access_token,
+                url_base,
+                timeout=settings.MERCADOPAGO_TIMEOUT,
+                tamanho_pool=settings.MERCADOPAGO_POOL_MAXIMO,
+                tentativas=settings.MERCADOPAGO_TENTATIVAS,
+                limite_falhas=settings.MERCADOPAGO_CIRCUITO_FALHAS,
+                espera_circuito=settings.MERCADOPAGO_CIRCUITO_ESPERA,
+            )
+        return cliente
+
+
+def clientes_ativos():
+    """Clientes criados neste processo (para métricas)."""
+    with _lock_clientes:
+        return list(_clientes.values())
@@ -0,0 +1,65 @@
+"""
+Catálogo dos planos de assinatura.
+
+Fonte única dos preços e descrições dos planos, carregada uma vez quando o app
+inicia (``SubscriptionsConfig.ready``). O endpoint público de planos serve
+``CATALOGO_JSON``, já renderizado, com ``CATALOGO_ETAG`` derivado do conteúdo;
+a criação de assinaturas usa ``obter_plano`` para o valor cobrado.
+"""
+import hashlib
+import json
+from collections import namedtuple
+from decimal import Decimal
+
+from .models import Subscription
+
+Plano = namedtuple('Plano', 'id name price currency interval description features')
+
+PLANOS = (
+    Plano(
+        id=Subscription.PlanSubscription.BASIC.value,
+        name='StudioFlow Básico',
+        price=Decimal('19.99'),
+        currency='BRL',
+        interval='month',
+        description='Para quem está começando a organizar os agendamentos do estúdio.',
+        features=(
+            'Agendamento de salas',
+            'Calendário de disponibilidade',
+            'Notificações por email',
+        ),
+    ),
+    Plano(
+        id=Subscription.PlanSubscription.PRO.value,
+        name='StudioFlow Pro',
+        price=Decimal('39.99'),
+        currency='BRL',
+        interval='month',
+        description='Para estúdios com várias salas e maior volume de agendamentos.',
+        features=(
+            'Tudo do plano Básico',
+            'Agendamentos recorrentes',
+            'Exportação de agendamentos',
+            'Relatórios de ocupação',
+        ),
+    ),
+)
+
+_PLANOS_POR_ID = {plano.id: plano for plano in PLANOS}
+
+
+def obter_plano(plan_id):
+    """Retorna o ``Plano`` pelo id; ``KeyError`` se não existir."""
+    return _PLANOS_POR_ID[str(plan_id)]
+
+
+def _renderizar(planos):
+    dados = [
+        dict(plano._asdict(), price=float(plano.price), features=list(plano.features))
+        for plano in planos
+    ]
+    return json.dumps(dados, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+CATALOGO_JSON = _renderizar(PLANOS)
+CATALOGO_ETAG = f'"{hashlib.sha256(CATALOGO_JSON).hexdigest()[:32]}"'
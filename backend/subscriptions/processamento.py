@@ -0,0 +1,176 @@
+"""
+Processamento das notificações do Mercado Pago gravadas pelo webhook.
+
+``processar_pendentes`` (chamado pelo comando ``processar_webhooks``) reserva
+um lote de ``WebhookEvento`` pendentes e os agrupa por recurso: cada pagamento
+ou assinatura é consultado uma única vez no gateway, e o estado retornado, que
+é o mais recente, resolve todas as notificações pendentes daquele recurso
+recebidas até a consulta. Rajadas de notificações para o mesmo recurso custam
+assim uma consulta e uma gravação.
+
+Falhas do gateway reagendam as notificações com espera exponencial, até
+``SUBSCRIPTIONS_WEBHOOK_MAX_TENTATIVAS``.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .gateway import obter_gateway
+from .models import Subscription, WebhookEvento
+
+# Status de pagamento que deixam uma assinatura ativa em atraso
+PAGAMENTO_RECUSADO = ('rejected', 'cancelled', 'refunded', 'charged_back')
+
+STATUS_DA_PREAPPROVAL = {
+    'authorized': Subscription.StatusSubscription.ACTIVE,
+    'paused': Subscription.StatusSubscription.PAST_DUE,
+    'cancelled': Subscription.StatusSubscription.CANCELED,
+}
+
+
+def _espera(tentativas):
+    base = getattr(settings, 'SUBSCRIPTIONS_WEBHOOK_BACKOFF_BASE', 30)
+    return min(base * 2 ** max(tentativas - 1, 0), 6 * 60 * 60)
+
+
+def _data(valor):
+    return parse_datetime(valor) if isinstance(valor, str) else None
+
+
+def _assinatura_do_recurso(dados, mercadopago_id=None):
+    """Localiza (e bloqueia) a assinatura referenciada pelo recurso do gateway."""
+    filtro = Q()
+    # As preferências de pagamento usam o id do usuário como referência externa
+    referencia = str(dados.get('external_reference') or '')
+    if referencia.isdigit():
+        filtro |= Q(usuario_id=int(referencia))
+    mercadopago_id = mercadopago_id or dados.get('preapproval_id') or (dados.get('metadata') or {}).get('preapproval_id')
+    if mercadopago_id:
+        filtro |= Q(mercadopago_subscription_id=str(mercadopago_id))
+    if not filtro:
+        return None
+    return Subscription.objects.select_for_update().filter(filtro).first()
+
+
+def aplicar_pagamento(pagamento):
+    """Atualiza a assinatura conforme o pagamento; retorna se houve alteração."""
+    assinatura = _assinatura_do_recurso(pagamento)
+    if assinatura is None:
+        return False
+
+    situacao = pagamento.get('status')
+    if situacao == 'approved':
+        aprovado_em = _data(pagamento.get('date_approved')) or timezone.now()
+        if assinatura.last_payment_date == aprovado_em:
+            # Pagamento já aplicado
+            return False
+        assinatura.status = Subscription.StatusSubscription.ACTIVE
+        assinatura.last_payment_date = aprovado_em
+        assinatura.current_period_start = aprovado_em
+        assinatura.current_period_end = aprovado_em + timedelta(days=30)
+        assinatura.next_payment_date = assinatura.current_period_end
+        if pagamento.get('payment_method_id'):
+            assinatura.payment_method_id = pagamento['payment_method_id']
+    elif situacao in PAGAMENTO_RECUSADO and assinatura.status == Subscription.StatusSubscription.ACTIVE:
+        assinatura.status = Subscription.StatusSubscription.PAST_DUE
+    else:
+        return False
+
+    assinatura.save()
+    return True
+
+
+def aplicar_assinatura(preapproval):
+    """Atualiza a assinatura conforme a preapproval; retorna se houve alteração."""
+    assinatura = _assinatura_do_recurso(preapproval, mercadopago_id=preapproval.get('id'))
+    novo_status = STATUS_DA_PREAPPROVAL.get(preapproval.get('status'))
+    if assinatura is None or novo_status is None:
+        return False
+
+    assinatura.status = novo_status
+    assinatura.mercadopago_subscription_id = str(preapproval['id'])
+    proximo_pagamento = _data(preapproval.get('next_payment_date'))
+    if proximo_pagamento:
+        assinatura.next_payment_date = proximo_pagamento
+    if novo_status == Subscription.StatusSubscription.CANCELED and not assinatura.canceled_at:
+        assinatura.canceled_at = timezone.now()
+    assinatura.save()
+    return True
+
+
+def _reservar_lote(limite):
+    """Reserva até ``limite`` eventos vencidos, adiando sua próxima tentativa."""
+    agora = timezone.now()
+    reserva = getattr(settings, 'SUBSCRIPTIONS_WEBHOOK_RESERVA', 120)
+    with transaction.atomic():
+        lote = list(
+            WebhookEvento.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvento.Status.PENDENTE, proxima_tentativa__lte=agora)
+            .order_by('proxima_tentativa', 'id')[:limite]
+        )
+        WebhookEvento.objects.filter(pk__in=[evento.pk for evento in lote]).update(
+            proxima_tentativa=agora + timedelta(seconds=reserva)
+        )
+    return lote
+
+
+def _registrar_falha(eventos, exc):
+    maximo_tentativas = getattr(settings, 'SUBSCRIPTIONS_WEBHOOK_MAX_TENTATIVAS', 8)
+    for evento in eventos:
+        evento.tentativas += 1
+        evento.ultimo_erro = f'{type(exc).__name__}: {exc}'
+        if evento.tentativas >= maximo_tentativas:
+            evento.status = WebhookEvento.Status.FALHOU
+        evento.proxima_tentativa = timezone.now() + timedelta(seconds=_espera(evento.tentativas))
+        evento.save(update_fields=['tentativas', 'ultimo_erro', 'status', 'proxima_tentativa'])
+
+
+def processar_pendentes(limite=None, gateway=None):
+    """
+    Processa um lote de notificações pendentes.
+
+    Retorna a quantidade de recursos consultados com sucesso e de falhas.
+    """
+    limite = limite or getattr(settings, 'SUBSCRIPTIONS_WEBHOOK_LOTE', 100)
+    lote = _reservar_lote(limite)
+    if not lote:
+        return 0, 0
+
+    gateway = gateway or obter_gateway()
+    consultas = {
+        'payment': (gateway.buscar_pagamento, aplicar_pagamento),
+        'preapproval': (gateway.buscar_assinatura, aplicar_assinatura),
+    }
+    grupos = OrderedDict()
+    for evento in lote:
+        grupos.setdefault((evento.topico, evento.recurso_id), []).append(evento)
+
+    processados = falhas = 0
+    for (topico, recurso_id), eventos in grupos.items():
+        consultado_em = timezone.now()
+        try:
+            buscar, aplicar = consultas[topico]
+            dados = buscar(recurso_id)
+            with transaction.atomic():
+                alterou = dados is not None and aplicar(dados)
+        except Exception as exc:
+            falhas += 1
+            _registrar_falha(eventos, exc)
+            continue
+
+        processados += 1
+        WebhookEvento.objects.filter(
+            Q(pk__in=[evento.pk for evento in eventos]) |
+            Q(topico=topico, recurso_id=recurso_id, status=WebhookEvento.Status.PENDENTE,
+              data_recebimento__lte=consultado_em)
+        ).update(
+            status=WebhookEvento.Status.PROCESSADO if alterou else WebhookEvento.Status.IGNORADO,
+            ultimo_erro='' if dados is not None else 'Recurso não encontrado no gateway',
+            data_processamento=timezone.now(),
+        )
+    return processados, falhas
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.utils import timezone
 from datetime import timedelta
 from .models import Subscription
+from .planos import obter_plano
 
 
 class SubscriptionSerializer(serializers.ModelSerializer):
@@ -67,13 +68,10 @@ class SubscriptionCreateSerializer(serializers.ModelSerializer):
         usuario = self.context['request'].user
         plan_id = validated_data['plan_id']
 
-        # Define o valor baseado no plano
-        amount = 19.99 if plan_id == 'studioflow_basic' else 39.99
-
         return Subscription.objects.create(
             usuario=usuario,
             plan_id=plan_id,
-            amount=amount,
+            amount=obter_plano(plan_id).price,
             status=Subscription.StatusSubscription.TRIAL
         )
 
@@ -0,0 +1,130 @@
+"""
+Servidor HTTP local que imita a API do Mercado Pago.
+
+Usado para testar ``subscriptions.pagamentos`` sem rede: responde a
+``GET /v1/payments/<id>``, ``GET /preapproval/<id>`` e
+``POST /checkout/preferences`` com keep-alive, e permite simular lentidão
+(``atraso``) e falhas (``falhar``)::
+
+    with ServidorFalsoMercadoPago() as servidor:
+        servidor.pagamentos['123'] = {'status': 'approved'}
+        cliente = ClienteMercadoPago('token', servidor.url)
+"""
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.falso.lock:
+            self.server.falso.conexoes += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status, dados=None):
+        corpo = json.dumps(dados).encode('utf-8') if dados is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _tratar(self, metodo):
+        falso = self.server.falso
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+        with falso.lock:
+            falso.requisicoes.append((metodo, self.path, dict(self.headers), corpo))
+            falha = falso.falhas.popleft() if falso.falhas else None
+        if falso.atraso:
+            time.sleep(falso.atraso)
+        if falha is not None:
+            return self._responder(falha, {'message': 'falha simulada'})
+        if self.headers.get('Authorization') != f'Bearer {falso.access_token}':
+            return self._responder(401, {'message': 'invalid access token'})
+
+        partes = self.path.strip('/').split('/')
+        if metodo == 'GET' and partes[:2] == ['v1', 'payments'] and len(partes) == 3:
+            return self._recurso(falso.pagamentos, partes[2])
+        if metodo == 'GET' and partes[0] == 'preapproval' and len(partes) == 2:
+            return self._recurso(falso.assinaturas, partes[1])
+        if metodo == 'POST' and partes == ['checkout', 'preferences']:
+            return self._responder(201, falso.criar_preferencia(corpo, self.headers.get('X-Idempotency-Key')))
+        return self._responder(404, {'message': 'not found'})
+
+    def _recurso(self, recursos, recurso_id):
+        if recurso_id not in recursos:
+            return self._responder(404, {'message': 'resource not found'})
+        return self._responder(200, dict(recursos[recurso_id], id=recurso_id))
+
+    def do_GET(self):
+        self._tratar('GET')
+
+    def do_POST(self):
+        self._tratar('POST')
+
+
+class ServidorFalsoMercadoPago:
+    """API falsa do Mercado Pago em uma porta local livre."""
+
+    def __init__(self, access_token='token-de-teste'):
+        self.access_token = access_token
+        self.pagamentos = {}
+        self.assinaturas = {}
+        self.preferencias = {}
+        self.requisicoes = []
+        self.falhas = deque()
+        self.atraso = 0
+        self.conexoes = 0
+        self.lock = threading.Lock()
+        self._servidor = None
+
+    @property
+    def url(self):
+        host, porta = self._servidor.server_address[:2]
+        return f'http://{host}:{porta}'
+
+    def falhar(self, *status):
+        """As próximas requisições recebem, em ordem, os status informados."""
+        with self.lock:
+            self.falhas.extend(status)
+
+    def criar_preferencia(self, corpo, chave_idempotencia):
+        with self.lock:
+            # Repetições com a mesma chave retornam a mesma preferência
+            if chave_idempotencia in self.preferencias:
+                return self.preferencias[chave_idempotencia]
+            preferencia_id = uuid.uuid4().hex
+            preferencia = dict(
+                corpo or {},
+                id=preferencia_id,
+                init_point=f'https://www.mercadopago.com.br/checkout/v1/redirect?pref_id={preferencia_id}',
+                sandbox_init_point=f'https://sandbox.mercadopago.com.br/checkout/v1/redirect?pref_id={preferencia_id}',
+            )
+            self.preferencias[chave_idempotencia or preferencia_id] = preferencia
+            return preferencia
+
+    def iniciar(self):
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Manipulador)
+        self._servidor.daemon_threads = True
+        self._servidor.falso = self
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def parar(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
@@ -1,8 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
+from users.authentication import invalidar_autenticacao
 from users.models import User
-from .models import Subscription
+from .direitos import atualizar_direito, invalidar_direito
+from .models import DireitoDeAcesso, Subscription
+from .planos import obter_plano
 
 
 @receiver(post_save, sender=User)
@@ -10,9 +13,29 @@ def create_trial_subscription(sender, instance, created, **kwargs):
     """Cria uma assinatura de trial automaticamente quando um usuário é criado."""
     if created and instance.user_type in ['CLIENTE', 'PRESTADOR']:
         # Só cria assinatura para clientes e prestadores, não para admins
+        plano = obter_plano(Subscription.PlanSubscription.BASIC)  # Plano padrão para trial
         Subscription.objects.create(
             usuario=instance,
-            plan_id='studioflow_basic',  # Plano padrão para trial
+            plan_id=plano.id,
             status=Subscription.StatusSubscription.TRIAL,
-            amount=19.99  # Valor do plano básico
-        )
\ No newline at end of file
+            amount=plano.price
+        )
+
+
+@receiver([post_save, post_delete], sender=Subscription)
+def invalidar_claims_assinatura(sender, instance, **kwargs):
+    """Deixa de confiar na claim assinatura_ativa emitida antes da alteração."""
+    invalidar_autenticacao(instance.usuario_id)
+
+
+@receiver(post_save, sender=Subscription)
+def atualizar_direito_de_acesso(sender, instance, **kwargs):
+    """Mantém a projeção usada nas verificações de acesso por plano."""
+    atualizar_direito(instance)
+
+
+@receiver(post_delete, sender=Subscription)
+def remover_direito_de_acesso(sender, instance, **kwargs):
+    """Remove a projeção da assinatura excluída."""
+    DireitoDeAcesso.objects.filter(usuario_id=instance.usuario_id).delete()
+    invalidar_direito(instance.usuario_id)
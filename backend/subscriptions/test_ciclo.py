@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from users.authentication import ClaimsJWTAuthentication
+from users.models import User
+from users.tokens import TokenComClaims
+from . import ciclo
+from .ciclo import expirar_assinaturas
+from .direitos import obter_direito
+from .models import Subscription
+
+Status = Subscription.StatusSubscription
+
+
+class ExpirarAssinaturasTest(TestCase):
+    """Testes para as transições em lote das assinaturas vencidas."""
+
+    def criar(self, indice, **campos):
+        user = User.objects.create_user(email=f'cliente{indice}@test.com', nome=f'Cliente {indice}')
+        Subscription.objects.filter(usuario=user).update(**campos)
+        return Subscription.objects.get(usuario=user)
+
+    def test_transicoes(self):
+        """Testa cada transição e as assinaturas que não devem mudar."""
+        agora = timezone.now()
+        ontem, amanha = agora - timedelta(days=1), agora + timedelta(days=1)
+        pedido_cancelamento = agora - timedelta(days=10)
+        casos = [
+            (dict(status=Status.TRIAL, trial_end=ontem), Status.PAST_DUE),
+            (dict(status=Status.TRIAL, trial_end=amanha), Status.TRIAL),
+            (dict(status=Status.TRIAL, trial_end=ontem, cancel_at_period_end=True,
+                  canceled_at=pedido_cancelamento), Status.CANCELED),
+            (dict(status=Status.ACTIVE, current_period_end=ontem), Status.PAST_DUE),
+            (dict(status=Status.ACTIVE, current_period_end=amanha), Status.ACTIVE),
+            (dict(status=Status.ACTIVE, current_period_end=ontem, cancel_at_period_end=True), Status.CANCELED),
+            (dict(status=Status.CANCELED, trial_end=ontem, current_period_end=ontem), Status.CANCELED),
+        ]
+        assinaturas = [self.criar(i, **campos) for i, (campos, _) in enumerate(casos)]
+
+        resultado = expirar_assinaturas(chunk=2)
+        self.assertEqual(resultado, {
+            'trial_cancelado': 1, 'trial_vencido': 1, 'periodo_cancelado': 1, 'periodo_vencido': 1
+        })
+        for assinatura, (_, esperado) in zip(assinaturas, casos):
+            assinatura.refresh_from_db()
+            self.assertEqual(assinatura.status, esperado)
+
+        self.assertEqual(assinaturas[2].canceled_at, pedido_cancelamento)
+        self.assertIsNotNone(assinaturas[5].canceled_at)
+        # Uma nova varredura não encontra nada
+        self.assertEqual(sum(expirar_assinaturas().values()), 0)
+
+    def test_lotes(self):
+        """Testa que todas as linhas são alteradas quando excedem o tamanho do lote."""
+        ontem = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            self.criar(i, trial_end=ontem)
+        self.assertEqual(expirar_assinaturas(chunk=3)['trial_vencido'], 7)
+        self.assertFalse(Subscription.objects.filter(status=Status.TRIAL).exists())
+
+    def test_renovacao_concorrente(self):
+        """Testa que a assinatura renovada entre o SELECT e o UPDATE mantém o acesso."""
+        ontem, amanha = timezone.now() - timedelta(days=1), timezone.now() + timedelta(days=30)
+        renovada = self.criar(0, status=Status.ACTIVE, current_period_end=ontem)
+        vencida = self.criar(1, status=Status.ACTIVE, current_period_end=ontem)
+        selecionar = ciclo._selecionar_lote
+
+        def selecionar_e_renovar(filtro, chunk):
+            lote = selecionar(filtro, chunk)
+            if renovada.pk in lote:
+                # Um webhook de pagamento confirma a renovação neste intervalo
+                renovada.current_period_end = amanha
+                renovada.save()
+            return lote
+
+        with mock.patch.object(ciclo, '_selecionar_lote', selecionar_e_renovar):
+            self.assertEqual(expirar_assinaturas()['periodo_vencido'], 1)
+
+        renovada.refresh_from_db()
+        self.assertEqual(renovada.status, Status.ACTIVE)
+        self.assertTrue(obter_direito(renovada.usuario_id).vigente())
+        self.assertFalse(obter_direito(vencida.usuario_id).vigente())
+
+    def test_invalida_claims(self):
+        """Testa que o token emitido antes da transição deixa de indicar assinatura ativa."""
+        assinatura = self.criar(0)
+        access = TokenComClaims.for_user(assinatura.usuario).access_token
+        Subscription.objects.filter(pk=assinatura.pk).update(trial_end=timezone.now() - timedelta(days=1))
+
+        expirar_assinaturas()
+        user = ClaimsJWTAuthentication().get_user(access)
+        self.assertFalse(user.assinatura_ativa)
+
+    def test_comando(self):
+        """Testa que o comando executa a varredura e relata as contagens."""
+        self.criar(0, trial_end=timezone.now() - timedelta(days=1))
+        saida = StringIO()
+        call_command('expirar_assinaturas', stdout=saida)
+        self.assertIn('trial_vencido: 1', saida.getvalue())
@@ -0,0 +1,157 @@
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from rest_framework.views import APIView
+
+from users.models import User
+from users.tokens import TokenComClaims
+from .ciclo import expirar_assinaturas
+from .direitos import exige_plano, obter_direito
+from .models import DireitoDeAcesso, Subscription
+
+Plano = Subscription.PlanSubscription
+
+
+class RelatorioProView(APIView):
+    """View de exemplo restrita ao plano Pro."""
+
+    permission_classes = [exige_plano(Plano.PRO)]
+
+    def get(self, request):
+        return Response({'ok': True})
+
+
+class DireitoDeAcessoTest(TestCase):
+    """Testes para a projeção de direitos de acesso e a permissão por plano."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        self.assinatura = Subscription.objects.get(usuario=self.user)
+
+    def acessar(self, user=None):
+        request = APIRequestFactory().get('/')
+        force_authenticate(request, user=user or self.user)
+        return RelatorioProView.as_view()(request)
+
+    def test_projecao_mantida_pelo_save(self):
+        """Testa que criar e alterar a assinatura atualiza a projeção."""
+        direito = DireitoDeAcesso.objects.get(usuario=self.user)
+        self.assertEqual(direito.plano, Plano.BASIC)
+        self.assertTrue(direito.ativo)
+        self.assertEqual(direito.valido_ate, self.assinatura.trial_end)
+
+        self.assinatura.status = Subscription.StatusSubscription.CANCELED
+        self.assinatura.save()
+        self.assertFalse(obter_direito(self.user.pk).ativo)
+
+    def test_consulta_em_cache(self):
+        """Testa que a verificação repetida não consulta o banco."""
+        obter_direito(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(obter_direito(self.user.pk).vigente())
+
+    def test_permissao_por_plano(self):
+        """Testa que o plano Básico não acessa a view Pro e o Pro acessa."""
+        response = self.acessar()
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('Pro', str(response.data['detail']))
+
+        self.assinatura.plan_id = Plano.PRO
+        self.assinatura.save()
+        self.assertEqual(self.acessar().status_code, 200)
+
+    def test_trial_vencido_bloqueia_sem_varredura(self):
+        """Testa que o fim do trial vale na leitura, antes da varredura em lote."""
+        self.assinatura.plan_id = Plano.PRO
+        self.assinatura.trial_end = timezone.now() - timedelta(minutes=1)
+        self.assinatura.save()
+        response = self.acessar()
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('assinatura ativa', str(response.data['detail']))
+
+    def test_varredura_em_lote_desativa(self):
+        """Testa que as transições em lote também atualizam a projeção."""
+        obter_direito(self.user.pk)
+        Subscription.objects.filter(pk=self.assinatura.pk).update(
+            trial_end=timezone.now() - timedelta(days=1)
+        )
+        expirar_assinaturas()
+        self.assertFalse(DireitoDeAcesso.objects.get(usuario=self.user).ativo)
+        self.assertFalse(obter_direito(self.user.pk).ativo)
+
+    def test_equipe_e_usuario_sem_assinatura(self):
+        """Testa que a equipe passa e usuários sem assinatura são bloqueados."""
+        admin = User.objects.create_user(email='admin@test.com', nome='Admin', user_type='ADMIN', is_staff=True)
+        self.assertEqual(self.acessar(admin).status_code, 200)
+
+        sem_assinatura = User.objects.create_user(email='adm2@test.com', nome='Admin 2', user_type='ADMIN')
+        self.assertIsNone(obter_direito(sem_assinatura.pk))
+        self.assertEqual(self.acessar(sem_assinatura).status_code, 403)
+
+
+class DireitoPelasClaimsTest(APITestCase):
+    """Testes para as verificações de assinatura feitas a partir das claims do token."""
+
+    def setUp(self):
+        """Configura os dados de teste, com um cache compartilhado entre os processos."""
+        diretorio = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': diretorio
+        }}))
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        self.access = TokenComClaims.for_user(self.user).access_token
+
+    def acessar(self, access):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return RelatorioProView.as_view()(request)
+
+    def test_permissao_sem_consultas(self):
+        """Testa que o plano é verificado pelas claims e que salvar a assinatura as invalida."""
+        with self.assertNumQueries(0):
+            response = self.acessar(self.access)
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('Pro', str(response.data['detail']))
+
+        assinatura = Subscription.objects.get(usuario=self.user)
+        assinatura.plan_id = Plano.PRO
+        assinatura.save()
+        self.assertEqual(self.acessar(self.access).status_code, 200)
+
+    def test_fim_do_trial_pelas_claims(self):
+        """Testa que o fim do trial, embutido no token, vale sem consultar o banco."""
+        Subscription.objects.filter(usuario=self.user).update(
+            plan_id=Plano.PRO, trial_end=timezone.now() - timedelta(minutes=1)
+        )
+        access = TokenComClaims.for_user(User.objects.get(pk=self.user.pk)).access_token
+        with self.assertNumQueries(0):
+            response = self.acessar(access)
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('assinatura ativa', str(response.data['detail']))
+
+    def test_assinatura_atual_sem_assinatura(self):
+        """Testa que /current/ responde 404 pelas claims, sem consultar o banco."""
+        sem_assinatura = User.objects.create_user(email='adm@test.com', nome='Admin', user_type='ADMIN')
+        access = TokenComClaims.for_user(sem_assinatura).access_token
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('subscription-current'), HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(reverse('subscription-current'), HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['plan_id'], Plano.BASIC)
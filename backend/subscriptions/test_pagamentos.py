@@ -0,0 +1,162 @@
+import time
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.models import User
+from .pagamentos import (
+    CircuitoAberto, ClienteMercadoPago, ErroGateway, ErroRequisicao, OrcamentoDeRetentativas
+)
+from .servidor_falso import ServidorFalsoMercadoPago
+
+
+class ClienteMercadoPagoTest(TestCase):
+    """Testes para o cliente HTTP do Mercado Pago contra o servidor falso."""
+
+    def setUp(self):
+        """Inicia o servidor falso."""
+        self.servidor = ServidorFalsoMercadoPago().iniciar()
+        self.addCleanup(self.servidor.parar)
+
+    def cliente(self, **opcoes):
+        cliente = ClienteMercadoPago(self.servidor.access_token, self.servidor.url, **opcoes)
+        self.addCleanup(cliente.pool.fechar)
+        return cliente
+
+    def test_reutiliza_conexoes(self):
+        """Testa que chamadas seguidas usam a mesma conexão keep-alive."""
+        self.servidor.pagamentos['123'] = {'status': 'approved'}
+        cliente = self.cliente()
+        for _ in range(5):
+            self.assertEqual(cliente.buscar_pagamento('123')['status'], 'approved')
+        self.assertEqual(self.servidor.conexoes, 1)
+        self.assertEqual(cliente.pool.criadas, 1)
+
+    def test_respostas_4xx(self):
+        """Testa que 404 retorna None e os demais 4xx não são repetidos."""
+        cliente = self.cliente()
+        self.assertIsNone(cliente.buscar_pagamento('inexistente'))
+
+        self.servidor.falhar(400)
+        with self.assertRaises(ErroRequisicao) as contexto:
+            cliente.buscar_pagamento('123')
+        self.assertEqual(contexto.exception.status, 400)
+        self.assertEqual(len(self.servidor.requisicoes), 2)
+
+    def test_repete_falhas_temporarias(self):
+        """Testa que 5xx e 429 são repetidos em chamadas idempotentes."""
+        self.servidor.pagamentos['123'] = {'status': 'approved'}
+        self.servidor.falhar(503, 429)
+        self.assertEqual(self.cliente().buscar_pagamento('123')['status'], 'approved')
+        self.assertEqual(len(self.servidor.requisicoes), 3)
+
+    def test_post_repetido_com_a_mesma_chave(self):
+        """Testa que a criação da preferência é repetida com a mesma chave de idempotência."""
+        self.servidor.falhar(500)
+        preferencia = self.cliente().criar_preferencia({'items': []})
+        chaves = {cabecalhos['X-Idempotency-Key'] for _, _, cabecalhos, _ in self.servidor.requisicoes}
+        self.assertEqual(len(self.servidor.requisicoes), 2)
+        self.assertEqual(len(chaves), 1)
+        self.assertIn('init_point', preferencia)
+
+    def test_timeout(self):
+        """Testa que uma resposta lenta falha no timeout, sem prender a chamada."""
+        self.servidor.atraso = 0.5
+        cliente = self.cliente(timeout=0.05, tentativas=1)
+        inicio = time.monotonic()
+        with self.assertRaises(ErroGateway):
+            cliente.buscar_pagamento('123')
+        self.assertLess(time.monotonic() - inicio, 0.4)
+
+    def test_circuito(self):
+        """Testa que o circuito abre após falhas seguidas e fecha após a chamada de teste."""
+        self.servidor.pagamentos['123'] = {'status': 'approved'}
+        cliente = self.cliente(tentativas=1, limite_falhas=2, espera_circuito=0.1)
+        self.servidor.falhar(500, 500)
+        for _ in range(2):
+            with self.assertRaises(ErroGateway):
+                cliente.buscar_pagamento('123')
+
+        with self.assertRaises(CircuitoAberto):
+            cliente.buscar_pagamento('123')
+        self.assertEqual(len(self.servidor.requisicoes), 2)
+
+        time.sleep(0.15)
+        self.assertEqual(cliente.buscar_pagamento('123')['status'], 'approved')
+        self.assertEqual(cliente.metricas()['circuito'], 'fechado')
+
+    def test_orcamento_de_retentativas(self):
+        """Testa que as retentativas são limitadas pelo saldo acumulado."""
+        orcamento = OrcamentoDeRetentativas(proporcao=0.5, maximo=2)
+        self.assertTrue(orcamento.sacar())
+        self.assertTrue(orcamento.sacar())
+        self.assertFalse(orcamento.sacar())
+        orcamento.depositar()
+        orcamento.depositar()
+        self.assertTrue(orcamento.sacar())
+
+    def test_metricas(self):
+        """Testa o histograma de latência e a contagem de resultados por operação."""
+        self.servidor.pagamentos['123'] = {'status': 'approved'}
+        cliente = self.cliente()
+        cliente.buscar_pagamento('123')
+        cliente.buscar_pagamento('999')
+        metricas = cliente.metricas()
+        self.assertEqual(metricas['latencia']['buscar_pagamento']['total'], 2)
+        self.assertEqual(metricas['latencia']['buscar_pagamento']['buckets'][-1], ('+Inf', 2))
+        self.assertEqual(metricas['resultados'], {'buscar_pagamento:200': 1, 'buscar_pagamento:404': 1})
+
+
+class PreferenciaDePagamentoTest(APITestCase):
+    """Testes para a criação da preferência de pagamento pelo cliente."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.servidor = ServidorFalsoMercadoPago().iniciar()
+        self.addCleanup(self.servidor.parar)
+        configuracao = override_settings(
+            SUBSCRIPTIONS_GATEWAY='subscriptions.gateway.GatewayMercadoPago',
+            MERCADOPAGO_API_URL=self.servidor.url,
+            MERCADOPAGO_ACCESS_TOKEN=self.servidor.access_token,
+            MERCADOPAGO_TENTATIVAS=1,
+            MERCADOPAGO_CIRCUITO_FALHAS=1,
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('subscription-create-payment-preference')
+
+    def test_cria_preferencia(self):
+        """Testa que a preferência é criada com o preço do catálogo e a referência do usuário."""
+        response = self.client.post(self.url, {'plan_id': 'studioflow_pro'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('pref_id=' + response.data['preference_id'], response.data['init_point'])
+
+        _, caminho, _, corpo = self.servidor.requisicoes[-1]
+        self.assertEqual(caminho, '/checkout/preferences')
+        self.assertEqual(corpo['items'][0]['unit_price'], 39.99)
+        self.assertEqual(corpo['external_reference'], str(self.user.pk))
+
+    def test_plano_invalido(self):
+        """Testa que um plano fora do catálogo retorna 400 sem chamar o gateway."""
+        response = self.client.post(self.url, {'plan_id': 'inexistente'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.servidor.requisicoes, [])
+
+    def test_gateway_indisponivel(self):
+        """Testa 502 na falha do gateway e 503 com o circuito aberto."""
+        self.servidor.falhar(500)
+        response = self.client.post(self.url, {'plan_id': 'studioflow_basic'})
+        self.assertEqual(response.status_code, status.HTTP_502_BAD_GATEWAY)
+
+        response = self.client.post(self.url, {'plan_id': 'studioflow_basic'})
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(len(self.servidor.requisicoes), 1)
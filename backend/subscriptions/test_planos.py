@@ -0,0 +1,48 @@
+import json
+from decimal import Decimal
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.models import User
+from .models import Subscription
+from .planos import CATALOGO_ETAG, PLANOS, obter_plano
+
+
+class CatalogoDePlanosTest(APITestCase):
+    """Testes para o catálogo de planos e seu endpoint público."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.url = reverse('subscription-plans')
+
+    def test_endpoint_publico(self):
+        """Testa que os planos são servidos sem autenticação, com ETag e cache longo."""
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], CATALOGO_ETAG)
+        self.assertIn('max-age=86400', response['Cache-Control'])
+
+        planos = json.loads(response.content)
+        self.assertEqual([plano['id'] for plano in planos], [plano.id for plano in PLANOS])
+        self.assertEqual(planos[0]['price'], 19.99)
+        self.assertEqual(planos[1]['name'], 'StudioFlow Pro')
+
+    def test_nao_modificado(self):
+        """Testa que o ETag do catálogo produz 304."""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=CATALOGO_ETAG)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], CATALOGO_ETAG)
+
+    def test_valor_da_assinatura_vem_do_catalogo(self):
+        """Testa que a criação da assinatura usa o preço do catálogo."""
+        admin = User.objects.create_user(email='admin@test.com', nome='Admin', user_type='ADMIN')
+        self.client.force_authenticate(user=admin)
+        response = self.client.post(reverse('subscription-list'), {'plan_id': 'studioflow_pro'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        assinatura = Subscription.objects.get(usuario=admin)
+        self.assertEqual(assinatura.amount, Decimal('39.99'))
+        self.assertEqual(assinatura.amount, obter_plano(Subscription.PlanSubscription.PRO).price)
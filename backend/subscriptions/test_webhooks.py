@@ -0,0 +1,148 @@
+import hashlib
+import hmac
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.models import User
+from .gateway import ErroGateway, GatewayFalso
+from .models import Subscription, WebhookEvento
+from .processamento import processar_pendentes
+
+SEGREDO = 'segredo-de-teste'
+
+
+class GatewayIndisponivel(GatewayFalso):
+    """Gateway falso que falha em todas as consultas."""
+
+    def _buscar(self, tipo, recurso_id):
+        raise ErroGateway('timeout')
+
+
+@override_settings(SUBSCRIPTIONS_GATEWAY='subscriptions.gateway.GatewayFalso')
+class WebhookMercadoPagoTest(APITestCase):
+    """Testes para o recebimento e o processamento das notificações."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        GatewayFalso.limpar()
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        self.assinatura = Subscription.objects.get(usuario=self.user)
+        self.url = reverse('mercadopago-webhook')
+
+    def notificar(self, recurso_id, evento_id, tipo='payment', **extra):
+        return self.client.post(
+            self.url,
+            {'id': evento_id, 'type': tipo, 'action': f'{tipo}.updated', 'data': {'id': recurso_id}},
+            format='json',
+            **extra
+        )
+
+    def test_notificacao_apenas_gravada(self):
+        """Testa que o webhook grava o evento e responde sem consultar o gateway."""
+        response = self.notificar('123', 'evento-1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        evento = WebhookEvento.objects.get()
+        self.assertEqual((evento.topico, evento.recurso_id, evento.evento_id), ('payment', '123', 'evento-1'))
+        self.assertEqual(evento.status, WebhookEvento.Status.PENDENTE)
+        self.assertEqual(GatewayFalso.consultas, [])
+
+    def test_reenvio_deduplicado(self):
+        """Testa que reenvios da mesma notificação são descartados com 200."""
+        for _ in range(3):
+            self.assertEqual(self.notificar('123', 'evento-1').status_code, status.HTTP_200_OK)
+        self.assertEqual(WebhookEvento.objects.count(), 1)
+
+    def test_formato_ipn(self):
+        """Testa as notificações antigas, com topic e resource na URL."""
+        response = self.client.post(f'{self.url}?topic=payment&id=456')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(WebhookEvento.objects.get().recurso_id, '456')
+
+    @override_settings(MERCADOPAGO_WEBHOOK_SECRET=SEGREDO)
+    def test_assinatura_verificada_antes_de_gravar(self):
+        """Testa que notificações sem assinatura válida não são gravadas."""
+        response = self.notificar('123', 'evento-1', HTTP_X_SIGNATURE='ts=1,v1=invalida')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(WebhookEvento.objects.exists())
+
+        manifesto = 'id:123;request-id:req-1;ts:1700000000;'
+        assinatura = hmac.new(SEGREDO.encode(), manifesto.encode(), hashlib.sha256).hexdigest()
+        response = self.client.post(
+            f'{self.url}?data.id=123&type=payment',
+            {'id': 'evento-1', 'type': 'payment', 'data': {'id': '123'}},
+            format='json',
+            HTTP_X_REQUEST_ID='req-1',
+            HTTP_X_SIGNATURE=f'ts=1700000000,v1={assinatura}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(WebhookEvento.objects.exists())
+
+    def test_notificacoes_do_mesmo_recurso_agrupadas(self):
+        """Testa que várias notificações do mesmo pagamento geram uma única consulta."""
+        GatewayFalso.registrar('payment', '123', {
+            'status': 'approved',
+            'date_approved': '2026-01-10T12:00:00Z',
+            'external_reference': str(self.user.pk),
+        })
+        for i in range(5):
+            self.notificar('123', f'evento-{i}')
+
+        self.assertEqual(processar_pendentes(), (1, 0))
+        self.assertEqual(GatewayFalso.consultas, [('payment', '123')])
+        self.assertFalse(WebhookEvento.objects.exclude(status=WebhookEvento.Status.PROCESSADO).exists())
+        self.assinatura.refresh_from_db()
+        self.assertEqual(self.assinatura.status, Subscription.StatusSubscription.ACTIVE)
+        self.assertEqual(self.assinatura.last_payment_date.day, 10)
+
+        # Uma nova notificação do mesmo pagamento não o aplica de novo
+        self.notificar('123', 'evento-tardio')
+        processar_pendentes()
+        self.assertEqual(
+            WebhookEvento.objects.get(evento_id='evento-tardio').status, WebhookEvento.Status.IGNORADO
+        )
+
+    def test_cancelamento_da_assinatura(self):
+        """Testa que a preapproval cancelada cancela a assinatura."""
+        self.assinatura.mercadopago_subscription_id = 'pre-1'
+        self.assinatura.save()
+        GatewayFalso.registrar('preapproval', 'pre-1', {'status': 'cancelled'})
+        self.notificar('pre-1', 'evento-1', tipo='subscription_preapproval')
+
+        processar_pendentes()
+        self.assinatura.refresh_from_db()
+        self.assertEqual(self.assinatura.status, Subscription.StatusSubscription.CANCELED)
+        self.assertIsNotNone(self.assinatura.canceled_at)
+
+    def test_falha_do_gateway_reagenda(self):
+        """Testa que falhas do gateway reagendam os eventos do recurso."""
+        self.notificar('123', 'evento-1')
+        self.notificar('123', 'evento-2')
+
+        self.assertEqual(processar_pendentes(gateway=GatewayIndisponivel()), (0, 1))
+        for evento in WebhookEvento.objects.all():
+            self.assertEqual(evento.status, WebhookEvento.Status.PENDENTE)
+            self.assertEqual(evento.tentativas, 1)
+            self.assertIn('timeout', evento.ultimo_erro)
+            self.assertGreater(evento.proxima_tentativa, timezone.now())
+        # Antes da próxima tentativa nada é processado
+        self.assertEqual(processar_pendentes(), (0, 0))
+
+    def test_comando(self):
+        """Testa que o comando processa a fila."""
+        self.notificar('999', 'evento-1')
+        saida = StringIO()
+        call_command('processar_webhooks', stdout=saida)
+        self.assertIn('1 recurso(s)', saida.getvalue())
+        # Pagamento inexistente no gateway
+        self.assertEqual(WebhookEvento.objects.get().status, WebhookEvento.Status.IGNORADO)
@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SubscriptionViewSet
+from .views import SubscriptionViewSet, planos
 from .webhooks import MercadoPagoWebhookView
 
 router = DefaultRouter()
 router.register('', SubscriptionViewSet)
 
 urlpatterns = [
+    path('plans/', planos, name='subscription-plans'),
     path('', include(router.urls)),
     path('webhooks/mercadopago/', MercadoPagoWebhookView.as_view(), name='mercadopago-webhook'),
 ]
\ No newline at end of file
@@ -1,10 +1,18 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
 from django.utils import timezone
+from django.utils.http import parse_etags
 from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from studioflow.mixins import GetCondicionalMixin
 
 from .models import Subscription
+from .gateway import CircuitoAberto, ErroGateway, obter_gateway
+from .planos import CATALOGO_ETAG, CATALOGO_JSON, obter_plano
 from .serializers import (
     SubscriptionSerializer,
     SubscriptionCreateSerializer,
@@ -12,19 +20,27 @@ from .serializers import (
 )
 
 
-class SubscriptionViewSet(viewsets.ModelViewSet):
+class SubscriptionViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar assinaturas."""
 
-    queryset = Subscription.objects.all()
+    queryset = Subscription.objects.select_related('usuario')
     serializer_class = SubscriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordenacao_cursor = ['-data_criacao', '-id']
+    acoes_condicionais = ('list', 'retrieve', 'current')
+    campos_versao = ('data_atualizacao', 'usuario__data_atualizacao')
+    # is_trial_active e days_until_trial_end dependem da hora atual
+    janela_versao = 60
 
     def get_queryset(self):
         """Retorna as assinaturas do usuário atual ou todas para admin."""
         user = self.request.user
         if user.is_staff or user.is_superuser:
-            return Subscription.objects.all()
-        return Subscription.objects.filter(usuario=user)
+            return self.queryset.all()
+        if getattr(user, 'direito', True) is None:
+            # Pelas claims do token (users.authentication) o usuário não tem assinatura
+            return self.queryset.none()
+        return self.queryset.filter(usuario=user)
 
     def get_serializer_class(self):
         """Retorna o serializer apropriado baseado na ação."""
@@ -89,60 +105,62 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(subscription)
         return Response(serializer.data)
 
-    @action(detail=False, methods=['get'])
-    def plans(self, request):
-        """Retorna os planos disponíveis."""
-        from ..lib.mercadopago import SUBSCRIPTION_PLANS
-
-        plans_data = []
-        for plan in SUBSCRIPTION_PLANS:
-            plans_data.append({
-                'id': plan.id,
-                'name': plan.name,
-                'price': plan.price,
-                'currency': plan.currency,
-                'interval': plan.interval,
-                'description': plan.description,
-                'features': plan.features
-            })
-
-        return Response(plans_data)
-
     @action(detail=False, methods=['post'])
     def create_payment_preference(self, request):
         """Cria uma preferência de pagamento no Mercado Pago."""
+        plan_id = request.data.get('plan_id')
+        if not plan_id:
+            return Response(
+                {'detail': 'plan_id é obrigatório.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         try:
-            from ..lib.mercadopago import createPaymentPreference
-
-            plan_id = request.data.get('plan_id')
-            if not plan_id:
-                return Response(
-                    {'detail': 'plan_id é obrigatório.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Verifica se o usuário já tem assinatura
-            existing_subscription = Subscription.objects.filter(usuario=request.user).first()
-            if existing_subscription:
-                return Response(
-                    {'detail': 'Usuário já possui uma assinatura ativa.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            preference = createPaymentPreference(
-                plan_id,
-                str(request.user.id),
-                request.user.email
+            plano = obter_plano(plan_id)
+        except KeyError:
+            return Response({'detail': 'Plano inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Verifica se o usuário já tem uma assinatura paga
+        if Subscription.objects.filter(
+            usuario=request.user, status=Subscription.StatusSubscription.ACTIVE
+        ).exists():
+            return Response(
+                {'detail': 'Usuário já possui uma assinatura ativa.'},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            return Response({
-                'preference_id': preference.id,
-                'init_point': preference.init_point,
-                'sandbox_init_point': preference.sandbox_init_point
-            })
-
-        except Exception as e:
+        try:
+            preference = obter_gateway().criar_preferencia(plano, request.user)
+        except CircuitoAberto:
+            return Response(
+                {'detail': 'Pagamentos temporariamente indisponíveis. Tente novamente em instantes.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        except ErroGateway as e:
             return Response(
                 {'detail': f'Erro ao criar preferência de pagamento: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
+        return Response({
+            'preference_id': preference['id'],
+            'init_point': preference['init_point'],
+            'sandbox_init_point': preference.get('sandbox_init_point')
+        })
+
+
+@require_safe
+def planos(request):
+    """
+    Retorna os planos disponíveis.
+
+    Endpoint público: o JSON é renderizado uma única vez, na carga do catálogo,
+    e servido sem passar pelo DRF, com ETag do conteúdo e cache longo.
+    """
+    cache_control = f'public, max-age={settings.SUBSCRIPTIONS_PLANOS_MAX_AGE}'
+    if CATALOGO_ETAG in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(CATALOGO_JSON, content_type='application/json')
+    response['ETag'] = CATALOGO_ETAG
+    response['Cache-Control'] = cache_control
+    return response
@@ -5,101 +5,118 @@ from rest_framework import status
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.conf import settings
-import json
+from django.db import IntegrityError, transaction
 import hmac
 import hashlib
 
-from .models import Subscription
+from .models import WebhookEvento
+
+# Tópicos processados, com os nomes usados nas notificações antigas (IPN) e novas
+TOPICOS = {
+    'payment': 'payment',
+    'subscription': 'preapproval',
+    'preapproval': 'preapproval',
+    'subscription_preapproval': 'preapproval',
+}
+
+
+def extrair_notificacao(request):
+    """
+    Retorna (tópico, id do recurso, id do evento) da notificação.
+
+    Aceita o formato de webhook (``type`` e ``data.id`` no corpo) e o de IPN
+    (``topic`` e ``resource``/``id``). Sem id próprio, o evento é identificado
+    pelo ``X-Request-Id`` ou, na falta dele, pelo hash do corpo.
+    """
+    dados = request.data if isinstance(request.data, dict) else {}
+    parametros = request.query_params
+    topico = TOPICOS.get(
+        dados.get('type') or dados.get('topic') or parametros.get('type') or parametros.get('topic')
+    )
+    recurso = (
+        (dados.get('data') or {}).get('id') or dados.get('resource')
+        or parametros.get('data.id') or parametros.get('id')
+    )
+    # No IPN, resource pode ser a URL do recurso
+    recurso = str(recurso).rstrip('/').rsplit('/', 1)[-1] if recurso else ''
+    evento = (
+        dados.get('id') or request.headers.get('X-Request-Id')
+        or hashlib.sha256(request.body).hexdigest()[:40]
+    )
+    return topico, recurso, str(evento)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class MercadoPagoWebhookView(APIView):
-    """View para receber webhooks do Mercado Pago."""
+    """
+    View para receber webhooks do Mercado Pago.
+
+    A notificação é apenas validada e gravada em ``WebhookEvento``; o comando
+    ``processar_webhooks`` faz o processamento fora da requisição.
+    """
 
     permission_classes = [AllowAny]
+    authentication_classes = []
 
     def post(self, request):
-        """Processa notificações do Mercado Pago."""
-        try:
-            # Verifica se é uma notificação válida do Mercado Pago
-            if not self._verify_webhook_signature(request):
-                return Response(
-                    {'detail': 'Assinatura inválida'},
-                    status=status.HTTP_401_UNAUTHORIZED
-                )
-
-            data = request.data
-            topic = data.get('topic') or data.get('type')
-            resource_id = data.get('resource')
-
-            if topic == 'payment':
-                return self._handle_payment_notification(data)
-            elif topic == 'subscription':
-                return self._handle_subscription_notification(data)
-            else:
-                # Outros tipos de notificação (por enquanto ignoramos)
-                return Response({'detail': 'Notificação recebida'}, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            # Log do erro para debug
-            print(f"Erro no webhook: {str(e)}")
+        """Grava a notificação do Mercado Pago para processamento posterior."""
+        # Lê o corpo antes do parser, para que continue disponível ao hash do evento
+        request.body
+        if not self._verify_webhook_signature(request):
             return Response(
-                {'detail': 'Erro interno'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'detail': 'Assinatura inválida'},
+                status=status.HTTP_401_UNAUTHORIZED
             )
 
-    def _verify_webhook_signature(self, request):
-        """Verifica a assinatura do webhook (implementação básica)."""
-        # Em produção, implementar verificação adequada da assinatura
-        # Por enquanto, aceitamos todos os webhooks (não recomendado para produção)
-        return True
-
-    def _handle_payment_notification(self, data):
-        """Processa notificações de pagamento."""
-        try:
-            payment_id = data.get('resource')
-            if not payment_id:
-                return Response({'detail': 'Payment ID não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Buscar detalhes do pagamento no Mercado Pago
-            # Por enquanto, simulamos o processamento
-            print(f"Pagamento recebido: {payment_id}")
-
-            # Aqui seria implementada a lógica para:
-            # 1. Buscar detalhes do pagamento via API do Mercado Pago
-            # 2. Atualizar status da assinatura
-            # 3. Enviar notificações para o usuário
+        topico, recurso_id, evento_id = extrair_notificacao(request)
+        if topico is None:
+            # Outros tipos de notificação (por enquanto ignoramos)
+            return Response({'detail': 'Notificação recebida'}, status=status.HTTP_200_OK)
+        if not recurso_id:
+            return Response({'detail': 'ID do recurso não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({'detail': 'Pagamento processado'}, status=status.HTTP_200_OK)
-
-        except Exception as e:
-            print(f"Erro ao processar pagamento: {str(e)}")
-            return Response(
-                {'detail': 'Erro ao processar pagamento'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-
-    def _handle_subscription_notification(self, data):
-        """Processa notificações de assinatura."""
         try:
-            subscription_id = data.get('resource')
-            if not subscription_id:
-                return Response({'detail': 'Subscription ID não encontrado'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Buscar detalhes da assinatura no Mercado Pago
-            # Por enquanto, simulamos o processamento
-            print(f"Assinatura atualizada: {subscription_id}")
-
-            # Aqui seria implementada a lógica para:
-            # 1. Buscar detalhes da assinatura via API do Mercado Pago
-            # 2. Atualizar status da assinatura no banco
-            # 3. Gerenciar renovações/cancelamentos
+            with transaction.atomic():
+                WebhookEvento.objects.create(
+                    topico=topico,
+                    recurso_id=recurso_id,
+                    evento_id=evento_id,
+                    payload=request.data if isinstance(request.data, dict) else {}
+                )
+        except IntegrityError:
+            # Reenvio de uma notificação já gravada
+            return Response({'detail': 'Notificação já recebida'}, status=status.HTTP_200_OK)
 
-            return Response({'detail': 'Assinatura processada'}, status=status.HTTP_200_OK)
+        return Response({'detail': 'Notificação recebida'}, status=status.HTTP_200_OK)
 
-        except Exception as e:
-            print(f"Erro ao processar assinatura: {str(e)}")
-            return Response(
-                {'detail': 'Erro ao processar assinatura'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+    def _verify_webhook_signature(self, request):
+        """
+        Verifica o cabeçalho ``X-Signature`` (``ts=...,v1=...``) do Mercado Pago.
+
+        ``v1`` é o HMAC-SHA256, com ``MERCADOPAGO_WEBHOOK_SECRET``, do manifesto
+        ``id:<data.id>;request-id:<X-Request-Id>;ts:<ts>;``. Sem o segredo
+        configurado (desenvolvimento), todas as notificações são aceitas.
+        """
+        segredo = settings.MERCADOPAGO_WEBHOOK_SECRET
+        if not segredo:
+            return True
+
+        partes = dict(
+            parte.strip().split('=', 1)
+            for parte in request.headers.get('X-Signature', '').split(',') if '=' in parte
+        )
+        ts, assinatura = partes.get('ts'), partes.get('v1')
+        if not ts or not assinatura:
+            return False
+
+        manifesto = ''
+        data_id = request.query_params.get('data.id')
+        if data_id:
+            manifesto += f'id:{data_id.lower() if data_id.isalnum() else data_id};'
+        request_id = request.headers.get('X-Request-Id')
+        if request_id:
+            manifesto += f'request-id:{request_id};'
+        manifesto += f'ts:{ts};'
+
+        esperada = hmac.new(segredo.encode(), manifesto.encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(esperada, assinatura)
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
-from .models import User
+from .models import EmailPendente, User
 
 
 class UserAdmin(BaseUserAdmin):
@@ -28,3 +28,13 @@ class UserAdmin(BaseUserAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    """Admin da fila de saída de emails."""
+    
+    list_display = ('assunto', 'status', 'tentativas', 'proxima_tentativa', 'data_criacao', 'data_envio')
+    list_filter = ('status',)
+    search_fields = ('assunto',)
+    readonly_fields = ('data_criacao', 'data_envio', 'ultimo_erro')
@@ -0,0 +1,145 @@
+"""
+Autenticação JWT que confia nas claims do token.
+
+``ClaimsJWTAuthentication`` monta o usuário a partir das claims emitidas por
+``TokenComClaims``, sem consultar o banco. Os campos que não estão no token
+ficam adiados e são carregados apenas se forem acessados. O direito de acesso
+da assinatura fica em ``user.direito`` (um ``subscriptions.direitos.Direito``,
+ou None sem assinatura), usado por ``ExigePlano`` e pelo ``SubscriptionViewSet``.
+
+Quando o usuário ou sua assinatura mudam, ``invalidar_autenticacao`` grava no
+cache o momento da alteração; tokens com claims anteriores a ele passam a ser
+resolvidos pelo banco até que sejam renovados. As claims só são confiáveis se
+essa marca for vista por todos os processos, ou seja, exigem um cache
+compartilhado (o Redis do docker-compose): com um cache local ao processo
+(``LocMemCache``, o padrão fora do docker-compose, ou ``DummyCache``), o
+usuário e o direito são sempre lidos do banco. Em ambos os casos, cada
+processo guarda os usuários resolvidos por ``USERS_CACHE_AUTENTICACAO_TTL``
+segundos; a invalidação descarta essas entradas apenas no processo em que
+ocorreu, de modo que os demais podem enxergar dados antigos por até esse tempo.
+
+Tokens sem as claims (emitidos antes desta autenticação) seguem o caminho
+padrão do ``JWTAuthentication``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from subscriptions.direitos import Direito, obter_direito
+from .tokens import CLAIM_EMITIDO_EM, CLAIMS_DO_DIREITO
+
+CAMPOS_DAS_CLAIMS = ('email', 'nome', 'user_type', 'is_staff', 'is_superuser')
+MAXIMO_USUARIOS_LOCAIS = 10000
+# Backends cujas marcas de invalidação não chegam aos outros processos
+CACHES_LOCAIS = (LocMemCache, DummyCache)
+
+_usuarios_locais = OrderedDict()
+_lock = threading.Lock()
+
+
+def _chave_invalidacao(user_id):
+    return f'users:autenticacao:invalidado:{user_id}'
+
+
+def _cache_compartilhado():
+    return not isinstance(caches['default'], CACHES_LOCAIS)
+
+
+def invalidar_autenticacao(user_id):
+    """Faz as claims já emitidas para o usuário deixarem de ser confiáveis."""
+    with _lock:
+        for chave in [chave for chave in _usuarios_locais if chave[0] == user_id]:
+            del _usuarios_locais[chave]
+    # Dura o mesmo que o refresh token, o maior tempo que claims antigas podem circular
+    validade = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    cache.set(_chave_invalidacao(user_id), time.time(), timeout=validade)
+
+
+def invalidar_autenticacao_em_lote(user_ids):
+    """``invalidar_autenticacao`` para vários usuários, com uma única escrita no cache."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    with _lock:
+        for chave in [chave for chave in _usuarios_locais if chave[0] in user_ids]:
+            del _usuarios_locais[chave]
+    validade = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    agora = time.time()
+    cache.set_many({_chave_invalidacao(user_id): agora for user_id in user_ids}, timeout=validade)
+
+
+def limpar_cache_autenticacao():
+    """Descarta os usuários guardados neste processo."""
+    with _lock:
+        _usuarios_locais.clear()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` que monta o usuário a partir das claims do token."""
+
+    def get_user(self, validated_token):
+        emitido_em = validated_token.get(CLAIM_EMITIDO_EM)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if emitido_em is None or user_id is None:
+            return super().get_user(validated_token)
+
+        chave = (user_id, emitido_em)
+        agora = time.monotonic()
+        with _lock:
+            entrada = _usuarios_locais.get(chave)
+        if entrada is None or entrada[0] < agora:
+            valores = self._valores_do_usuario(validated_token, user_id, emitido_em)
+            ttl = getattr(settings, 'USERS_CACHE_AUTENTICACAO_TTL', 30)
+            entrada = (agora + ttl, valores)
+            with _lock:
+                _usuarios_locais[chave] = entrada
+                _usuarios_locais.move_to_end(chave)
+                while len(_usuarios_locais) > MAXIMO_USUARIOS_LOCAIS:
+                    _usuarios_locais.popitem(last=False)
+
+        # Uma instância nova por requisição, para que alterações feitas por uma
+        # view não vazem para as demais
+        valores = dict(entrada[1])
+        direito = valores.pop('direito')
+        # from_db espera os valores na ordem dos campos do modelo
+        campos = [campo.attname for campo in self.user_model._meta.concrete_fields if campo.attname in valores]
+        user = self.user_model.from_db('default', campos, [valores[campo] for campo in campos])
+        user.direito = direito
+        user.assinatura_ativa = direito is not None and direito.ativo
+        return user
+
+    def _valores_do_usuario(self, validated_token, user_id, emitido_em):
+        """Lê os campos das claims ou, se elas foram invalidadas ou o cache é local, do banco."""
+        invalidado_em = cache.get(_chave_invalidacao(user_id))
+        if (
+            _cache_compartilhado() and (invalidado_em is None or invalidado_em < emitido_em)
+            and all(claim in validated_token for claim in CLAIMS_DO_DIREITO)
+        ):
+            valores = {api_settings.USER_ID_FIELD: user_id, 'is_active': True}
+            valores.update((campo, validated_token[campo]) for campo in CAMPOS_DAS_CLAIMS)
+            valores['direito'] = _direito_das_claims(validated_token)
+            return valores
+
+        user = super().get_user(validated_token)
+        valores = {api_settings.USER_ID_FIELD: user_id, 'is_active': user.is_active}
+        valores.update((campo, getattr(user, campo)) for campo in CAMPOS_DAS_CLAIMS)
+        valores['direito'] = obter_direito(user_id)
+        return valores
+
+
+def _direito_das_claims(token):
+    """Monta o ``Direito`` das claims do token, ou None se o usuário não tinha assinatura."""
+    if token['plano'] is None:
+        return None
+    valido_ate = token['assinatura_valida_ate']
+    if valido_ate is not None:
+        valido_ate = datetime.fromtimestamp(valido_ate, tz=timezone.utc)
+    return Direito(token['plano'], token['assinatura_ativa'], valido_ate)
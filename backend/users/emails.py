@@ -0,0 +1,108 @@
+"""
+Fila de saída de emails.
+
+``enfileirar_email`` grava o email na tabela ``EmailPendente`` e retorna de
+imediato, sem abrir conexão SMTP na requisição. ``enviar_pendentes`` (chamado
+pelo comando ``enviar_emails``) envia um lote reaproveitando uma única conexão
+com o servidor; cada falha agenda uma nova tentativa com espera exponencial,
+até ``USERS_EMAIL_MAX_TENTATIVAS``. Se a conexão não puder ser aberta, a
+falha é registrada em todos os emails do lote.
+
+Antes do envio, o lote é reservado adiando sua ``proxima_tentativa`` por
+``USERS_EMAIL_RESERVA`` segundos, o que impede que dois workers enviem o mesmo
+email e devolve à fila os emails de um worker interrompido no meio do lote.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailPendente
+
+
+def enfileirar_email(assunto, mensagem, destinatarios, remetente=None):
+    """Grava o email para envio posterior pelo worker."""
+    return EmailPendente.objects.create(
+        assunto=assunto,
+        mensagem=mensagem,
+        remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
+
+
+def espera_para_tentativa(tentativas):
+    """Segundos até a próxima tentativa: base * 2^(tentativas - 1), limitado a um dia."""
+    base = getattr(settings, 'USERS_EMAIL_BACKOFF_BASE', 60)
+    return min(base * 2 ** max(tentativas - 1, 0), 24 * 60 * 60)
+
+
+def _reservar_lote(limite):
+    """Reserva até ``limite`` emails vencidos e retorna seus objetos."""
+    agora = timezone.now()
+    reserva = getattr(settings, 'USERS_EMAIL_RESERVA', 300)
+    with transaction.atomic():
+        lote = list(
+            EmailPendente.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailPendente.Status.PENDENTE, proxima_tentativa__lte=agora)
+            .order_by('proxima_tentativa', 'id')[:limite]
+        )
+        EmailPendente.objects.filter(pk__in=[email.pk for email in lote]).update(
+            proxima_tentativa=agora + timedelta(seconds=reserva)
+        )
+    return lote
+
+
+def _registrar_falha(email, exc, maximo_tentativas):
+    """Conta a tentativa e agenda a próxima com espera exponencial (ou desiste)."""
+    email.tentativas += 1
+    email.ultimo_erro = f'{type(exc).__name__}: {exc}'
+    if email.tentativas >= maximo_tentativas:
+        email.status = EmailPendente.Status.FALHOU
+    email.proxima_tentativa = timezone.now() + timedelta(seconds=espera_para_tentativa(email.tentativas))
+    email.save(update_fields=['tentativas', 'ultimo_erro', 'status', 'proxima_tentativa'])
+
+
+def enviar_pendentes(limite=None, conexao=None):
+    """
+    Envia um lote de emails pendentes por uma única conexão.
+
+    Retorna a quantidade de emails enviados e de falhas.
+    """
+    limite = limite or getattr(settings, 'USERS_EMAIL_LOTE', 100)
+    lote = _reservar_lote(limite)
+    if not lote:
+        return 0, 0
+
+    maximo_tentativas = getattr(settings, 'USERS_EMAIL_MAX_TENTATIVAS', 5)
+    enviados, falhas = [], 0
+    conexao = conexao or get_connection(fail_silently=False)
+    try:
+        try:
+            conexao.open()
+        except Exception as exc:
+            for email in lote:
+                _registrar_falha(email, exc, maximo_tentativas)
+            return 0, len(lote)
+        for email in lote:
+            mensagem = EmailMessage(
+                email.assunto, email.mensagem, email.remetente or None,
+                email.destinatarios, connection=conexao
+            )
+            try:
+                conexao.send_messages([mensagem])
+            except Exception as exc:
+                falhas += 1
+                _registrar_falha(email, exc, maximo_tentativas)
+            else:
+                enviados.append(email.pk)
+    finally:
+        conexao.close()
+
+    EmailPendente.objects.filter(pk__in=enviados).update(
+        status=EmailPendente.Status.ENVIADO,
+        data_envio=timezone.now(),
+        ultimo_erro='',
+    )
+    return len(enviados), falhas
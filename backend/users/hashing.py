@@ -0,0 +1,178 @@
+"""
+Pool limitado para o cálculo dos hashes de senha nas views de autenticação.
+
+O PBKDF2 (e os demais hashers do Django) consome dezenas de milissegundos de
+CPU por senha. Um pico de logins, com cada worker calculando um hash, ocupa
+toda a CPU e atrasa os demais endpoints. As views de login, registro e troca
+de senha calculam os hashes em um ``ThreadPoolExecutor`` dedicado, com
+``USERS_HASH_WORKERS`` threads; a thread da requisição espera o resultado,
+mas no máximo ``USERS_HASH_WORKERS`` hashes são calculados ao mesmo tempo.
+
+A fila do pool é limitada: com ``USERS_HASH_WORKERS + USERS_HASH_FILA_MAXIMA``
+cálculos pendentes, novos pedidos falham imediatamente com
+``PoolDeHashSaturado``, que as views convertem em 429, em vez de acumular
+requisições à espera.
+
+``User.set_password`` e ``User.check_password`` continuam síncronos e fora do
+pool, então o admin, o ``createsuperuser`` e o ``ModelBackend`` nunca são
+recusados. Consultas e gravações no banco continuam na thread de quem chamou.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password, verify_password
+
+
+class PoolDeHashSaturado(Exception):
+    """O pool de hash atingiu o limite de cálculos pendentes."""
+
+    mensagem = 'Muitas requisições de autenticação em andamento. Tente novamente em instantes.'
+    # Segundos sugeridos no Retry-After
+    espera = 1
+
+    def __init__(self):
+        super().__init__(self.mensagem)
+
+
+class PoolDeHash:
+    """``ThreadPoolExecutor`` com fila limitada e contadores de uso."""
+
+    def __init__(self, trabalhadores=None, fila_maxima=None):
+        self._trabalhadores = trabalhadores
+        self._fila_maxima = fila_maxima
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self._em_execucao = 0
+        self._concluidos = 0
+        self._rejeitados = 0
+        self._segundos = 0.0
+
+    @property
+    def trabalhadores(self):
+        if self._trabalhadores is None:
+            return getattr(settings, 'USERS_HASH_WORKERS', 4)
+        return self._trabalhadores
+
+    @property
+    def fila_maxima(self):
+        if self._fila_maxima is None:
+            return getattr(settings, 'USERS_HASH_FILA_MAXIMA', 32)
+        return self._fila_maxima
+
+    def _obter_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.trabalhadores, thread_name_prefix='hash-senha'
+            )
+        return self._executor
+
+    def submeter(self, funcao, *args):
+        """Agenda ``funcao`` no pool e retorna o ``Future``; falha se estiver saturado."""
+        with self._lock:
+            if self._pendentes >= self.trabalhadores + self.fila_maxima:
+                self._rejeitados += 1
+                raise PoolDeHashSaturado()
+            self._pendentes += 1
+            executor = self._obter_executor()
+        try:
+            return executor.submit(self._executar, funcao, *args)
+        except RuntimeError:
+            with self._lock:
+                self._pendentes -= 1
+            raise
+
+    def _executar(self, funcao, *args):
+        inicio = time.perf_counter()
+        with self._lock:
+            self._em_execucao += 1
+        try:
+            return funcao(*args)
+        finally:
+            with self._lock:
+                self._em_execucao -= 1
+                self._pendentes -= 1
+                self._concluidos += 1
+                self._segundos += time.perf_counter() - inicio
+
+    def executar(self, funcao, *args):
+        """Executa ``funcao`` no pool, bloqueando a thread atual até o resultado."""
+        return self.submeter(funcao, *args).result()
+
+    def metricas(self):
+        """Retorna a ocupação atual e os totais acumulados do pool."""
+        with self._lock:
+            return {
+                'trabalhadores': self.trabalhadores,
+                'fila_maxima': self.fila_maxima,
+                'em_execucao': self._em_execucao,
+                'na_fila': self._pendentes - self._em_execucao,
+                'concluidos': self._concluidos,
+                'rejeitados': self._rejeitados,
+                'segundos_de_hash': round(self._segundos, 6),
+            }
+
+    def encerrar(self):
+        """Encerra as threads do pool; ele é recriado no próximo uso."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+pool_de_hash = PoolDeHash()
+
+
+def gerar_hash(senha):
+    """Equivalente a ``make_password`` com o cálculo feito no pool."""
+    if senha is None:
+        # Senha inutilizável, não há hash a calcular
+        return make_password(None)
+    return pool_de_hash.executar(make_password, senha)
+
+
+def verificar_senha(senha, codificada):
+    """Equivalente a ``verify_password``: retorna (correta, precisa_atualizar)."""
+    return pool_de_hash.executar(verify_password, senha, codificada)
+
+
+def definir_senha(user, senha):
+    """Equivalente a ``user.set_password`` com o cálculo feito no pool."""
+    user.password = gerar_hash(senha)
+    user._password = senha
+
+
+def conferir_senha(user, senha):
+    """Equivalente a ``user.check_password`` com o cálculo feito no pool."""
+    correta, precisa_atualizar = verificar_senha(senha, user.password)
+    if correta and precisa_atualizar:
+        user.password = gerar_hash(senha)
+        user.save(update_fields=['password'])
+    return correta
+
+
+class BackendComPoolDeHash(ModelBackend):
+    """``ModelBackend`` que confere a senha no pool.
+
+    Não faz parte de ``AUTHENTICATION_BACKENDS``; é chamado apenas pelo login da API.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Mesmo custo de um usuário existente, para não revelar quais emails estão cadastrados
+            gerar_hash(password)
+            return None
+        if conferir_senha(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
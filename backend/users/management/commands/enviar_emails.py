@@ -0,0 +1,51 @@
+"""
+Django command to send the queued emails
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.emails import enviar_pendentes
+
+
+class Command(BaseCommand):
+    """Django command to send the pending emails of the outbox"""
+
+    help = (
+        'Envia os emails pendentes da fila de saída em lotes, por uma única conexão '
+        'SMTP por lote. Com --continuo, continua verificando a fila a cada intervalo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=None, help='Quantidade máxima de emails por lote.')
+        parser.add_argument('--continuo', action='store_true', help='Não encerra ao esvaziar a fila.')
+        parser.add_argument(
+            '--intervalo', type=float, default=5,
+            help='Segundos de espera quando não há emails a enviar (com --continuo).'
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command"""
+        total_enviados = total_falhas = 0
+        while True:
+            try:
+                enviados, falhas = enviar_pendentes(limite=options['lote'])
+            except Exception as exc:
+                # No modo contínuo, um erro inesperado não derruba o worker
+                if not options['continuo']:
+                    raise
+                self.stderr.write(f'Erro ao processar a fila: {type(exc).__name__}: {exc}')
+                time.sleep(options['intervalo'])
+                continue
+            total_enviados += enviados
+            total_falhas += falhas
+            if enviados or falhas:
+                self.stdout.write(f'{enviados} email(s) enviado(s), {falhas} falha(s).')
+                continue
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Fila processada: {total_enviados} enviado(s), {total_falhas} falha(s).'
+        ))
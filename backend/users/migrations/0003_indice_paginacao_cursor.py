@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_alter_user_user_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['nome', 'id'], name='user_nome_id_idx'),
+        ),
+    ]
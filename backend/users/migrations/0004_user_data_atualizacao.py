@@ -0,0 +1,20 @@
+# Generated by Django 5.0.14 on 2026-10-18 03:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_indice_paginacao_cursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='data de atualização'),
+            preserve_default=False,
+        ),
+    ]
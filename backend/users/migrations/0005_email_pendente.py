@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 02:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_data_atualizacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255, verbose_name='assunto')),
+                ('mensagem', models.TextField(verbose_name='mensagem')),
+                ('remetente', models.CharField(blank=True, max_length=255, verbose_name='remetente')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='destinatários')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('ENVIADO', 'Enviado'), ('FALHOU', 'Falhou')], default='PENDENTE', max_length=10, verbose_name='status')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='tentativas')),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now, verbose_name='próxima tentativa')),
+                ('ultimo_erro', models.TextField(blank=True, verbose_name='último erro')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='data de criação')),
+                ('data_envio', models.DateTimeField(blank=True, null=True, verbose_name='data de envio')),
+            ],
+            options={
+                'verbose_name': 'email pendente',
+                'verbose_name_plural': 'emails pendentes',
+                'ordering': ['proxima_tentativa', 'id'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='email_status_prox_idx')],
+            },
+        ),
+    ]
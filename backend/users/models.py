@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -55,11 +56,60 @@ class User(AbstractUser):
         choices=UserType.choices,
         default=UserType.CLIENTE,
     )
+    data_atualizacao = models.DateTimeField(_('data de atualização'), auto_now=True)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['nome']
     
     objects = UserManager()
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Paginação por cursor da listagem, ordenada por nome com desempate pelo id
+            models.Index(fields=['nome', 'id'], name='user_nome_id_idx'),
+        ]
+    
     def __str__(self):
         return self.email
+
+
+class EmailPendente(models.Model):
+    """
+    Email aguardando envio (outbox).
+    
+    As views apenas gravam o email aqui; o comando ``enviar_emails`` envia os
+    pendentes em lotes, com novas tentativas em caso de falha.
+    """
+    
+    class Status(models.TextChoices):
+        PENDENTE = 'PENDENTE', _('Pendente')
+        ENVIADO = 'ENVIADO', _('Enviado')
+        FALHOU = 'FALHOU', _('Falhou')
+    
+    assunto = models.CharField(_('assunto'), max_length=255)
+    mensagem = models.TextField(_('mensagem'))
+    remetente = models.CharField(_('remetente'), max_length=255, blank=True)
+    destinatarios = models.JSONField(_('destinatários'), default=list)
+    status = models.CharField(
+        _('status'),
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDENTE,
+    )
+    tentativas = models.PositiveIntegerField(_('tentativas'), default=0)
+    proxima_tentativa = models.DateTimeField(_('próxima tentativa'), default=timezone.now)
+    ultimo_erro = models.TextField(_('último erro'), blank=True)
+    data_criacao = models.DateTimeField(_('data de criação'), auto_now_add=True)
+    data_envio = models.DateTimeField(_('data de envio'), null=True, blank=True)
+    
+    class Meta:
+        verbose_name = _('email pendente')
+        verbose_name_plural = _('emails pendentes')
+        ordering = ['proxima_tentativa', 'id']
+        indexes = [
+            # Busca do worker: pendentes cuja próxima tentativa já chegou
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_status_prox_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.assunto} -> {', '.join(self.destinatarios)}"
@@ -1,9 +1,34 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .hashing import BackendComPoolDeHash
+from .tokens import TokenComClaims, claims_do_usuario
 
 User = get_user_model()
 
+_data_hora = serializers.DateTimeField()
+
+
+def perfil_compacto(user):
+    """
+    Dados públicos do usuário, no mesmo formato de ``UserSerializer``.
+    
+    Usado nas respostas de login e registro, onde o usuário já está carregado e
+    instanciar o serializer completo (com os validadores de senha) só custa tempo.
+    """
+    return {
+        'id': user.id,
+        'email': user.email,
+        'nome': user.nome,
+        'telefone': user.telefone,
+        'user_type': user.user_type,
+        'date_joined': _data_hora.to_representation(user.date_joined),
+    }
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer para o modelo de usuário."""
@@ -78,7 +103,16 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
+        senha_codificada = validated_data.pop('senha_codificada', None)
+        if senha_codificada is None:
+            return User.objects.create_user(**validated_data)
+        
+        # Hash já calculado pela view de registro, no pool de hash
+        validated_data.pop('password')
+        user = User(**validated_data)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = senha_codificada
+        user.save()
         return user
 
 
@@ -105,4 +139,63 @@ class ResetPasswordSerializer(serializers.Serializer):
     def validate(self, attrs):
         if attrs['new_password'] != attrs['new_password_confirm']:
             raise serializers.ValidationError({"new_password": "As senhas não conferem."})
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class TokenComClaimsObtainPairSerializer(TokenObtainPairSerializer):
+    """Emite tokens com as claims de autorização do usuário."""
+    
+    token_class = TokenComClaims
+    
+    def validate(self, attrs):
+        # Como em TokenObtainPairSerializer, mas com a senha conferida no pool de hash
+        self.user = BackendComPoolDeHash().authenticate(
+            self.context.get('request'),
+            **{self.username_field: attrs[self.username_field], 'password': attrs['password']}
+        )
+        if not jwt_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        
+        refresh = self.get_token(self.user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+        return {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            # Reaproveita o usuário autenticado em vez de buscá-lo de novo na view
+            'user': perfil_compacto(self.user),
+        }
+
+
+class TokenComClaimsRefreshSerializer(TokenRefreshSerializer):
+    """Renova os tokens relendo as claims de autorização do banco."""
+    
+    token_class = TokenComClaims
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        user = User.objects.select_related('subscription').filter(
+            **{jwt_settings.USER_ID_FIELD: refresh.get(jwt_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed("Usuário não encontrado ou inativo.", code='user_inactive')
+        for claim, valor in claims_do_usuario(user).items():
+            refresh[claim] = valor
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    pass
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            
+            data['refresh'] = str(refresh)
+        
+        return data
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidar_autenticacao
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_claims_usuario(sender, instance, created=False, **kwargs):
+    """Deixa de confiar nas claims emitidas antes da alteração do usuário."""
+    if not created:
+        invalidar_autenticacao(instance.pk)
@@ -0,0 +1,194 @@
+import tempfile
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from subscriptions.models import Subscription
+from .authentication import ClaimsJWTAuthentication, limpar_cache_autenticacao
+from .models import User
+from .serializers import UserSerializer
+from .tokens import TokenComClaims
+
+
+class ClaimsJWTAuthenticationTest(TestCase):
+    """Testes para a autenticação a partir das claims do token, com um cache compartilhado."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        # O cache em arquivos é visto por todos os processos, como o Redis
+        diretorio = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': diretorio
+        }}))
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        self.autenticacao = ClaimsJWTAuthentication()
+
+    def autenticar(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        user, _ = self.autenticacao.authenticate(request)
+        return user
+
+    def test_token_contem_claims(self):
+        """Testa que o access token carrega os dados de autorização."""
+        access = TokenComClaims.for_user(self.user).access_token
+        self.assertEqual(access['user_type'], 'CLIENTE')
+        self.assertFalse(access['is_staff'])
+        self.assertTrue(access['assinatura_ativa'])
+        self.assertEqual(access['plano'], Subscription.PlanSubscription.BASIC)
+        assinatura = Subscription.objects.get(usuario=self.user)
+        self.assertEqual(access['assinatura_valida_ate'], assinatura.trial_end.timestamp())
+
+    def test_autentica_sem_consultas(self):
+        """Testa que o usuário é montado a partir das claims, sem ir ao banco."""
+        access = TokenComClaims.for_user(self.user).access_token
+        with self.assertNumQueries(0):
+            user = self.autenticar(access)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.email, 'cliente@test.com')
+            self.assertFalse(user.is_staff)
+            self.assertTrue(user.is_authenticated)
+            self.assertTrue(user.assinatura_ativa)
+            self.assertEqual(user.direito.plano, Subscription.PlanSubscription.BASIC)
+            self.assertTrue(user.direito.vigente())
+
+        # Campos fora das claims são carregados sob demanda
+        self.assertEqual(self.autenticar(access).date_joined, self.user.date_joined)
+
+    def test_alteracao_da_assinatura_invalida_claims(self):
+        """Testa que, após salvar a assinatura, o token antigo é resolvido pelo banco."""
+        access = TokenComClaims.for_user(self.user).access_token
+        self.autenticar(access)
+
+        assinatura = Subscription.objects.get(usuario=self.user)
+        assinatura.status = Subscription.StatusSubscription.CANCELED
+        assinatura.save()
+
+        user = self.autenticar(access)
+        self.assertFalse(user.assinatura_ativa)
+        self.assertFalse(user.direito.vigente())
+        # Resolvido pelo banco, o usuário é reaproveitado dentro do TTL
+        with self.assertNumQueries(0):
+            self.assertFalse(self.autenticar(access).assinatura_ativa)
+
+    def test_usuario_desativado(self):
+        """Testa que desativar o usuário invalida as claims do token."""
+        access = TokenComClaims.for_user(self.user).access_token
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar(access)
+
+    def test_token_sem_claims_consulta_o_banco(self):
+        """Testa que tokens emitidos sem as claims continuam válidos."""
+        access = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            user = self.autenticar(access)
+        self.assertEqual(user.pk, self.user.pk)
+
+
+class ClaimsJWTAuthenticationCacheLocalTest(TestCase):
+    """Testes para a autenticação com o cache local ao processo (LocMemCache)."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.user = User.objects.create_user(
+            email='staff@test.com',
+            nome='Staff Teste',
+            password='senha123',
+            user_type='ADMIN',
+            is_staff=True
+        )
+
+    def autenticar(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def test_nao_confia_nas_claims(self):
+        """Testa que, sem a marca de invalidação (vista só por outro processo), o banco prevalece."""
+        access = TokenComClaims.for_user(self.user).access_token
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        # Simula um processo que não recebeu a invalidação
+        cache.clear()
+        limpar_cache_autenticacao()
+
+        self.assertFalse(self.autenticar(access).is_staff)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        limpar_cache_autenticacao()
+        with self.assertRaises(AuthenticationFailed):
+            self.autenticar(access)
+
+
+class TokenComClaimsViewsTest(APITestCase):
+    """Testes para a emissão e renovação dos tokens com claims."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+
+    def test_login_emite_claims(self):
+        """Testa que o login retorna um access token com as claims."""
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'cliente@test.com',
+            'password': 'senha123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = AccessToken(response.data['access'])
+        self.assertEqual(access['user_type'], 'CLIENTE')
+        self.assertTrue(access['assinatura_ativa'])
+
+    def test_login_reaproveita_usuario_autenticado(self):
+        """Testa que o login busca o usuário uma única vez e retorna o perfil."""
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.post(reverse('token_obtain_pair'), {
+                'email': 'cliente@test.com',
+                'password': 'senha123'
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user'], UserSerializer(self.user).data)
+        consultas_usuario = [
+            c['sql'] for c in contexto.captured_queries
+            if c['sql'].startswith('SELECT') and 'FROM "users_user"' in c['sql']
+        ]
+        self.assertEqual(len(consultas_usuario), 1)
+
+    def test_registro_emite_claims(self):
+        """Testa que o registro retorna um access token com as claims."""
+        response = self.client.post(reverse('user-register'), {
+            'email': 'novo@test.com',
+            'nome': 'Novo Usuário',
+            'password': 'SenhaForte@123',
+            'password_confirm': 'SenhaForte@123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('assinatura_ativa', AccessToken(response.data['access']).payload)
+
+    def test_renovacao_rele_claims(self):
+        """Testa que a renovação atualiza as claims com os dados do banco."""
+        refresh = TokenComClaims.for_user(self.user)
+        Subscription.objects.filter(usuario=self.user).update(
+            status=Subscription.StatusSubscription.CANCELED
+        )
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(AccessToken(response.data['access'])['assinatura_ativa'])
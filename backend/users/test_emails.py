@@ -0,0 +1,132 @@
+from io import StringIO
+from smtplib import SMTPConnectError, SMTPException
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .emails import enfileirar_email, enviar_pendentes, espera_para_tentativa
+from .models import EmailPendente, User
+
+
+class BackendContador(EmailBackend):
+    """Backend locmem que conta as conexões abertas."""
+
+    aberturas = 0
+
+    def open(self):
+        BackendContador.aberturas += 1
+        return super().open()
+
+
+class BackendComFalha(EmailBackend):
+    """Backend locmem que recusa os emails de um destinatário."""
+
+    def send_messages(self, messages):
+        if any('falha@test.com' in mensagem.to for mensagem in messages):
+            raise SMTPException('destinatário recusado')
+        return super().send_messages(messages)
+
+
+class BackendForaDoAr(EmailBackend):
+    """Backend locmem que não consegue abrir a conexão."""
+
+    def open(self):
+        raise SMTPConnectError(421, 'servidor indisponível')
+
+
+class FilaDeEmailsTest(TestCase):
+    """Testes para a fila de saída de emails."""
+
+    @override_settings(EMAIL_BACKEND='users.test_emails.BackendContador')
+    def test_envia_lote_por_uma_conexao(self):
+        """Testa que o lote é enviado reaproveitando uma única conexão."""
+        for i in range(3):
+            enfileirar_email('Assunto', 'Mensagem', [f'cliente{i}@test.com'])
+        BackendContador.aberturas = 0
+
+        self.assertEqual(enviar_pendentes(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(BackendContador.aberturas, 1)
+        self.assertFalse(EmailPendente.objects.exclude(status=EmailPendente.Status.ENVIADO).exists())
+        # Nada a reenviar
+        self.assertEqual(enviar_pendentes(), (0, 0))
+
+    @override_settings(
+        EMAIL_BACKEND='users.test_emails.BackendComFalha',
+        USERS_EMAIL_MAX_TENTATIVAS=2
+    )
+    def test_falha_agenda_nova_tentativa(self):
+        """Testa que a falha não afeta o lote e reagenda o email com espera crescente."""
+        falho = enfileirar_email('Assunto', 'Mensagem', ['falha@test.com'])
+        enfileirar_email('Assunto', 'Mensagem', ['ok@test.com'])
+
+        self.assertEqual(enviar_pendentes(), (1, 1))
+        falho.refresh_from_db()
+        self.assertEqual(falho.status, EmailPendente.Status.PENDENTE)
+        self.assertEqual(falho.tentativas, 1)
+        self.assertIn('destinatário recusado', falho.ultimo_erro)
+        self.assertGreater(falho.proxima_tentativa, timezone.now())
+
+        # Antes da próxima tentativa o email não é reenviado
+        self.assertEqual(enviar_pendentes(), (0, 0))
+
+        EmailPendente.objects.filter(pk=falho.pk).update(proxima_tentativa=timezone.now())
+        self.assertEqual(enviar_pendentes(), (0, 1))
+        falho.refresh_from_db()
+        self.assertEqual(falho.status, EmailPendente.Status.FALHOU)
+
+    @override_settings(EMAIL_BACKEND='users.test_emails.BackendForaDoAr')
+    def test_falha_na_conexao(self):
+        """Testa que a falha ao abrir a conexão reagenda todo o lote, sem interromper o worker."""
+        for i in range(2):
+            enfileirar_email('Assunto', 'Mensagem', [f'cliente{i}@test.com'])
+
+        self.assertEqual(enviar_pendentes(), (0, 2))
+        for email in EmailPendente.objects.all():
+            self.assertEqual(email.status, EmailPendente.Status.PENDENTE)
+            self.assertEqual(email.tentativas, 1)
+            self.assertIn('servidor indisponível', email.ultimo_erro)
+            self.assertGreater(email.proxima_tentativa, timezone.now())
+
+        saida = StringIO()
+        call_command('enviar_emails', stdout=saida)
+        self.assertIn('0 enviado(s)', saida.getvalue())
+
+    def test_espera_exponencial(self):
+        """Testa que a espera dobra a cada tentativa."""
+        self.assertEqual(
+            [espera_para_tentativa(n) for n in (1, 2, 3)],
+            [espera_para_tentativa(1) * fator for fator in (1, 2, 4)]
+        )
+
+    def test_comando(self):
+        """Testa que o comando esvazia a fila."""
+        enfileirar_email('Assunto', 'Mensagem', ['cliente@test.com'])
+        saida = StringIO()
+        call_command('enviar_emails', stdout=saida)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('1 enviado(s)', saida.getvalue())
+
+
+class RecuperacaoDeSenhaEnfileiradaTest(APITestCase):
+    """Testes para o envio assíncrono do email de recuperação de senha."""
+
+    def test_view_apenas_enfileira(self):
+        """Testa que a view responde sem enviar e o worker entrega o email."""
+        User.objects.create_user(email='cliente@test.com', nome='Cliente Teste', password='senha123')
+
+        response = self.client.post(reverse('user-forgot-password'), {'email': 'cliente@test.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailPendente.objects.count(), 1)
+
+        enviar_pendentes()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['cliente@test.com'])
+        self.assertIn('recuperar-senha/confirmar', mail.outbox[0].body)
@@ -0,0 +1,179 @@
+import threading
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .hashing import PoolDeHash, PoolDeHashSaturado, pool_de_hash
+from .models import User
+
+
+class PoolDeHashTest(TestCase):
+    """Testes para o pool limitado de hash de senhas."""
+
+    def test_rejeita_quando_saturado(self):
+        """Testa que o pool recusa pedidos além de trabalhadores + fila."""
+        pool = PoolDeHash(trabalhadores=1, fila_maxima=1)
+        liberar = threading.Event()
+        try:
+            futuros = [pool.submeter(liberar.wait) for _ in range(2)]
+            with self.assertRaises(PoolDeHashSaturado):
+                pool.submeter(liberar.wait)
+            metricas = pool.metricas()
+            self.assertEqual(metricas['na_fila'] + metricas['em_execucao'], 2)
+            self.assertEqual(metricas['rejeitados'], 1)
+        finally:
+            liberar.set()
+            pool.encerrar()
+        self.assertTrue(all(futuro.result() for futuro in futuros))
+        self.assertEqual(pool.metricas()['concluidos'], 2)
+
+    def test_modelo_nao_usa_o_pool(self):
+        """Testa que set_password e check_password do modelo continuam fora do pool."""
+        concluidos = pool_de_hash.metricas()['concluidos']
+        user = User.objects.create_user(email='cliente@test.com', nome='Cliente', password='senha123')
+        self.assertTrue(user.check_password('senha123'))
+        self.assertFalse(user.check_password('errada'))
+        self.assertEqual(pool_de_hash.metricas()['concluidos'], concluidos)
+
+
+class ViewsComPoolDeHashTest(APITestCase):
+    """Testes para o login, o registro e a troca de senha com o hash no pool."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+
+    def concluidos(self):
+        return pool_de_hash.metricas()['concluidos']
+
+    def test_login(self):
+        """Testa que o login confere a senha no pool e emite os tokens com as claims."""
+        antes = self.concluidos()
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'cliente@test.com',
+            'password': 'senha123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['email'], 'cliente@test.com')
+        self.assertEqual(AccessToken(response.data['access'])['user_type'], 'CLIENTE')
+        self.assertEqual(self.concluidos(), antes + 1)
+
+    def test_login_credenciais_invalidas(self):
+        """Testa que senha errada e email inexistente recebem 401, ambos com um hash no pool."""
+        for email, senha in (('cliente@test.com', 'errada'), ('ninguem@test.com', 'senha123')):
+            antes = self.concluidos()
+            response = self.client.post(reverse('token_obtain_pair'), {'email': email, 'password': senha})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(self.concluidos(), antes + 1)
+
+    def test_login_de_usuario_inativo(self):
+        """Testa que usuários inativos não recebem tokens."""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'cliente@test.com',
+            'password': 'senha123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_registro(self):
+        """Testa que o registro grava a senha calculada no pool."""
+        antes = self.concluidos()
+        response = self.client.post(reverse('user-register'), {
+            'email': 'novo@test.com',
+            'nome': 'Novo Usuário',
+            'password': 'SenhaForte@123',
+            'password_confirm': 'SenhaForte@123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('access', response.data)
+        self.assertEqual(self.concluidos(), antes + 1)
+        self.assertTrue(check_password('SenhaForte@123', User.objects.get(email='novo@test.com').password))
+
+    def test_troca_de_senha(self):
+        """Testa que a troca de senha confere e calcula os hashes no pool."""
+        self.client.force_authenticate(user=self.user)
+        antes = self.concluidos()
+        response = self.client.post(reverse('user-change-password', args=[self.user.pk]), {
+            'old_password': 'senha123',
+            'new_password': 'NovaSenha@456',
+            'new_password_confirm': 'NovaSenha@456'
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.concluidos(), antes + 2)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('NovaSenha@456'))
+
+
+@override_settings(USERS_HASH_WORKERS=1, USERS_HASH_FILA_MAXIMA=0)
+class PoolSaturadoTest(APITestCase):
+    """Testes para a resposta 429 quando o pool de hash está saturado."""
+
+    def setUp(self):
+        """Configura os dados de teste."""
+        self.user = User.objects.create_user(
+            email='cliente@test.com',
+            nome='Cliente Teste',
+            password='senha123',
+            user_type='CLIENTE'
+        )
+        self.liberar = threading.Event()
+        self.ocupado = pool_de_hash.submeter(self.liberar.wait)
+
+    def tearDown(self):
+        self.liberar.set()
+        self.ocupado.result()
+
+    def test_login_sincrono_responde_429(self):
+        """Testa que o login DRF devolve 429 com Retry-After."""
+        response = self.client.post(reverse('token_obtain_pair'), {
+            'email': 'cliente@test.com',
+            'password': 'senha123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_registro_e_troca_de_senha_respondem_429(self):
+        """Testa que o registro e a troca de senha também devolvem 429."""
+        response = self.client.post(reverse('user-register'), {
+            'email': 'novo@test.com',
+            'nome': 'Novo Usuário',
+            'password': 'SenhaForte@123',
+            'password_confirm': 'SenhaForte@123'
+        })
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(email='novo@test.com').exists())
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('user-change-password', args=[self.user.pk]), {
+            'old_password': 'senha123',
+            'new_password': 'NovaSenha@456',
+            'new_password_confirm': 'NovaSenha@456'
+        })
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_modelo_funciona_com_o_pool_saturado(self):
+        """Testa que admin, createsuperuser e o ModelBackend não dependem do pool."""
+        admin = User.objects.create_superuser(email='admin@test.com', password='senha123', nome='Admin')
+        self.assertTrue(admin.check_password('senha123'))
+        self.assertEqual(authenticate(email='cliente@test.com', password='senha123'), self.user)
+
+    def test_metricas(self):
+        """Testa que administradores consultam a ocupação do pool."""
+        admin = User.objects.create_user(email='admin@test.com', nome='Admin', is_staff=True)
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('user-hash-pool'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['em_execucao'] + response.data['na_fila'], 1)
+        self.assertEqual(response.data['trabalhadores'], 1)
@@ -0,0 +1,50 @@
+"""
+Tokens JWT com os dados de autorização do usuário embutidos.
+
+Além do id, o token carrega ``user_type``, ``is_staff``, ``is_superuser``,
+``email``, ``nome`` e o direito de acesso da assinatura (``plano``,
+``assinatura_ativa`` e ``assinatura_valida_ate``, a projeção de
+``subscriptions.direitos``), o que permite autenticar e verificar o plano na
+maioria das requisições sem consultar o banco (ver ``users.authentication``).
+``claims_em`` registra quando esses dados foram lidos do banco; alterações
+posteriores no usuário ou na assinatura fazem a autenticação voltar ao banco.
+"""
+import time
+
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from subscriptions.direitos import projetar
+
+CLAIM_EMITIDO_EM = 'claims_em'
+CLAIMS_DO_DIREITO = ('plano', 'assinatura_ativa', 'assinatura_valida_ate')
+
+
+def claims_do_usuario(user):
+    """Retorna as claims de autorização do usuário."""
+    try:
+        direito = projetar(user.subscription)
+    except ObjectDoesNotExist:
+        direito = {'plano': None, 'ativo': False, 'valido_ate': None}
+    return {
+        'email': user.email,
+        'nome': user.nome,
+        'user_type': user.user_type,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        'plano': direito['plano'],
+        'assinatura_ativa': direito['ativo'],
+        'assinatura_valida_ate': direito['valido_ate'] and direito['valido_ate'].timestamp(),
+        CLAIM_EMITIDO_EM: time.time(),
+    }
+
+
+class TokenComClaims(RefreshToken):
+    """Refresh token cujos access tokens herdam as claims de autorização."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, valor in claims_do_usuario(user).items():
+            token[claim] = valor
+        return token
@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserViewSet, RegisterView, LogoutView, 
-    ForgotPasswordView, ResetPasswordView
+    ForgotPasswordView, ResetPasswordView, HashPoolMetricasView
 )
 
 router = DefaultRouter()
@@ -10,6 +10,7 @@ router.register('', UserViewSet)
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='user-register'),
+    path('hash-pool/', HashPoolMetricasView.as_view(), name='user-hash-pool'),
     path('logout/', LogoutView.as_view(), name='user-logout'),
     path('forgot-password/', ForgotPasswordView.as_view(), name='user-forgot-password'),
     path('reset-password/', ResetPasswordView.as_view(), name='user-reset-password'),
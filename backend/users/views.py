@@ -3,25 +3,38 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import TokenComClaims
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.conf import settings
 from django.urls import reverse
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
+from studioflow.mixins import GetCondicionalMixin
+from .emails import enfileirar_email
+from .hashing import PoolDeHashSaturado, conferir_senha, definir_senha, gerar_hash, pool_de_hash
 from .serializers import (
     UserSerializer, UserUpdateSerializer, PasswordChangeSerializer, 
-    UserRegistrationSerializer, ForgotPasswordSerializer, ResetPasswordSerializer
+    UserRegistrationSerializer, ForgotPasswordSerializer, ResetPasswordSerializer,
+    perfil_compacto
 )
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
+def _resposta_saturada(exc):
+    """Resposta 429 para quando o pool de hash de senhas está saturado."""
+    return Response(
+        {"detail": exc.mensagem},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={'Retry-After': str(exc.espera)}
+    )
+
+
+class UserViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
     """ViewSet para gerenciar usuários."""
     
     queryset = User.objects.all()
@@ -31,6 +44,8 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ['nome', 'email']
     ordering_fields = ['nome', 'email', 'date_joined']
     ordering = ['nome']
+    ordenacao_cursor = ['nome', 'id']
+    acoes_condicionais = ('list', 'retrieve', 'me')
     
     def get_permissions(self):
         """Define permissões específicas para cada ação."""
@@ -60,6 +75,12 @@ class UserViewSet(viewsets.ModelViewSet):
                 return User.objects.filter(id=self.request.user.id)
         return User.objects.all()
     
+    def queryset_versao(self):
+        """Em /me/ a resposta é o próprio usuário autenticado."""
+        if self.action == 'me':
+            return User.objects.filter(pk=self.request.user.pk)
+        return super().queryset_versao()
+    
     def get_serializer_class(self):
         """Retorna o serializer apropriado para cada ação."""
         if self.action in ['update', 'partial_update']:
@@ -75,15 +96,18 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         
         if serializer.is_valid():
-            # Verifica se a senha atual está correta
-            if not user.check_password(serializer.validated_data['old_password']):
-                return Response(
-                    {"old_password": ["Senha atual incorreta."]},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Define a nova senha
-            user.set_password(serializer.validated_data['new_password'])
+            try:
+                # Verifica se a senha atual está correta
+                if not conferir_senha(user, serializer.validated_data['old_password']):
+                    return Response(
+                        {"old_password": ["Senha atual incorreta."]},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                # Define a nova senha
+                definir_senha(user, serializer.validated_data['new_password'])
+            except PoolDeHashSaturado as exc:
+                return _resposta_saturada(exc)
             user.save()
             return Response({"message": "Senha alterada com sucesso."}, status=status.HTTP_200_OK)
         
@@ -92,7 +116,12 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Retorna os dados do usuário autenticado."""
-        serializer = UserSerializer(request.user)
+        user = request.user
+        # O usuário montado a partir do token só traz os campos das claims
+        adiados = user.get_deferred_fields()
+        if adiados:
+            user.refresh_from_db(fields=adiados)
+        serializer = UserSerializer(user)
         return Response(serializer.data)
 
 
@@ -103,10 +132,14 @@ class RegisterView(APIView):
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            try:
+                senha_codificada = gerar_hash(serializer.validated_data['password'])
+            except PoolDeHashSaturado as exc:
+                return _resposta_saturada(exc)
+            user = serializer.save(senha_codificada=senha_codificada)
+            refresh = TokenComClaims.for_user(user)
             return Response({
-                'user': UserSerializer(user).data,
+                'user': perfil_compacto(user),
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
             }, status=status.HTTP_201_CREATED)
@@ -128,15 +161,27 @@ class LogoutView(APIView):
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
-    """View customizada para login com informações adicionais do usuário."""
+    """
+    View customizada para login com informações adicionais do usuário.
+    
+    O perfil vem do próprio ``TokenComClaimsObtainPairSerializer``, a partir do
+    usuário que ele autenticou. A senha é conferida no pool de hash; com o pool
+    saturado a resposta é 429.
+    """
     
     def post(self, request, *args, **kwargs):
-        response = super().post(request, *args, **kwargs)
-        if response.status_code == 200:
-            # Adiciona informações do usuário na resposta
-            user = User.objects.get(email=request.data['email'])
-            response.data['user'] = UserSerializer(user).data
-        return response
+        try:
+            return super().post(request, *args, **kwargs)
+        except PoolDeHashSaturado as exc:
+            return _resposta_saturada(exc)
+
+
+class HashPoolMetricasView(APIView):
+    """Ocupação do pool de hash de senhas."""
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response(pool_de_hash.metricas())
 
 
 class ForgotPasswordView(APIView):
@@ -157,7 +202,7 @@ class ForgotPasswordView(APIView):
                 # Cria link de redefinição
                 reset_url = f"{settings.FRONTEND_URL}/recuperar-senha/confirmar?uid={uid}&token={token}"
                 
-                # Envia email
+                # Enfileira o email; o envio é feito pelo comando enviar_emails
                 subject = "Recuperação de Senha - StudioFlow"
                 message = f"""
                 Olá {user.nome},
@@ -175,13 +220,7 @@ class ForgotPasswordView(APIView):
                 Equipe StudioFlow
                 """
                 
-                send_mail(
-                    subject,
-                    message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
+                enfileirar_email(subject, message, [email])
                 
                 return Response(
                     {"message": "Email de recuperação enviado com sucesso."}, 
@@ -0,0 +1,14 @@
+-- Prevent overlapping active bookings for the same room
+-- Migration: 20251018120000_add_agendamentos_no_overlap.sql
+
+-- btree_gist lets the exclusion constraint combine equality on sala_id
+-- with range overlap on the booking period
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE agendamentos
+  ADD CONSTRAINT agendamentos_sem_sobreposicao
+  EXCLUDE USING gist (
+    sala_id WITH =,
+    tstzrange(horario_inicio, horario_fim, '[)') WITH &&
+  )
+  WHERE (status IN ('PENDENTE', 'CONFIRMADO'));